@@ -4,20 +4,22 @@ Makes final trading decisions and manages portfolio risk
 """
 
 import logging
-import json
 from datetime import datetime, timezone
-import openai
 from prompts.collaborative_trading_prompts import CollaborativeTradingPrompts
+from utils.llm_client import LLMClient
+from utils.log_writer import get_log_writer
+from utils.profiler import get_profiler
 
 logger = logging.getLogger("CollaborativeTrader")
 
 class ExecutorAgent:
     """Executor Agent that makes final trading decisions"""
     
-    def __init__(self, budget_manager):
+    def __init__(self, budget_manager, llm_client=None):
         self.model = "gpt-4-turbo-preview"
         self.cost_estimate = 0.60
         self.budget_manager = budget_manager
+        self.llm = llm_client or LLMClient(budget_manager)
     
     def run(self, analysis_results, market_data, account_data, positions, memory):
         """Run the executor agent to make trading decisions"""
@@ -32,20 +34,21 @@ class ExecutorAgent:
             # Pre-process analysis results to handle any string ratio formats
             self._preprocess_analysis_results(analysis_results)
             
-            # Get recent trades and trade history
+            # Get recent trades and running trade statistics
             recent_trades = memory.get_recent_trades(5)
-            all_trades = memory.get_all_trades()
+            trade_stats = memory.get_performance_stats()
             
             # Build prompt using template
-            executor_prompt = CollaborativeTradingPrompts.decision_maker(
-                analysis_results,
-                account_data,
-                positions,
-                memory.memory,
-                market_data,
-                recent_trades,
-                all_trades
-            )
+            with get_profiler().stage("prompt"):
+                executor_prompt = CollaborativeTradingPrompts.decision_maker(
+                    analysis_results,
+                    account_data,
+                    positions,
+                    memory.memory,
+                    market_data,
+                    recent_trades,
+                    trade_stats
+                )
             
             # Check budget
             if not self.budget_manager.can_spend(self.cost_estimate):
@@ -163,89 +166,19 @@ class ExecutorAgent:
     
     def _call_llm(self, prompt):
         """Call LLM API with appropriate model"""
-        try:
-            # Build parameters
-            params = {
-                "model": self.model,
-                "messages": [
-                    {"role": "system", "content": "You are a forex trading executor that works in a collaborative team of trading agents."},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.3,
-                "response_format": {"type": "json_object"}
-            }
-            
-            # Set a timeout to avoid hanging
-            import os
-            timeout = int(os.getenv("OPENAI_API_REQUEST_TIMEOUT", "60"))
-            
-            # Call API with error handling for platform detection issues
-            try:
-                # Call API
-                response = openai.chat.completions.create(**params, timeout=timeout)
-            except Exception as platform_error:
-                # Handle platform detection errors by temporarily modifying environment
-                import platform as py_platform
-                original_platform = py_platform.platform
-                
-                # Create a wrapper that catches errors
-                def safe_platform(*args, **kwargs):
-                    try:
-                        return original_platform(*args, **kwargs)
-                    except:
-                        return "Windows-10"  # Safe fallback
-                
-                # Apply the patch
-                py_platform.platform = safe_platform
-                
-                # Try again with patched platform detection
-                logger.warning(f"Retrying API call after platform error: {platform_error}")
-                response = openai.chat.completions.create(**params, timeout=timeout)
-                
-                # Restore original function
-                py_platform.platform = original_platform
-            
-            # Log usage
-            usage = response.usage
-            tokens_in = usage.prompt_tokens
-            tokens_out = usage.completion_tokens
-            cost = self._calculate_cost(tokens_in, tokens_out)
-            self.budget_manager.log_usage("executor", tokens_in, tokens_out, cost)
-            
-            # Parse response
-            result = response.choices[0].message.content
-            try:
-                return json.loads(result)
-            except json.JSONDecodeError:
-                # Try to extract JSON if wrapped in code blocks
-                import re
-                json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', result)
-                if json_match:
-                    try:
-                        return json.loads(json_match.group(1))
-                    except:
-                        logger.error("Failed to parse JSON from response")
-                        return None
-                else:
-                    logger.error("Failed to extract JSON from response")
-                    return None
-                    
-        except Exception as e:
-            logger.error(f"LLM API error: {e}")
-            return None
-    
-    def _calculate_cost(self, tokens_in, tokens_out):
-        """Calculate cost of API call"""
-        # GPT-4 pricing
-        return (tokens_in * 0.03 + tokens_out * 0.06) / 1000
+        return self.llm.complete(
+            "executor",
+            self.model,
+            "You are a forex trading executor that works in a collaborative team of trading agents.",
+            prompt
+        )
     
     def _save_response(self, result):
-        """Save response to log file"""
+        """Queue response for the background log writer"""
         try:
-            with open(f"data/executor_results.jsonl", "a") as f:
-                f.write(json.dumps({
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
-                    "result": result
-                }) + "\n")
+            get_log_writer().append("data/executor_results.jsonl", {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "result": result
+            })
         except Exception as e:
             logger.error(f"Error saving executor result: {e}")
\ No newline at end of file
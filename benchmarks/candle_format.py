@@ -0,0 +1,79 @@
+"""
+Candle Format Benchmark
+Compares parse time and memory of the list-of-dicts candle format against CandleSeries
+
+Run with: python -m benchmarks.candle_format [--candles 96] [--series 36] [--repeat 20]
+"""
+
+import time
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from core.candles import CandleSeries, format_candles
+
+
+def synthetic_candles(count, granularity_minutes=15):
+    """Build OANDA-style midpoint candles with string prices"""
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    candles = []
+    price = 1.1
+    for i in range(count):
+        price += 0.0001 if i % 3 else -0.0002
+        candles.append({
+            "complete": True,
+            "volume": 100 + i,
+            "time": (start + timedelta(minutes=granularity_minutes * i)).strftime("%Y-%m-%dT%H:%M:%S.000000000Z"),
+            "mid": {"o": f"{price:.5f}", "h": f"{price + 0.0005:.5f}", "l": f"{price - 0.0005:.5f}", "c": f"{price + 0.0001:.5f}"}
+        })
+    return candles
+
+
+def measure(parser, raw_series, repeat):
+    """Return (best parse seconds for all series, bytes allocated by one parse of all series)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for raw in raw_series:
+            parser(raw)
+        best = min(best, time.perf_counter() - start)
+    
+    tracemalloc.start()
+    parsed = [parser(raw) for raw in raw_series]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del parsed
+    
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare candle storage formats")
+    parser.add_argument("--candles", type=int, default=96, help="Candles per series")
+    parser.add_argument("--series", type=int, default=36, help="Series per cycle (12 pairs x 3 timeframes)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    
+    raw_series = [synthetic_candles(args.candles) for _ in range(args.series)]
+    
+    dict_time, dict_bytes = measure(format_candles, raw_series, args.repeat)
+    array_time, array_bytes = measure(CandleSeries.from_oanda, raw_series, args.repeat)
+    
+    # Iterating rows through the dict-compatible view, as the prompt builders do
+    series = [CandleSeries.from_oanda(raw) for raw in raw_series]
+    start = time.perf_counter()
+    for s in series:
+        for candle in s[-5:]:
+            candle.get("close")
+    view_time = time.perf_counter() - start
+    
+    print(f"{args.series} series x {args.candles} candles")
+    print(f"{'format':<16}{'parse ms':>12}{'memory KB':>12}")
+    print(f"{'list of dicts':<16}{dict_time * 1000:>12.2f}{dict_bytes / 1024:>12.1f}")
+    print(f"{'CandleSeries':<16}{array_time * 1000:>12.2f}{array_bytes / 1024:>12.1f}")
+    print(f"Memory ratio: {dict_bytes / max(array_bytes, 1):.1f}x smaller, parse ratio: {dict_time / max(array_time, 1e-9):.2f}x")
+    print(f"Last-5 row view over all series: {view_time * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""
+Tail Reader Benchmark
+Compares a full parse-and-sort of the trade log with the reverse block reader as the log grows
+
+Run with: python -m benchmarks.tail_reader [--sizes 10000 100000 1000000] [--limit 5] [--repeat 5]
+"""
+
+import os
+import json
+import time
+import argparse
+import tempfile
+
+from utils.jsonl_tail import tail_jsonl
+
+
+def write_trade_log(path, count):
+    """Write count synthetic trade records in time order"""
+    with open(path, "w") as f:
+        for i in range(count):
+            f.write(json.dumps({
+                "timestamp": f"2025-01-01T00:00:00.{i:09d}+00:00",
+                "epic": "EUR_USD",
+                "direction": "BUY" if i % 2 else "SELL",
+                "outcome": "WIN" if i % 3 else "LOSS",
+                "pattern": "Breakout",
+                "risk_percent": 1.0,
+                "return_percent": 0.5
+            }) + "\n")
+
+
+def full_scan(path, limit):
+    """The original get_recent_trades: parse every line, sort, slice"""
+    trades = []
+    with open(path, "r") as f:
+        for line in f:
+            trades.append(json.loads(line))
+    trades.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
+    return trades[:limit]
+
+
+def best_time(function, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reading the last N trades")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000], help="Trade log lengths")
+    parser.add_argument("--limit", type=int, default=5, help="Records to read")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-full", action="store_true", help="Only time the tail reader")
+    args = parser.parse_args()
+    
+    print(f"{'lines':>10}{'size MB':>10}{'full scan ms':>15}{'tail ms':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "trade_log.jsonl")
+        for size in args.sizes:
+            write_trade_log(path, size)
+            megabytes = os.path.getsize(path) / 1024 / 1024
+            
+            tail = best_time(lambda: tail_jsonl(path, args.limit), args.repeat)
+            if args.skip_full:
+                full = "-"
+            else:
+                expected = full_scan(path, args.limit)
+                assert tail_jsonl(path, args.limit)[::-1] == expected, "tail reader returned different trades"
+                full = f"{best_time(lambda: full_scan(path, args.limit), min(args.repeat, 2)) * 1000:.1f}"
+            
+            print(f"{size:>10}{megabytes:>10.1f}{full:>15}{tail * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
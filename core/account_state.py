@@ -0,0 +1,458 @@
+"""
+Account State Module
+Cached account summary and open trades, patched from order transactions and refreshed over REST when stale
+"""
+
+import os
+import math
+import time
+import logging
+import threading
+import pandas as pd
+from datetime import datetime, timezone
+
+from utils.oanda_connector import parse_trade
+from utils.exposure import split_instrument
+
+logger = logging.getLogger("CollaborativeTrader")
+
+TRADE_COLUMNS = ["trade_id", "epic", "direction", "units", "entry_price", "stop_loss", "take_profit", "profit", "open_time"]
+POSITION_COLUMNS = ["dealId", "epic", "direction", "size", "level", "profit", "currency"]
+
+# Order types whose create transaction may carry stopLossOnFill / takeProfitOnFill
+ORDER_TYPES = ("MARKET_ORDER", "LIMIT_ORDER", "STOP_ORDER", "MARKET_IF_TOUCHED_ORDER")
+
+# Dependent orders that set a trade's stop or take profit
+DEPENDENT_ORDERS = {"STOP_LOSS_ORDER": "stop_loss", "TAKE_PROFIT_ORDER": "take_profit"}
+
+
+class AccountState:
+    """Account summary and open trades shared by the controller and order execution
+    
+    REST is used only when the cached copy is older than max_age or has been
+    invalidated. In between, fills, trade closes and stop/take-profit changes
+    (from order responses or the transaction stream) are applied in place, so a
+    batch of actions reuses one fetch. Transactions are applied once each;
+    concurrent requests can deliver them out of ID order, so
+    last_transaction_id only advances over an unbroken run of applied IDs.
+    Positions are derived from open trades, one row per instrument and
+    direction.
+    
+    While a transaction feed reports it is current (mark_synced), open trades
+    are only refetched every resync_interval as a safety net. Realized P&L,
+    wins and losses are totalled per UTC day from the fills applied, and
+    get_pnl() adds unrealized P&L at current rates. day_state() and
+    restore_day() carry the day's totals and starting NAV across restarts.
+    
+    A refetched snapshot can be ahead of last_transaction_id; the
+    transactions it skips over are fetched so their P&L is still counted,
+    and passed to the replay listeners (see add_replay_listener).
+    """
+    
+    def __init__(self, oanda_client, max_age=None, resync_interval=None):
+        """Initialize account state
+        
+        Args:
+            oanda_client (OandaAPI): OANDA API client
+            max_age (float, optional): Seconds before cached state is refetched (default ACCOUNT_STATE_MAX_AGE or 30)
+            resync_interval (float, optional): Seconds between full refetches while a feed is current (default ACCOUNT_STATE_RESYNC or 900)
+        """
+        self.oanda = oanda_client
+        self.max_age = float(max_age if max_age is not None else os.getenv("ACCOUNT_STATE_MAX_AGE", 30))
+        self.resync_interval = float(resync_interval if resync_interval is not None else os.getenv("ACCOUNT_STATE_RESYNC", 900))
+        self.lock = threading.RLock()
+        
+        self.account = None
+        self.account_time = 0.0
+        self.trades = None
+        self.trades_time = 0.0
+        self.frames = None
+        
+        # Stop / take profit requested on fill, keyed by order ID until the fill opens a trade
+        self.pending_orders = {}
+        # Stop / take profit order ID -> (trade ID, column), so cancels can be applied
+        self.dependent_orders = {}
+        # Every transaction up to last_transaction_id is reflected; applied_ids holds those above it
+        self.last_transaction_id = 0
+        self.applied_ids = set()
+        self.synced_time = 0.0
+        self.replay_listeners = []
+        
+        # Today's realized P&L and closes; NAV is captured on the first get_pnl() of the day
+        self.day = None
+        self.realized = 0.0
+        self.wins = 0
+        self.losses = 0
+        self.day_start_nav = None
+        
+        self.stats = {"account_fetches": 0, "trade_fetches": 0, "cache_hits": 0, "transactions": 0}
+    
+    def invalidate(self):
+        """Force the next read to refetch over REST"""
+        with self.lock:
+            self.account_time = 0.0
+            self.trades_time = 0.0
+            self.synced_time = 0.0
+    
+    def add_replay_listener(self, callback):
+        """Call callback(transaction) for each transaction replayed from a gap a snapshot skipped"""
+        self.replay_listeners.append(callback)
+    
+    def mark_synced(self):
+        """Record that every transaction up to last_transaction_id has been applied"""
+        with self.lock:
+            self.synced_time = time.time()
+    
+    def get_account(self):
+        """Account summary in OANDA format, fetched when stale
+        
+        Returns:
+            dict: Account summary (copy)
+        """
+        with self.lock:
+            if self.account is None or time.time() - self.account_time > self.max_age:
+                self.account = self.oanda.get_account()
+                self.account_time = time.time()
+                self.stats["account_fetches"] += 1
+            else:
+                self.stats["cache_hits"] += 1
+            return dict(self.account)
+    
+    def get_open_trades(self):
+        """Open trades, fetched when stale
+        
+        Returns:
+            DataFrame: One row per trade (see parse_trade)
+        """
+        with self.lock:
+            self._ensure_trades()
+            return self._get_frames()[0]
+    
+    def get_positions(self):
+        """Open positions derived from open trades
+        
+        Returns:
+            DataFrame: dealId, epic, direction, size, level (average entry), profit, currency
+        """
+        with self.lock:
+            self._ensure_trades()
+            return self._get_frames()[1]
+    
+    def _ensure_trades(self):
+        now = time.time()
+        if self.trades is not None:
+            age = now - self.trades_time
+            synced = now - self.synced_time <= self.max_age
+            if age <= self.max_age or (synced and age <= self.resync_interval):
+                self.stats["cache_hits"] += 1
+                return
+        
+        response = self.oanda.fetch_open_trades()
+        trades = {}
+        for trade in response.get("trades", []):
+            try:
+                row = parse_trade(trade)
+                trades[row["trade_id"]] = row
+            except Exception as e:
+                logger.error(f"Error processing trade: {e}")
+        
+        self.trades = trades
+        self.trades_time = time.time()
+        self.frames = None
+        self.stats["trade_fetches"] += 1
+        
+        # Transactions up to the snapshot are already reflected in it
+        last_id = _transaction_number(response.get("lastTransactionID"))
+        if last_id and self.last_transaction_id and last_id > self.last_transaction_id:
+            try:
+                self._replay(self.last_transaction_id, last_id, self.applied_ids)
+            except Exception as e:
+                logger.warning(f"Could not replay transactions {self.last_transaction_id}-{last_id}: {e}")
+        if last_id:
+            self.last_transaction_id = max(self.last_transaction_id, last_id)
+            self.applied_ids = {number for number in self.applied_ids if number > self.last_transaction_id}
+            self._advance_watermark()
+    
+    def _get_frames(self):
+        if self.frames is None:
+            trades = pd.DataFrame(list(self.trades.values()), columns=TRADE_COLUMNS)
+            self.frames = (trades, self._derive_positions(trades))
+        return self.frames
+    
+    def _derive_positions(self, trades):
+        if trades.empty:
+            return pd.DataFrame(columns=POSITION_COLUMNS)
+        
+        frame = trades.assign(size=trades["units"].abs(), notional=trades["units"].abs() * trades["entry_price"])
+        grouped = frame.groupby(["epic", "direction"], sort=False).agg(
+            size=("size", "sum"), notional=("notional", "sum"), profit=("profit", "sum")).reset_index()
+        currency = (self.account or {}).get("currency", "USD")
+        return pd.DataFrame({
+            "dealId": "position_" + grouped["epic"] + "_" + grouped["direction"],
+            "epic": grouped["epic"],
+            "direction": grouped["direction"],
+            "size": grouped["size"],
+            "level": grouped["notional"] / grouped["size"],
+            "profit": grouped["profit"],
+            "currency": currency
+        })
+    
+    def apply_response(self, body):
+        """Apply the transactions contained in an order or trade response body"""
+        transactions = [value for value in body.values() if isinstance(value, dict) and "type" in value]
+        for transaction in sorted(transactions, key=lambda tx: _transaction_number(tx.get("id"))):
+            self.apply_transaction(transaction)
+    
+    def apply_transaction(self, transaction):
+        """Apply one transaction to the cached state
+        
+        Returns:
+            bool: False if it was already applied
+        """
+        with self.lock:
+            number = _transaction_number(transaction.get("id"))
+            if number and (number <= self.last_transaction_id or number in self.applied_ids):
+                return False
+            if number and not self.last_transaction_id:
+                # No snapshot yet to measure contiguity from
+                self.last_transaction_id = number
+            elif number:
+                self.applied_ids.add(number)
+                self._advance_watermark()
+            self.stats["transactions"] += 1
+            
+            kind = transaction.get("type")
+            if "accountBalance" in transaction and self.account is not None:
+                self.account["balance"] = transaction["accountBalance"]
+            self._apply_pnl(transaction)
+            
+            if kind in ORDER_TYPES:
+                stop = (transaction.get("stopLossOnFill") or {}).get("price")
+                take_profit = (transaction.get("takeProfitOnFill") or {}).get("price")
+                if stop or take_profit:
+                    self.pending_orders[transaction.get("id")] = (stop, take_profit)
+            elif kind == "ORDER_FILL":
+                self._apply_fill(transaction)
+            elif kind in DEPENDENT_ORDERS:
+                column = DEPENDENT_ORDERS[kind]
+                self.dependent_orders[transaction.get("id")] = (transaction.get("tradeID"), column)
+                trade = (self.trades or {}).get(transaction.get("tradeID"))
+                if trade is not None and transaction.get("price"):
+                    trade[column] = float(transaction["price"])
+            elif kind == "ORDER_CANCEL":
+                # A replaced stop is cancelled before its replacement is created, so this never clears the new one
+                trade_id, column = self.dependent_orders.pop(transaction.get("orderID"), (None, None))
+                trade = (self.trades or {}).get(trade_id)
+                if trade is not None:
+                    trade[column] = float("nan")
+            
+            self.frames = None
+            return True
+    
+    def _advance_watermark(self):
+        while self.last_transaction_id + 1 in self.applied_ids:
+            self.last_transaction_id += 1
+            self.applied_ids.discard(self.last_transaction_id)
+    
+    def _apply_fill(self, fill):
+        stop, take_profit = self.pending_orders.pop(fill.get("orderID"), (None, None))
+        if self.trades is None:
+            return
+        
+        for closed in fill.get("tradesClosed") or []:
+            self.trades.pop(closed.get("tradeID"), None)
+        
+        reduced = fill.get("tradeReduced")
+        if reduced and reduced.get("tradeID") in self.trades:
+            trade = self.trades[reduced["tradeID"]]
+            remaining = abs(trade["units"]) - abs(float(reduced.get("units", 0)))
+            trade["units"] = math.copysign(max(remaining, 0.0), trade["units"])
+        
+        opened = fill.get("tradeOpened")
+        if opened:
+            units = float(opened.get("units", 0))
+            self.trades[opened["tradeID"]] = {
+                "trade_id": opened["tradeID"],
+                "epic": fill.get("instrument"),
+                "direction": "BUY" if units > 0 else "SELL",
+                "units": units,
+                "entry_price": float(opened.get("price", fill.get("price", 0))),
+                "stop_loss": float(stop) if stop else float("nan"),
+                "take_profit": float(take_profit) if take_profit else float("nan"),
+                "profit": 0.0,
+                "open_time": fill.get("time")
+            }
+    
+    def _roll_day(self):
+        today = datetime.now(timezone.utc).date().isoformat()
+        if self.day != today:
+            self.day = today
+            self.realized = 0.0
+            self.wins = 0
+            self.losses = 0
+            self.day_start_nav = None
+    
+    def _apply_pnl(self, transaction):
+        # Realized P&L is net of financing and commission, in the account currency
+        amount = _amount(transaction.get("pl")) + _amount(transaction.get("financing")) - _amount(transaction.get("commission"))
+        if not amount:
+            return
+        self._roll_day()
+        self.realized += amount
+        
+        if transaction.get("type") == "ORDER_FILL" and (transaction.get("tradesClosed") or transaction.get("tradeReduced")):
+            pl = _amount(transaction.get("pl"))
+            if pl > 0:
+                self.wins += 1
+            elif pl < 0:
+                self.losses += 1
+    
+    def _unrealized(self, trades, rates, currency):
+        if trades.empty:
+            return 0.0
+        if rates is None:
+            return float(trades["profit"].sum())
+        
+        # Mid and quote -> account conversion once per instrument, then one vectorized pass
+        quotes = {}
+        for epic in trades["epic"].unique():
+            base, quote = split_instrument(epic)
+            quotes[epic] = (rates.rate(base, quote), rates.rate(quote, currency))
+        mid = trades["epic"].map(lambda epic: quotes[epic][0]).astype(float)
+        conversion = trades["epic"].map(lambda epic: quotes[epic][1]).astype(float)
+        
+        marked = (mid - trades["entry_price"]) * trades["units"] * conversion
+        # Trades without a quote keep the P&L from the last REST snapshot
+        return float(marked.fillna(trades["profit"]).sum())
+    
+    def get_pnl(self, rates=None):
+        """Realized and unrealized P&L and return for the current UTC day
+        
+        Args:
+            rates (ConversionRates, optional): Current rates for marking open trades
+            
+        Returns:
+            dict: date, balance, realized, unrealized, nav, day_start_nav,
+                daily_return (percent of start-of-day NAV), wins, losses, open_trades
+        """
+        account = self.get_account()
+        with self.lock:
+            self._ensure_trades()
+            self._roll_day()
+            trades = self._get_frames()[0]
+            currency = account.get("currency", "USD")
+            balance = float(self.account.get("balance", 0) or 0)
+            unrealized = self._unrealized(trades, rates, currency)
+            nav = balance + unrealized
+            
+            if self.day_start_nav is None:
+                # First look today: back out what was already realized since midnight
+                self.day_start_nav = nav - self.realized
+            daily_return = (nav - self.day_start_nav) / self.day_start_nav * 100 if self.day_start_nav else 0.0
+            
+            return {
+                "date": self.day,
+                "balance": balance,
+                "realized": self.realized,
+                "unrealized": unrealized,
+                "nav": nav,
+                "day_start_nav": self.day_start_nav,
+                "daily_return": daily_return,
+                "wins": self.wins,
+                "losses": self.losses,
+                "open_trades": len(trades)
+            }
+    
+    def day_state(self):
+        """Today's starting NAV and P&L totals, for persisting across restarts
+        
+        Returns:
+            dict: date, day_start_nav, realized, wins, losses and the transaction IDs they cover
+        """
+        with self.lock:
+            self._roll_day()
+            return {
+                "date": self.day,
+                "day_start_nav": self.day_start_nav,
+                "realized": self.realized,
+                "wins": self.wins,
+                "losses": self.losses,
+                "transaction_id": self.last_transaction_id,
+                "applied_ids": sorted(self.applied_ids)
+            }
+    
+    def restore_day(self, state):
+        """Resume today's P&L from a day_state() saved before a restart
+        
+        Fills between the saved transaction ID and the current open trades
+        snapshot happened while the process was down; they are fetched and
+        counted so realized P&L, wins and losses still cover the whole day.
+        
+        Args:
+            state (dict): Saved day_state(), ignored unless it is from today (UTC)
+            
+        Returns:
+            bool: True if today's state was restored
+        """
+        with self.lock:
+            self._roll_day()
+            if not state or state.get("date") != self.day:
+                return False
+            self.day_start_nav = state.get("day_start_nav")
+            self.realized = float(state.get("realized", 0.0))
+            self.wins = int(state.get("wins", 0))
+            self.losses = int(state.get("losses", 0))
+        
+        saved_id = _transaction_number(state.get("transaction_id"))
+        if saved_id:
+            try:
+                self._backfill_pnl(saved_id, set(state.get("applied_ids") or []))
+            except Exception as e:
+                logger.warning(f"Could not backfill P&L since transaction {saved_id}: {e}")
+        return True
+    
+    def _backfill_pnl(self, saved_id, counted_ids):
+        # Transactions after the snapshot are left to the transaction feed
+        self.get_open_trades()
+        with self.lock:
+            snapshot_id = self.last_transaction_id
+        if saved_id >= snapshot_id:
+            return
+        
+        with self.lock:
+            self._replay(saved_id, snapshot_id, counted_ids)
+    
+    def _replay(self, since_id, until_id, skip_ids):
+        # The snapshot already reflects these trades; only today's P&L and the listeners are missing
+        response = self.oanda.get_transactions_since(since_id)
+        self._roll_day()
+        for transaction in response.get("transactions", []):
+            number = _transaction_number(transaction.get("id"))
+            if number > until_id or number in skip_ids:
+                continue
+            if str(transaction.get("time", ""))[:10] == self.day:
+                self._apply_pnl(transaction)
+            for listener in self.replay_listeners:
+                try:
+                    listener(transaction)
+                except Exception as e:
+                    logger.error(f"Replay listener failed: {e}")
+    
+    def get_stats(self):
+        """REST fetches, cache hits and transactions applied"""
+        with self.lock:
+            return dict(self.stats)
+
+
+def _transaction_number(transaction_id):
+    try:
+        return int(transaction_id)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _amount(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
\ No newline at end of file
@@ -5,65 +5,198 @@ Tracks and controls API usage costs
 
 import os
 import json
+import logging
+import threading
 from datetime import datetime, timezone
 
+logger = logging.getLogger("CollaborativeTrader")
+
+
+def empty_summary(date):
+    """Usage totals for one day"""
+    return {"date": date, "total_cost": 0.0, "call_count": 0, "by_tier": {}}
+
+
+def add_call(summary, tier, tokens_in, tokens_out, cost, calls=1):
+    """Fold one call (or a tier's totals) into a day summary"""
+    summary["total_cost"] += cost
+    summary["call_count"] += calls
+    totals = summary["by_tier"].setdefault(tier, {"calls": 0, "tokens_in": 0, "tokens_out": 0, "cost": 0.0})
+    totals["calls"] += calls
+    totals["tokens_in"] += tokens_in
+    totals["tokens_out"] += tokens_out
+    totals["cost"] += cost
+
+
+def to_summary(entry):
+    """Read a usage log line as a day summary, converting the old per-call format"""
+    if "calls" not in entry:
+        return entry
+    summary = empty_summary(entry["date"])
+    for call in entry["calls"]:
+        add_call(summary, call.get("tier"), call.get("tokens_in", 0), call.get("tokens_out", 0), call.get("cost", 0.0))
+    return summary
+
 
 class LLMBudgetManager:
-    """Lightweight manager for LLM API budget"""
+    """Lightweight manager for LLM API budget
+    
+    Each call is appended as one line to the usage ledger and added to
+    in-memory running totals for the day. On startup and when the date rolls
+    over, ledger entries from earlier days are compacted into per-day summaries
+    in the usage log and the ledger is rewritten with today's calls only. Each
+    summary records the timestamp of the last ledger entry folded into it, so
+    entries still in the ledger after a crash between the two rewrites are
+    not counted twice.
+    """
     
     def __init__(self):
         self.daily_budget = float(os.getenv("DAILY_LLM_BUDGET", 20.0))
         self.usage_file = "data/usage_log.jsonl"
+        self.ledger_file = "data/usage_ledger.jsonl"
         self.today = datetime.now(timezone.utc).date().isoformat()
+        self.savings = {"cycles_skipped": 0, "saved": 0.0, "by_source": {}, "cache_hits": 0, "cache_misses": 0}
+        self.lock = threading.Lock()
+        self.ledger = None
         self.refresh_usage()
         
     def refresh_usage(self):
-        """Load or initialize today's usage data"""
+        """Replay the usage log and ledger, compacting earlier days, to rebuild today's totals"""
         os.makedirs(os.path.dirname(self.usage_file), exist_ok=True)
         
-        self.usage = {"date": self.today, "total_cost": 0.0, "calls": []}
-        
-        if os.path.exists(self.usage_file):
-            try:
-                with open(self.usage_file, "r") as f:
-                    for line in f:
-                        entry = json.loads(line)
-                        if entry.get("date") == self.today:
-                            self.usage = entry
-                            break
-            except:
-                pass
-
+        with self.lock:
+            self._close_ledger()
+            self.usage = self._compact()
+    
     def log_usage(self, tier, tokens_in, tokens_out, cost):
         """Log LLM API usage"""
-        self.usage["total_cost"] += cost
-        self.usage["calls"].append({
-            "tier": tier,
-            "tokens_in": tokens_in,
-            "tokens_out": tokens_out,
-            "cost": cost,
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        })
+        now = datetime.now(timezone.utc)
+        with self.lock:
+            if now.date().isoformat() != self.today:
+                self._rollover(now.date().isoformat())
+            
+            add_call(self.usage, tier, tokens_in, tokens_out, cost)
+            
+            if self.ledger is None:
+                self.ledger = self._open_ledger()
+            self.ledger.write(json.dumps({
+                "date": self.today,
+                "tier": tier,
+                "tokens_in": tokens_in,
+                "tokens_out": tokens_out,
+                "cost": cost,
+                "timestamp": now.isoformat()
+            }) + "\n")
+            self.ledger.flush()
+                
+        return cost
+    
+    def _rollover(self, today):
+        """Start a new day, compacting yesterday's ledger entries"""
+        self._close_ledger()
+        self.today = today
+        self.usage = self._compact()
+    
+    def _open_ledger(self):
+        """Open the ledger for appending, terminating a truncated last line first"""
+        ledger = open(self.ledger_file, "a+")
+        if ledger.tell() > 0:
+            ledger.seek(ledger.tell() - 1)
+            if ledger.read(1) != "\n":
+                ledger.write("\n")
+        return ledger
+    
+    def _close_ledger(self):
+        if self.ledger is not None:
+            self.ledger.close()
+            self.ledger = None
+    
+    def _compact(self):
+        """Fold ledger entries from earlier days into the usage log
         
-        # Save to file
-        entries = []
+        Returns:
+            dict: Today's usage summary
+        """
+        summaries = {}
         if os.path.exists(self.usage_file):
             with open(self.usage_file, "r") as f:
                 for line in f:
                     try:
-                        entry = json.loads(line)
-                        if entry.get("date") != self.today:
-                            entries.append(entry)
-                    except:
+                        summary = to_summary(json.loads(line))
+                        summaries[summary["date"]] = summary
+                    except (ValueError, KeyError):
                         continue
         
-        entries.append(self.usage)
+        # Replay the ledger; a crash mid-append can leave a truncated last line
+        today_calls = []
+        compacted = 0
+        stale = 0
+        if os.path.exists(self.ledger_file):
+            with open(self.ledger_file, "r") as f:
+                for line in f:
+                    try:
+                        call = json.loads(line)
+                        date = call["date"]
+                    except (ValueError, KeyError):
+                        logger.warning(f"Skipping unreadable usage ledger line: {line.strip()[:80]}")
+                        continue
+                    if date == self.today:
+                        today_calls.append(call)
+                        continue
+                    
+                    stale += 1
+                    summary = summaries.setdefault(date, empty_summary(date))
+                    timestamp = call.get("timestamp", "")
+                    if timestamp <= summary.get("ledger_through", ""):
+                        # Already folded in by a compaction that stopped before rewriting the ledger
+                        continue
+                    add_call(summary, call.get("tier"), call.get("tokens_in", 0), call.get("tokens_out", 0), call.get("cost", 0.0))
+                    summary["ledger_through"] = timestamp
+                    compacted += 1
         
-        with open(self.usage_file, "w") as f:
+        if stale:
+            self._write_lines(self.usage_file, [summaries[date] for date in sorted(summaries)])
+            self._write_lines(self.ledger_file, today_calls)
+            logger.info(f"Compacted {compacted} usage ledger entries into daily summaries")
+        
+        usage = empty_summary(self.today)
+        base = summaries.get(self.today)
+        if base:
+            for tier, totals in base["by_tier"].items():
+                add_call(usage, tier, totals["tokens_in"], totals["tokens_out"], totals["cost"], totals["calls"])
+        for call in today_calls:
+            add_call(usage, call.get("tier"), call.get("tokens_in", 0), call.get("tokens_out", 0), call.get("cost", 0.0))
+        return usage
+    
+    @staticmethod
+    def _write_lines(path, entries):
+        """Atomically replace a JSONL file"""
+        temp_file = f"{path}.tmp"
+        with open(temp_file, "w") as f:
             for entry in entries:
                 f.write(json.dumps(entry) + "\n")
-                
-        return cost
+        os.replace(temp_file, path)
+    
+    def log_savings(self, source, amount, skipped_cycle=False):
+        """Record LLM spend avoided (e.g. a skipped or cached call)"""
+        self.savings["saved"] += amount
+        self.savings["by_source"][source] = self.savings["by_source"].get(source, 0.0) + amount
+        if skipped_cycle:
+            self.savings["cycles_skipped"] += 1
+        return amount
+    
+    def log_cache_lookup(self, hit, saved=0.0):
+        """Record an LLM response cache lookup and the cost a hit avoided"""
+        if hit:
+            self.savings["cache_hits"] += 1
+            self.log_savings("cache", saved)
+        else:
+            self.savings["cache_misses"] += 1
+    
+    def average_cost(self, tier, default=0.0):
+        """Average cost of today's calls for a tier, or default if none were made"""
+        totals = self.usage["by_tier"].get(tier)
+        return totals["cost"] / totals["calls"] if totals and totals["calls"] else default
     
     def can_spend(self, estimated_cost):
         """Check if we have enough budget remaining"""
@@ -71,9 +204,15 @@ class LLMBudgetManager:
     
     def get_status(self):
         """Get current budget status"""
+        lookups = self.savings["cache_hits"] + self.savings["cache_misses"]
         return {
             "total_budget": self.daily_budget,
             "spent": self.usage["total_cost"],
             "remaining": self.daily_budget - self.usage["total_cost"],
-            "percent_used": (self.usage["total_cost"] / self.daily_budget) * 100
+            "percent_used": (self.usage["total_cost"] / self.daily_budget) * 100,
+            "cycles_skipped": self.savings["cycles_skipped"],
+            "saved": self.savings["saved"],
+            "cache_hits": self.savings["cache_hits"],
+            "cache_hit_rate": self.savings["cache_hits"] / lookups if lookups else 0.0,
+            "cache_saved": self.savings["by_source"].get("cache", 0.0)
         }
\ No newline at end of file
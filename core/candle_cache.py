@@ -0,0 +1,109 @@
+"""
+Candle Cache Module
+Keeps completed candles in memory and only downloads candles newer than the cache
+"""
+
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+
+from core.candles import CandleSeries
+
+logger = logging.getLogger("CollaborativeTrader")
+
+# Candle length in seconds for the OANDA granularities we use
+GRANULARITY_SECONDS = {
+    "M1": 60,
+    "M5": 5 * 60,
+    "M15": 15 * 60,
+    "M30": 30 * 60,
+    "H1": 60 * 60,
+    "H4": 4 * 60 * 60,
+    "D": 24 * 60 * 60
+}
+
+
+def parse_candle_time(timestamp):
+    """Parse an OANDA RFC3339 candle time (nanosecond precision) to a UTC datetime"""
+    return datetime.strptime(timestamp[:19], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc)
+
+
+class CandleCache:
+    """In-process candle store keyed by (instrument, granularity)"""
+    
+    def __init__(self, oanda_client):
+        self.oanda = oanda_client
+        self.store = {}
+        self.bytes_per_candle = {}
+        
+        # One lock per series so different series can be fetched concurrently
+        self._lock = threading.Lock()
+        self._series_locks = {}
+        
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+    
+    def get_candles(self, instrument, granularity, count):
+        """Get the latest completed candles, fetching only what is missing from the cache"""
+        key = (instrument, granularity)
+        with self._lock:
+            series_lock = self._series_locks.setdefault(key, threading.Lock())
+        
+        with series_lock:
+            cached = self.store.get(key)
+            
+            if cached and self._is_fresh(cached, granularity, count):
+                # Only request candles after the last completed one we hold
+                last_time = cached.last_timestamp()
+                raw = self.oanda.get_candles(instrument, granularity, from_time=last_time)
+                new_candles = CandleSeries.from_oanda(raw).after(last_time)
+                
+                cached = cached.append(new_candles).tail(count)
+                self.store[key] = cached
+                
+                with self._lock:
+                    self.hits += 1
+                    self.bytes_saved += (len(cached) - len(new_candles)) * self.bytes_per_candle.get(key, 0)
+            else:
+                raw = self.oanda.get_candles(instrument, granularity, count=count)
+                cached = CandleSeries.from_oanda(raw).tail(count)
+                self.store[key] = cached
+                
+                with self._lock:
+                    if raw:
+                        self.bytes_per_candle[key] = len(json.dumps(raw)) // len(raw)
+                    self.misses += 1
+            
+            # Series are never modified in place, so callers can share them
+            return cached
+    
+    def _is_fresh(self, cached, granularity, count):
+        """Check the cached window still overlaps the window being requested"""
+        step = GRANULARITY_SECONDS.get(granularity)
+        if step is None:
+            return False
+        
+        try:
+            age = (datetime.now(timezone.utc) - parse_candle_time(cached.last_timestamp())).total_seconds()
+        except (TypeError, ValueError):
+            return False
+        
+        return age < count * step
+    
+    def clear(self, instrument=None):
+        """Drop cached candles for one instrument or all instruments"""
+        for key in list(self.store):
+            if instrument is None or key[0] == instrument:
+                self.store.pop(key, None)
+    
+    def get_stats(self):
+        """Get cache counters"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes_saved": self.bytes_saved,
+            "series": len(self.store)
+        }
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""
+Candle Data Module
+Columnar candle storage backed by contiguous NumPy arrays
+"""
+
+import numpy as np
+
+
+def format_candles(candles):
+    """Convert OANDA candles to a list of dicts, keeping complete candles only
+    
+    This is the original row format; CandleSeries is the native output of the
+    data collector and its rows render to the same dicts.
+    """
+    data = []
+    for candle in candles:
+        if candle.get("complete", False):  # Only include complete candles
+            mid = candle.get("mid", {})
+            data.append({
+                "timestamp": candle.get("time"),
+                "open": float(mid.get("o", 0)),
+                "high": float(mid.get("h", 0)),
+                "low": float(mid.get("l", 0)),
+                "close": float(mid.get("c", 0)),
+                "volume": int(candle.get("volume", 0))
+            })
+    return data
+
+
+class CandleSeries:
+    """Completed candles for one instrument and granularity as NumPy columns
+    
+    Supports len(), indexing, slicing, iteration and reversed() like the old
+    list of dicts: an integer index returns a row dict with the same keys
+    (timestamp, open, high, low, close, volume) and a slice returns a new series.
+    """
+    
+    __slots__ = ("time", "open", "high", "low", "close", "volume")
+    
+    def __init__(self, time=None, open=None, high=None, low=None, close=None, volume=None):
+        self.time = np.asarray(time if time is not None else [], dtype="datetime64[ns]")
+        self.open = np.asarray(open if open is not None else [], dtype=np.float64)
+        self.high = np.asarray(high if high is not None else [], dtype=np.float64)
+        self.low = np.asarray(low if low is not None else [], dtype=np.float64)
+        self.close = np.asarray(close if close is not None else [], dtype=np.float64)
+        self.volume = np.asarray(volume if volume is not None else [], dtype=np.int64)
+    
+    @classmethod
+    def from_oanda(cls, candles):
+        """Build a series from OANDA candle objects, keeping complete candles only"""
+        complete = [candle for candle in candles if candle.get("complete", False)]
+        if not complete:
+            return cls()
+        
+        mids = [candle.get("mid", {}) for candle in complete]
+        return cls(
+            # OANDA times are RFC3339 with nanoseconds and a trailing Z
+            time=np.array([candle["time"].rstrip("Z") for candle in complete], dtype="datetime64[ns]"),
+            open=np.array([float(mid.get("o", 0)) for mid in mids]),
+            high=np.array([float(mid.get("h", 0)) for mid in mids]),
+            low=np.array([float(mid.get("l", 0)) for mid in mids]),
+            close=np.array([float(mid.get("c", 0)) for mid in mids]),
+            volume=np.array([candle.get("volume", 0) for candle in complete], dtype=np.int64)
+        )
+    
+    def __len__(self):
+        return len(self.time)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._take(index)
+        return self.row(index)
+    
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.row(i)
+    
+    def __reversed__(self):
+        for i in range(len(self) - 1, -1, -1):
+            yield self.row(i)
+    
+    def __eq__(self, other):
+        if not isinstance(other, CandleSeries):
+            return NotImplemented
+        return all(np.array_equal(getattr(self, name), getattr(other, name)) for name in self.__slots__)
+    
+    def __repr__(self):
+        return f"CandleSeries({len(self)} candles, last={self.last_timestamp()})"
+    
+    def row(self, index):
+        """Get one candle as a dict in the original row format"""
+        return {
+            "timestamp": self.timestamp(index),
+            "open": float(self.open[index]),
+            "high": float(self.high[index]),
+            "low": float(self.low[index]),
+            "close": float(self.close[index]),
+            "volume": int(self.volume[index])
+        }
+    
+    def timestamp(self, index):
+        """Get a candle time as an OANDA-style RFC3339 string"""
+        return str(np.datetime_as_string(self.time[index], unit="ns")) + "Z"
+    
+    def last_timestamp(self):
+        """Get the time of the newest candle, or None if empty"""
+        return self.timestamp(-1) if len(self) else None
+    
+    def to_dicts(self):
+        """Get all candles as a list of row dicts"""
+        return list(self)
+    
+    def after(self, timestamp):
+        """Get the candles strictly newer than an RFC3339 timestamp"""
+        cutoff = np.datetime64(timestamp.rstrip("Z"), "ns")
+        return self._take(self.time > cutoff)
+    
+    def append(self, other):
+        """Get a new series with the candles of another series appended"""
+        return CandleSeries(*(np.concatenate((getattr(self, name), getattr(other, name))) for name in self.__slots__))
+    
+    def tail(self, count):
+        """Get a new series with only the newest count candles"""
+        return self._take(slice(-count, None)) if len(self) > count else self
+    
+    @property
+    def nbytes(self):
+        """Memory held by the column arrays"""
+        return sum(getattr(self, name).nbytes for name in self.__slots__)
+    
+    def _take(self, selector):
+        return CandleSeries(*(getattr(self, name)[selector] for name in self.__slots__))
\ No newline at end of file
@@ -3,22 +3,52 @@ Data Collection Module
 Handles market and account data collection from OANDA API
 """
 
+import os
+import time
 import logging
 import pandas as pd
-from datetime import datetime, timezone, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from core.candle_cache import CandleCache
+from core.account_state import AccountState
+from utils.profiler import get_profiler
+from utils.fx_rates import ConversionRates
 
 logger = logging.getLogger("CollaborativeTrader")
 
+# Default candle windows collected for each instrument
+DEFAULT_TIMEFRAMES = {
+    "m15": {"granularity": "M15", "count": 96},  # 24 hours (4 candles per hour)
+    "h1": {"granularity": "H1", "count": 48},    # 2 days (24 hours per day)
+    "h4": {"granularity": "H4", "count": 30}     # 5 days (6 candles per day)
+}
+
 class DataCollector:
     """Collects market and account data"""
     
     def __init__(self, oanda_client):
         self.oanda = oanda_client
+        self.candle_cache = CandleCache(oanda_client)
+        
+        # Parallel candle requests for get_all_market_data (1 = serial)
+        self.max_workers = int(os.getenv("DATA_COLLECTION_WORKERS", 8))
+        
+        # Optional PriceStream serving latest quotes without REST polling
+        self.price_stream = None
+        self.profiler = get_profiler()
+        
+        # Cross rates for pip values and risk, refreshed by every snapshot batch
+        self.rates = ConversionRates()
+        
+        # Account and open trades, patched from every order response the client sees
+        self.account_state = AccountState(oanda_client)
+        oanda_client.add_response_listener(self.account_state.apply_response)
     
     def get_account_data(self):
         """Get account information"""
         try:
-            account = self.oanda.get_account()
+            account = self.account_state.get_account()
             
             # Format account data similar to previous format
             return {
@@ -36,60 +66,118 @@ class DataCollector:
             return {}
     
     def get_positions(self):
-        """Get open positions"""
+        """Get open positions (derived from cached open trades)"""
         try:
-            return self.oanda.get_open_positions()
+            return self.account_state.get_positions()
         except Exception as e:
             logger.error(f"Error getting positions: {e}")
             return pd.DataFrame()
     
-    def get_market_data(self, epic, timeframes=None):
-        """Collect market data for an instrument"""
+    def get_open_trades(self):
+        """Get open trades with their stop loss levels (cached)"""
+        try:
+            return self.account_state.get_open_trades()
+        except Exception as e:
+            logger.error(f"Error getting open trades: {e}")
+            return pd.DataFrame()
+    
+    def get_all_market_data(self, epics, timeframes=None, max_workers=None):
+        """Collect market data for several instruments
+        
+        Prices come from one batched pricing call; candle series for every
+        instrument and timeframe are fetched in parallel when max_workers > 1.
+        """
         if timeframes is None:
-            timeframes = {
-                "m15": {"granularity": "M15", "count": 96},  # 24 hours (4 candles per hour)
-                "h1": {"granularity": "H1", "count": 48},    # 2 days (24 hours per day)
-                "h4": {"granularity": "H4", "count": 30}     # 5 days (6 candles per day)
+            timeframes = DEFAULT_TIMEFRAMES
+        if max_workers is None:
+            max_workers = self.max_workers
+        
+        start = time.perf_counter()
+        latency_before = self.oanda.get_latency_stats()
+        
+        with self.profiler.stage("prices"):
+            snapshots = self.get_price_snapshots(epics)
+        
+        with self.profiler.stage("candles"):
+            if max_workers > 1:
+                market_data = self._collect_concurrently(epics, timeframes, snapshots, max_workers)
+            else:
+                market_data = {}
+                for epic in epics:
+                    data = self.get_market_data(epic, timeframes, snapshot=snapshots.get(epic))
+                    if data:
+                        market_data[epic] = data
+        
+        # Compare wall time with the summed latency of the requests it made
+        latency_after = self.oanda.get_latency_stats()
+        request_count = latency_after["requests"] - latency_before["requests"]
+        request_time = latency_after["total_latency"] - latency_before["total_latency"]
+        mode = f"parallel x{max_workers}" if max_workers > 1 else "serial"
+        logger.info(f"Collected market data for {len(market_data)} pairs ({mode}) in {time.perf_counter() - start:.2f}s wall, "
+                    f"{request_count} requests totalling {request_time:.2f}s")
+        
+        return market_data
+    
+    def _collect_concurrently(self, epics, timeframes, snapshots, max_workers):
+        """Fetch all (instrument, timeframe) candle series on a bounded thread pool"""
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                (epic, key): pool.submit(self._get_timeframe_data, epic, config)
+                for epic in epics
+                for key, config in timeframes.items()
             }
         
+        market_data = {}
+        for epic in epics:
+            results = {}
+            try:
+                for key in timeframes:
+                    data = futures[(epic, key)].result()
+                    if data:
+                        results[key] = data
+                
+                # Add current price snapshot
+                snapshot = snapshots.get(epic)
+                if snapshot is None:
+                    snapshot = self.get_price_snapshot(epic)
+                if snapshot:
+                    results["current"] = snapshot
+            except Exception as e:
+                logger.error(f"Error collecting market data for {epic}: {e}")
+                results = {}
+            
+            if results:
+                market_data[epic] = results
+        
+        return market_data
+    
+    def _get_timeframe_data(self, epic, config):
+        """Get completed candles for one timeframe, downloading only those not already cached"""
         # Use the instrument directly as OANDA uses standard format (EUR_USD)
-        instrument = epic
+        return self.candle_cache.get_candles(epic, config["granularity"], config["count"])
+    
+    def get_market_data(self, epic, timeframes=None, snapshot=None):
+        """Collect market data for an instrument
+        
+        A pre-fetched price snapshot can be passed in to avoid a separate pricing call.
+        """
+        if timeframes is None:
+            timeframes = DEFAULT_TIMEFRAMES
         
         results = {}
         
         try:
             for key, config in timeframes.items():
-                granularity = config["granularity"]
-                count = config["count"]
+                data = self._get_timeframe_data(epic, config)
                 
-                # Get candle data from OANDA
-                candles = self.oanda.get_candles(
-                    instrument=instrument,
-                    granularity=granularity,
-                    count=count
-                )
-                
-                if not candles:
+                if not data:
                     continue
                 
-                # Convert to standardized format
-                data = []
-                for candle in candles:
-                    if candle.get("complete", False):  # Only include complete candles
-                        mid = candle.get("mid", {})
-                        data.append({
-                            "timestamp": candle.get("time"),
-                            "open": float(mid.get("o", 0)),
-                            "high": float(mid.get("h", 0)),
-                            "low": float(mid.get("l", 0)),
-                            "close": float(mid.get("c", 0)),
-                            "volume": int(candle.get("volume", 0))
-                        })
-                
                 results[key] = data
             
             # Add current price snapshot
-            snapshot = self.get_price_snapshot(epic)
+            if snapshot is None:
+                snapshot = self.get_price_snapshot(epic)
             if snapshot:
                 results["current"] = snapshot
                 
@@ -100,28 +188,53 @@ class DataCollector:
     
     def get_price_snapshot(self, epic):
         """Get current market price snapshot"""
+        return self.get_price_snapshots([epic]).get(epic)
+    
+    def get_price_snapshots(self, epics):
+        """Get current price snapshots for several instruments in one request"""
         try:
-            instrument = epic
+            prices = {}
             
-            # Get price data
-            price_data = self.oanda.get_price(instrument)
+            # Read live quotes from the price stream when it is connected
+            if self.price_stream is not None:
+                for epic in epics:
+                    quote = self.price_stream.get_quote(epic)
+                    if quote:
+                        prices[epic] = quote
             
-            if price_data:
-                # Extract bid/ask prices
-                bid = float(price_data.get("bids", [{}])[0].get("price", 0)) if price_data.get("bids") else None
-                ask = float(price_data.get("asks", [{}])[0].get("price", 0)) if price_data.get("asks") else None
-                
-                return {
-                    "bid": bid,
-                    "offer": ask,  # OANDA uses "ask", we'll use "offer" for consistency with previous code
-                    "epic": epic,
-                    "instrument": instrument,
-                    "timestamp": datetime.now(timezone.utc).isoformat()
-                }
-            return None
+            # Poll anything the stream could not provide in one request
+            # Use the instruments directly as OANDA uses standard format (EUR_USD)
+            missing = [epic for epic in epics if epic not in prices]
+            if missing:
+                prices.update(self.oanda.get_prices(missing))
+            
+            snapshots = {}
+            for epic in epics:
+                snapshot = self._format_snapshot(epic, prices.get(epic))
+                if snapshot:
+                    snapshots[epic] = snapshot
+            self.rates.update(snapshots)
+            return snapshots
         except Exception as e:
-            logger.error(f"Error getting snapshot for {epic}: {e}")
+            logger.error(f"Error getting snapshots for {', '.join(epics)}: {e}")
+            return {}
+    
+    def _format_snapshot(self, epic, price_data):
+        """Convert OANDA price data to snapshot format"""
+        if not price_data:
             return None
+        
+        # Extract bid/ask prices
+        bid = float(price_data.get("bids", [{}])[0].get("price", 0)) if price_data.get("bids") else None
+        ask = float(price_data.get("asks", [{}])[0].get("price", 0)) if price_data.get("asks") else None
+        
+        return {
+            "bid": bid,
+            "offer": ask,  # OANDA uses "ask", we'll use "offer" for consistency with previous code
+            "epic": epic,
+            "instrument": epic,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
     
     def get_available_instruments(self):
         """Get all available instruments"""
@@ -0,0 +1,290 @@
+"""
+Technical Indicators Module
+Vectorized indicators over CandleSeries and compact per-cycle summaries for the agent prompts
+"""
+
+import logging
+import numpy as np
+
+logger = logging.getLogger("CollaborativeTrader")
+
+# Timeframes summarized for every pair
+INDICATOR_TIMEFRAMES = ["m15", "h1", "h4"]
+
+EMA_PERIODS = (20, 50)
+SMA_PERIODS = (20, 50)
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+BOLLINGER_PERIOD = 20
+BOLLINGER_STD = 2.0
+SWING_LOOKBACK = 2
+
+
+def sma(values, period):
+    """Simple moving average (NaN until period values are available)"""
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(values), np.nan)
+    if len(values) >= period:
+        cumsum = np.cumsum(np.insert(values, 0, 0.0))
+        result[period - 1:] = (cumsum[period:] - cumsum[:-period]) / period
+    return result
+
+
+def _smooth(values, alpha, seed):
+    """Exponential smoothing y[t] = y[t-1] + alpha * (x[t] - y[t-1]) starting from seed
+    
+    Uses the closed form with cumulative sums instead of a Python loop, and
+    falls back to the loop only when the decay factors would overflow.
+    """
+    n = len(values)
+    if n == 0:
+        return np.array([])
+    
+    decay = 1.0 - alpha
+    if decay <= 0 or n * -np.log(decay) > 600:
+        result = np.empty(n)
+        previous = seed
+        for i, value in enumerate(values):
+            previous = previous + alpha * (value - previous)
+            result[i] = previous
+        return result
+    
+    powers = decay ** np.arange(1, n + 1)
+    return powers * (seed + alpha * np.cumsum(values / powers))
+
+
+def ema(values, period):
+    """Exponential moving average seeded with the SMA of the first period values"""
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(values), np.nan)
+    if len(values) >= period:
+        seed = values[:period].mean()
+        result[period - 1] = seed
+        result[period:] = _smooth(values[period:], 2.0 / (period + 1), seed)
+    return result
+
+
+def wilder(values, period):
+    """Wilder smoothing (alpha = 1 / period) seeded with the SMA of the first period values"""
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(values), np.nan)
+    if len(values) >= period:
+        seed = values[:period].mean()
+        result[period - 1] = seed
+        result[period:] = _smooth(values[period:], 1.0 / period, seed)
+    return result
+
+
+def true_range(high, low, close):
+    """True range; the first bar uses its high-low range"""
+    previous_close = np.concatenate(([close[0]], close[:-1])) if len(close) else close
+    return np.maximum(high - low, np.maximum(np.abs(high - previous_close), np.abs(low - previous_close)))
+
+
+def atr(high, low, close, period=ATR_PERIOD):
+    """Average true range"""
+    return wilder(true_range(high, low, close), period)
+
+
+def rsi_components(close, period=RSI_PERIOD):
+    """Wilder-smoothed average gains and losses (aligned with close[1:])"""
+    change = np.diff(np.asarray(close, dtype=np.float64))
+    return wilder(np.clip(change, 0, None), period), wilder(np.clip(-change, 0, None), period)
+
+
+def rsi_from_averages(avg_gain, avg_loss):
+    """Relative strength index from average gains and losses"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+
+
+def rsi(close, period=RSI_PERIOD):
+    """Relative strength index"""
+    return rsi_from_averages(*rsi_components(close, period))
+
+
+def bollinger_width(close, period=BOLLINGER_PERIOD, num_std=BOLLINGER_STD):
+    """Bollinger band width as a fraction of the middle band"""
+    close = np.asarray(close, dtype=np.float64)
+    result = np.full(len(close), np.nan)
+    if len(close) >= period:
+        windows = np.lib.stride_tricks.sliding_window_view(close, period)
+        middle = windows.mean(axis=1)
+        result[period - 1:] = 2 * num_std * windows.std(axis=1) / middle
+    return result
+
+
+def swing_points(high, low, lookback=SWING_LOOKBACK):
+    """Indices of swing highs and lows (extremes of a 2 * lookback + 1 bar window)"""
+    size = 2 * lookback + 1
+    if len(high) < size:
+        return np.array([], dtype=int), np.array([], dtype=int)
+    
+    high_windows = np.lib.stride_tricks.sliding_window_view(high, size)
+    low_windows = np.lib.stride_tricks.sliding_window_view(low, size)
+    swing_highs = np.flatnonzero(high_windows.argmax(axis=1) == lookback) + lookback
+    swing_lows = np.flatnonzero(low_windows.argmin(axis=1) == lookback) + lookback
+    return swing_highs, swing_lows
+
+
+class IndicatorEngine:
+    """Computes indicator summaries once per cycle and updates them as candles arrive
+    
+    Recursive indicators (EMA, RSI, ATR) carry their state between cycles, so a
+    cycle with k new candles only does O(k) work for them; windowed indicators
+    are recomputed over the tail of the series.
+    """
+    
+    def __init__(self):
+        self.state = {}
+    
+    def update(self, market_data):
+        """Compute indicators for every pair and timeframe and attach them as market_data[epic]["indicators"]"""
+        for epic, data in market_data.items():
+            indicators = {}
+            for key in INDICATOR_TIMEFRAMES:
+                series = data.get(key)
+                if series is None or len(series) < 2:
+                    continue
+                try:
+                    indicators[key] = self.summarize(epic, key, series)
+                except Exception as e:
+                    logger.error(f"Error computing indicators for {epic} {key}: {e}")
+            if indicators:
+                data["indicators"] = indicators
+        return market_data
+    
+    def summarize(self, epic, key, series):
+        """Get the indicator summary for one series, reusing state from earlier cycles"""
+        state_key = (epic, key)
+        state = self.state.get(state_key)
+        last_time = series.time[-1]
+        
+        if state is not None and state["last_time"] == last_time:
+            return state["summary"]
+        
+        new_bars = series.after(state["last_timestamp"]) if state is not None else None
+        if state is None or len(new_bars) == 0 or len(new_bars) >= len(series) or self._incomplete(state):
+            state = self._full_state(series)
+        else:
+            state = self._advance_state(state, new_bars)
+        
+        state["last_time"] = last_time
+        state["last_timestamp"] = series.last_timestamp()
+        state["summary"] = self._summary(series, state)
+        self.state[state_key] = state
+        return state["summary"]
+    
+    def _full_state(self, series):
+        """Compute recursive indicator state from a whole series"""
+        close = series.close
+        avg_gain, avg_loss = rsi_components(close)
+        return {
+            "ema": {period: ema(close, period)[-1] for period in EMA_PERIODS},
+            "atr": atr(series.high, series.low, close)[-1],
+            "avg_gain": avg_gain[-1] if len(avg_gain) else np.nan,
+            "avg_loss": avg_loss[-1] if len(avg_loss) else np.nan,
+            "last_close": close[-1]
+        }
+    
+    @staticmethod
+    def _incomplete(state):
+        """True if a window was too short to seed some indicator, so advancing would keep it NaN"""
+        values = list(state["ema"].values()) + [state["atr"], state["avg_gain"], state["avg_loss"]]
+        return bool(np.isnan(values).any())
+    
+    def _advance_state(self, state, new_bars):
+        """Roll recursive indicator state forward over newly completed candles"""
+        close = new_bars.close
+        previous_close = np.concatenate(([state["last_close"]], close[:-1]))
+        change = close - previous_close
+        ranges = np.maximum(new_bars.high - new_bars.low,
+                            np.maximum(np.abs(new_bars.high - previous_close), np.abs(new_bars.low - previous_close)))
+        
+        advanced = {"ema": {}, "last_close": close[-1]}
+        for period, value in state["ema"].items():
+            advanced["ema"][period] = self._advance(value, close, 2.0 / (period + 1))
+        advanced["atr"] = self._advance(state["atr"], ranges, 1.0 / ATR_PERIOD)
+        advanced["avg_gain"] = self._advance(state["avg_gain"], np.clip(change, 0, None), 1.0 / RSI_PERIOD)
+        advanced["avg_loss"] = self._advance(state["avg_loss"], np.clip(-change, 0, None), 1.0 / RSI_PERIOD)
+        return advanced
+    
+    @staticmethod
+    def _advance(value, new_values, alpha):
+        if np.isnan(value):
+            return value
+        return _smooth(new_values, alpha, value)[-1]
+    
+    def _summary(self, series, state):
+        """Build the compact numeric summary used in prompts"""
+        close = series.close
+        last_close = float(close[-1])
+        
+        sma_values = {period: sma(close[-period:], period)[-1] for period in SMA_PERIODS}
+        bb_width = bollinger_width(close[-BOLLINGER_PERIOD:])[-1]
+        swing_highs, swing_lows = swing_points(series.high, series.low)
+        
+        ema_fast, ema_slow = (state["ema"][period] for period in EMA_PERIODS)
+        if np.isnan(ema_fast):
+            trend = "unknown"
+        elif np.isnan(ema_slow):
+            # Window too short for the slow EMA; judge by the fast one alone
+            trend = "up" if last_close > ema_fast else "down"
+        elif last_close > ema_fast > ema_slow:
+            trend = "up"
+        elif last_close < ema_fast < ema_slow:
+            trend = "down"
+        else:
+            trend = "mixed"
+        
+        atr_value = state["atr"]
+        rsi_value = rsi_from_averages(state["avg_gain"], state["avg_loss"])
+        
+        return {
+            "close": last_close,
+            "trend": trend,
+            "ema": {period: _clean(value) for period, value in state["ema"].items()},
+            "sma": {period: _clean(value) for period, value in sma_values.items()},
+            "rsi": _clean(rsi_value),
+            "atr": _clean(atr_value),
+            "atr_percent": _clean(atr_value / last_close * 100) if last_close else None,
+            "bb_width_percent": _clean(bb_width * 100),
+            "swing_highs": [float(series.high[i]) for i in swing_highs[-3:]],
+            "swing_lows": [float(series.low[i]) for i in swing_lows[-3:]],
+            "range_high": float(series.high.max()),
+            "range_low": float(series.low.min())
+        }
+
+
+def _clean(value):
+    """Convert a NumPy scalar to float, mapping NaN to None"""
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def format_indicator_summary(epic, indicators):
+    """Render indicator summaries as one compact line per timeframe"""
+    digits = 3 if "JPY" in epic else 5
+    lines = []
+    for key in INDICATOR_TIMEFRAMES:
+        summary = indicators.get(key)
+        if not summary:
+            continue
+        
+        def price(value):
+            return f"{value:.{digits}f}" if value is not None else "n/a"
+        
+        def number(value, fmt):
+            return format(value, fmt) if value is not None else "n/a"
+        
+        emas = "/".join(price(summary["ema"].get(period)) for period in EMA_PERIODS)
+        lines.append(
+            f"{key.upper()}: trend={summary['trend']} C={price(summary['close'])} "
+            f"EMA{'/'.join(str(p) for p in EMA_PERIODS)}={emas} "
+            f"RSI={number(summary['rsi'], '.0f')} "
+            f"ATR={price(summary['atr'])} ({number(summary['atr_percent'], '.2f')}%) "
+            f"BBW={number(summary['bb_width_percent'], '.2f')}% "
+            f"SwingH={','.join(price(v) for v in summary['swing_highs']) or 'n/a'} "
+            f"SwingL={','.join(price(v) for v in summary['swing_lows']) or 'n/a'}"
+        )
+    return lines
\ No newline at end of file
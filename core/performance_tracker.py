@@ -0,0 +1,234 @@
+"""
+Performance Tracker Module
+Streaming trade statistics updated per trade and persisted as a snapshot
+"""
+
+import os
+import json
+import logging
+from collections import deque
+
+logger = logging.getLogger("CollaborativeTrader")
+
+ROLLING_WINDOW = 20
+
+# Order fields averaged over every logged trade that has them (opens included)
+EXECUTION_FIELDS = ("size", "risk_percent", "risk_reward")
+
+
+def classify_outcome(outcome):
+    """Classify a trade outcome as "win", "loss" or None (not a completed trade)"""
+    outcome = (outcome or "").upper()
+    if "WIN" in outcome or "PROFIT" in outcome:
+        return "win"
+    if "LOSS" in outcome or "STOPPED" in outcome:
+        return "loss"
+    return None
+
+
+class PerformanceAggregator:
+    """Running sums, counts, extremes and win/loss tallies over the trade log
+    
+    The snapshot records the trade log byte offset it covers, so on startup only
+    trades appended since the last snapshot are replayed; every read is O(1).
+    """
+    
+    def __init__(self, snapshot_file="data/performance_snapshot.json", trade_log_file="data/trade_log.jsonl",
+                 rolling_window=ROLLING_WINDOW):
+        self.snapshot_file = snapshot_file
+        self.trade_log_file = trade_log_file
+        self.rolling_window = rolling_window
+        self.reset()
+        self.load()
+    
+    def reset(self):
+        """Clear all statistics"""
+        self.log_offset = 0
+        self.trade_count = 0
+        self.win_count = 0
+        self.loss_count = 0
+        self.sums = {"return_percent": 0.0, "risk_percent": 0.0, "risk_reward": 0.0}
+        self.counts = {"return_percent": 0, "risk_percent": 0, "risk_reward": 0}
+        self.execution_sums = {field: 0.0 for field in EXECUTION_FIELDS}
+        self.execution_counts = {field: 0 for field in EXECUTION_FIELDS}
+        self.largest_win = None
+        self.largest_loss = None
+        self.by_pattern = {}
+        self.by_pair = {}
+        self.rolling = deque(maxlen=self.rolling_window)
+        self.rolling_sum = 0.0
+    
+    def add(self, trade):
+        """Fold one trade into the statistics"""
+        self.trade_count += 1
+        result = classify_outcome(trade.get("outcome"))
+        
+        for field in EXECUTION_FIELDS:
+            if field in trade:
+                try:
+                    value = float(trade[field])
+                except (TypeError, ValueError):
+                    continue
+                self.execution_sums[field] += value
+                self.execution_counts[field] += 1
+        
+        # Pattern and pair tallies count every logged trade, as the optimizer prompt did
+        for tallies, key in ((self.by_pattern, trade.get("pattern", "Unknown")), (self.by_pair, trade.get("epic", "Unknown"))):
+            stats = tallies.setdefault(str(key), {"wins": 0, "losses": 0})
+            if result == "win":
+                stats["wins"] += 1
+            elif result == "loss":
+                stats["losses"] += 1
+        
+        if result is None:
+            return
+        if result == "win":
+            self.win_count += 1
+        else:
+            self.loss_count += 1
+        
+        for field in self.sums:
+            if field in trade:
+                try:
+                    value = float(trade[field])
+                except (TypeError, ValueError):
+                    continue
+                self.sums[field] += value
+                self.counts[field] += 1
+                
+                if field == "return_percent":
+                    if result == "win":
+                        self.largest_win = value if self.largest_win is None else max(self.largest_win, value)
+                    else:
+                        self.largest_loss = value if self.largest_loss is None else min(self.largest_loss, value)
+                    self._push_rolling(result, value)
+    
+    def _push_rolling(self, result, value):
+        if len(self.rolling) == self.rolling.maxlen:
+            self.rolling_sum -= self.rolling[0][1]
+        self.rolling.append((result, value))
+        self.rolling_sum += value
+    
+    def average(self, field):
+        """Running average of a numeric trade field over completed trades"""
+        return self.sums[field] / self.counts[field] if self.counts[field] else 0
+    
+    def get_metrics(self):
+        """Metrics in the TradingMemory.calculate_performance_metrics format"""
+        return {
+            "avg_return_per_trade": self.average("return_percent"),
+            "avg_risk_per_trade": self.average("risk_percent"),
+            "avg_risk_reward": self.average("risk_reward"),
+            "largest_win": self.largest_win or 0,
+            "largest_loss": self.largest_loss or 0
+        }
+    
+    def get_stats(self):
+        """Counts, win rates and per-pattern / per-pair tallies"""
+        completed = self.win_count + self.loss_count
+        rolling_wins = sum(1 for result, _ in self.rolling if result == "win")
+        return {
+            "trade_count": self.trade_count,
+            "win_count": self.win_count,
+            "loss_count": self.loss_count,
+            "win_rate": (self.win_count / completed) * 100 if completed else 0,
+            "rolling_trades": len(self.rolling),
+            "rolling_win_rate": (rolling_wins / len(self.rolling)) * 100 if self.rolling else 0,
+            "rolling_avg_return": self.rolling_sum / len(self.rolling) if self.rolling else 0,
+            "by_pattern": self.by_pattern,
+            "by_pair": self.by_pair,
+            "execution_averages": {
+                field: self.execution_sums[field] / self.execution_counts[field] if self.execution_counts[field] else 0
+                for field in EXECUTION_FIELDS
+            }
+        }
+    
+    def record(self, trade, log_offset):
+        """Add a trade just appended to the trade log (the caller saves the snapshot)"""
+        self.add(trade)
+        self.log_offset = log_offset
+    
+    def load(self):
+        """Load the snapshot and replay trades appended to the log after it"""
+        if os.path.exists(self.snapshot_file):
+            try:
+                with open(self.snapshot_file, "r") as f:
+                    snapshot = json.load(f)
+                self._restore(snapshot)
+            except Exception as e:
+                logger.warning(f"Rebuilding performance statistics, snapshot unreadable: {e}")
+                self.reset()
+        
+        if not os.path.exists(self.trade_log_file):
+            if self.trade_count:
+                self.reset()
+            return
+        
+        # A log shorter than the snapshot offset was replaced; rebuild from scratch
+        if os.path.getsize(self.trade_log_file) < self.log_offset:
+            self.reset()
+        
+        replayed = 0
+        with open(self.trade_log_file, "rb") as f:
+            f.seek(self.log_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Partial last line; picked up once it is complete
+                self.log_offset += len(line)
+                try:
+                    self.add(json.loads(line))
+                    replayed += 1
+                except json.JSONDecodeError:
+                    continue
+        
+        if replayed:
+            logger.info(f"Replayed {replayed} trades into performance statistics")
+            self.save()
+    
+    def _restore(self, snapshot):
+        self.log_offset = snapshot["log_offset"]
+        self.trade_count = snapshot["trade_count"]
+        self.win_count = snapshot["win_count"]
+        self.loss_count = snapshot["loss_count"]
+        self.sums = snapshot["sums"]
+        self.counts = snapshot["counts"]
+        # Snapshots from before execution averages were tracked leave them to be rebuilt
+        if "execution_sums" not in snapshot:
+            raise KeyError("execution_sums")
+        self.execution_sums = snapshot["execution_sums"]
+        self.execution_counts = snapshot["execution_counts"]
+        self.largest_win = snapshot["largest_win"]
+        self.largest_loss = snapshot["largest_loss"]
+        self.by_pattern = snapshot["by_pattern"]
+        self.by_pair = snapshot["by_pair"]
+        self.rolling = deque((tuple(item) for item in snapshot["rolling"]), maxlen=self.rolling_window)
+        self.rolling_sum = sum(value for _, value in self.rolling)
+    
+    def snapshot(self):
+        """Serializable statistics state"""
+        return {
+            "log_offset": self.log_offset,
+            "trade_count": self.trade_count,
+            "win_count": self.win_count,
+            "loss_count": self.loss_count,
+            "sums": self.sums,
+            "counts": self.counts,
+            "execution_sums": self.execution_sums,
+            "execution_counts": self.execution_counts,
+            "largest_win": self.largest_win,
+            "largest_loss": self.largest_loss,
+            "by_pattern": self.by_pattern,
+            "by_pair": self.by_pair,
+            "rolling": list(self.rolling)
+        }
+    
+    def save(self):
+        """Write the snapshot atomically"""
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_file) or ".", exist_ok=True)
+            temp_file = f"{self.snapshot_file}.tmp"
+            with open(temp_file, "w") as f:
+                json.dump(self.snapshot(), f)
+            os.replace(temp_file, self.snapshot_file)
+        except Exception as e:
+            logger.error(f"Error saving performance snapshot: {e}")
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""
+Pipeline Module
+Background stages that take advisory work off the trading cycle, with one-cycle back-pressure
+"""
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.metrics import get_registry
+
+logger = logging.getLogger("CollaborativeTrader")
+
+STAGE_SECONDS = get_registry().histogram(
+    "pipeline_stage_seconds", "Run time of background pipeline jobs", ("stage",))
+STAGE_BLOCKED_SECONDS = get_registry().histogram(
+    "pipeline_backpressure_seconds", "Time a cycle waited for the previous job of a stage", ("stage",))
+
+
+class BackgroundStage:
+    """Runs submitted jobs one at a time on a dedicated worker thread
+    
+    A stage holds at most one job. submit() blocks while the previous job is
+    still running, so the stage never falls more than one cycle behind the
+    cycle feeding it; the time blocked is reported as back-pressure. With
+    asynchronous=False jobs run inline in submit(), as before pipelining.
+    """
+    
+    def __init__(self, name, asynchronous=None):
+        """Initialize stage
+        
+        Args:
+            name (str): Stage name for logs, metrics and the worker thread
+            asynchronous (bool, optional): Run jobs off the caller's thread (default PIPELINE_ASYNC or True)
+        """
+        self.name = name
+        if asynchronous is None:
+            asynchronous = os.getenv("PIPELINE_ASYNC", "True").lower() in ["true", "1", "yes"]
+        self.asynchronous = asynchronous
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"pipeline-{name}") if asynchronous else None
+        self.future = None
+        self.lock = threading.Lock()
+        self.stats = {"jobs": 0, "errors": 0, "blocked": 0, "blocked_seconds": 0.0, "last_seconds": 0.0}
+    
+    def submit(self, function, *args):
+        """Run function(*args) on the stage, first waiting for the previous job
+        
+        Returns:
+            Future: The job's future, or None when run inline
+        """
+        if not self.asynchronous:
+            self._run(function, args)
+            return None
+        
+        with self.lock:
+            previous = self.future
+            if previous is not None and not previous.done():
+                start = time.perf_counter()
+                logger.info(f"Waiting for previous {self.name} job to finish")
+                previous.exception()
+                blocked = time.perf_counter() - start
+                self.stats["blocked"] += 1
+                self.stats["blocked_seconds"] += blocked
+                STAGE_BLOCKED_SECONDS.observe(blocked, stage=self.name)
+            self.future = self.executor.submit(self._run, function, args)
+            return self.future
+    
+    def _run(self, function, args):
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Error in {self.name} stage: {e}")
+            return None
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stats["jobs"] += 1
+            self.stats["last_seconds"] = elapsed
+            STAGE_SECONDS.observe(elapsed, stage=self.name)
+    
+    def busy(self):
+        """Whether a job is still running"""
+        return self.future is not None and not self.future.done()
+    
+    def drain(self, timeout=None):
+        """Wait for the current job, if any, to finish"""
+        future = self.future
+        if future is not None:
+            try:
+                future.exception(timeout=timeout)
+            except Exception as e:
+                logger.warning(f"{self.name} job still running after {timeout}s: {e}")
+    
+    def close(self):
+        """Finish the current job and stop the worker thread"""
+        self.drain()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+    
+    def get_stats(self):
+        """Jobs run, errors, and how often and how long cycles were held back"""
+        stats = dict(self.stats)
+        stats["busy"] = self.busy()
+        return stats
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+Pre-Screener Module
+Rule-based scoring of pairs from candle data to decide whether the Scout needs to run
+"""
+
+import os
+import logging
+import numpy as np
+
+logger = logging.getLogger("CollaborativeTrader")
+
+
+class PreScreener:
+    """Scores pairs on volatility expansion, range breakouts and proximity to key levels"""
+    
+    def __init__(self, threshold=None, timeframe="m15", breakout_lookback=24, expansion_bars=4):
+        """Initialize pre-screener
+        
+        Args:
+            threshold (float, optional): Minimum score for a pair to reach the Scout (default PRESCREEN_THRESHOLD or 1.0)
+            timeframe (str): Market data timeframe key the rules run on
+            breakout_lookback (int): Candles forming the recent range for breakout checks
+            expansion_bars (int): Recent candles compared with ATR for volatility expansion
+        """
+        self.threshold = float(threshold if threshold is not None else os.getenv("PRESCREEN_THRESHOLD", 1.0))
+        self.timeframe = timeframe
+        self.breakout_lookback = breakout_lookback
+        self.expansion_bars = expansion_bars
+        self.last_signature = None
+        self.pending_signature = None
+        
+        # Counters
+        self.cycles_screened = 0
+        self.cycles_skipped = 0
+    
+    def score_pair(self, epic, data):
+        """Score one pair
+        
+        Returns:
+            tuple: (score, list of reasons)
+        """
+        series = data.get(self.timeframe)
+        summary = data.get("indicators", {}).get(self.timeframe)
+        if series is None or summary is None or len(series) <= self.breakout_lookback or not summary.get("atr"):
+            return 0.0, []
+        
+        atr = summary["atr"]
+        score = 0.0
+        reasons = []
+        
+        # Volatility expansion: recent candle ranges well above ATR
+        recent_range = float(np.mean(series.high[-self.expansion_bars:] - series.low[-self.expansion_bars:]))
+        expansion = recent_range / atr
+        if expansion >= 1.5:
+            score += min(expansion - 0.5, 2.0)
+            reasons.append("volatility expansion")
+        
+        # Breakout: latest close outside the range of the preceding candles
+        close = float(series.close[-1])
+        range_high = float(series.high[-self.breakout_lookback - 1:-1].max())
+        range_low = float(series.low[-self.breakout_lookback - 1:-1].min())
+        if close > range_high or close < range_low:
+            score += 1.0
+            reasons.append("breakout above range" if close > range_high else "breakout below range")
+        
+        # Distance to key levels: price within a fraction of ATR of a swing level
+        current = data.get("current") or {}
+        price = current.get("bid") or close
+        levels = summary.get("swing_highs", []) + summary.get("swing_lows", [])
+        if levels:
+            distance = min(abs(price - level) for level in levels) / atr
+            if distance <= 0.25:
+                score += 0.5
+                reasons.append("near key level")
+        
+        return score, reasons
+    
+    def screen(self, market_data):
+        """Score all pairs
+        
+        Returns:
+            dict: Pairs at or above the threshold, epic -> {"score", "reasons"}
+        """
+        self.cycles_screened += 1
+        
+        flagged = {}
+        for epic, data in market_data.items():
+            score, reasons = self.score_pair(epic, data)
+            if score >= self.threshold:
+                flagged[epic] = {"score": round(score, 2), "reasons": reasons}
+        
+        return flagged
+    
+    def should_skip(self, flagged, market_data):
+        """Decide whether the Scout call can be skipped this cycle
+        
+        Skips when no pair crosses the threshold, or when the same signals on the
+        same completed candles were already scanned by the Scout. A scan only
+        counts once mark_scanned() confirms the Scout returned a result.
+        
+        Returns:
+            tuple: (skip, reason)
+        """
+        if not flagged:
+            self.cycles_skipped += 1
+            return True, "no pair crossed the pre-screen threshold"
+        
+        signature = frozenset(
+            (epic, tuple(info["reasons"]), market_data[epic][self.timeframe].last_timestamp())
+            for epic, info in flagged.items()
+        )
+        if signature == self.last_signature:
+            self.cycles_skipped += 1
+            return True, "signals unchanged since the last Scout call"
+        
+        self.pending_signature = signature
+        return False, ""
+    
+    def mark_scanned(self, signature=None):
+        """Record that the Scout produced a result for these signals
+        
+        Args:
+            signature (frozenset, optional): Signals scanned (default: the ones the last should_skip() let through)
+        """
+        self.last_signature = signature if signature is not None else self.pending_signature
+        self.pending_signature = None
+    
+    def get_stats(self):
+        """Get pre-screen counters"""
+        return {
+            "cycles_screened": self.cycles_screened,
+            "cycles_skipped": self.cycles_skipped
+        }
\ No newline at end of file
@@ -0,0 +1,284 @@
+"""
+Cycle Scheduler Module
+Decides when the next trading cycle runs: on candle closes, price moves and position changes
+"""
+
+import os
+import time
+import math
+import logging
+import threading
+from collections import deque
+
+from core.candle_cache import GRANULARITY_SECONDS
+from utils.metrics import get_registry
+
+logger = logging.getLogger("CollaborativeTrader")
+
+SCHEDULER_FIRES = get_registry().counter(
+    "scheduler_cycles_total", "Cycles started by the scheduler, by trigger", ("trigger",))
+SCHEDULER_DEFERRALS = get_registry().counter(
+    "scheduler_deferrals_total", "Triggers held back by spacing or the hourly cap", ("cause",))
+
+# Cycle costs averaged for the budget-aware hourly cap
+COST_WINDOW = 20
+
+
+def position_signature(positions):
+    """Map of (epic, direction) to size for an open positions DataFrame"""
+    if positions is None or len(positions) == 0:
+        return {}
+    return {(row.get("epic"), row.get("direction")): row.get("size") for _, row in positions.iterrows()}
+
+
+class CycleScheduler:
+    """Waits until there is a reason to run a trading cycle
+    
+    Triggers:
+        candle      a candle of a configured granularity completed (boundaries
+                    are aligned to UTC; OANDA aligns H4 to 17:00 New York by
+                    default, so H4 closes are approximate)
+        price_move  a mid price moved move_atr x M15 ATR (move_percent when no
+                    ATR is known) from its level at the last cycle
+        position    the open positions differ from those after the last cycle
+        notify()    events raised by other components
+    
+    Triggers are held, not dropped, while min_spacing has not elapsed or the
+    hourly cap is reached. The cap is the lower of max_per_hour and what the
+    remaining daily LLM budget affords at the recent average cycle cost, spread
+    over the hours left in the UTC day.
+    """
+    
+    def __init__(self, data_collector, budget_manager, epics, granularities=None):
+        """Initialize scheduler
+        
+        Args:
+            data_collector (DataCollector): Source of quotes and positions
+            budget_manager (LLMBudgetManager): Budget used for the hourly cap
+            epics (list): Instruments watched for price moves
+            granularities (list, optional): Candle closes that trigger a cycle (default SCHEDULER_GRANULARITIES or M15,H1,H4)
+        """
+        self.data = data_collector
+        self.budget = budget_manager
+        self.epics = list(epics)
+        
+        if granularities is None:
+            granularities = os.getenv("SCHEDULER_GRANULARITIES", "M15,H1,H4").split(",")
+        self.granularities = [g.strip().upper() for g in granularities if g.strip().upper() in GRANULARITY_SECONDS]
+        
+        self.candle_delay = float(os.getenv("SCHEDULER_CANDLE_DELAY", 5))
+        self.move_atr = float(os.getenv("SCHEDULER_MOVE_ATR", 1.0))
+        self.move_percent = float(os.getenv("SCHEDULER_MOVE_PERCENT", 0.15))
+        self.price_poll = float(os.getenv("SCHEDULER_PRICE_POLL", 30))
+        self.position_poll = float(os.getenv("SCHEDULER_POSITION_POLL", 60))
+        self.min_spacing = float(os.getenv("SCHEDULER_MIN_SPACING", 120))
+        self.max_per_hour = int(os.getenv("SCHEDULER_MAX_CYCLES_PER_HOUR", 12))
+        self.poll_interval = float(os.getenv("SCHEDULER_POLL_INTERVAL", 5))
+        self.default_cycle_cost = float(os.getenv("SCHEDULER_CYCLE_COST", 0.25))
+        
+        now = time.time()
+        self.next_boundary = {g: self._boundary_after(g, now) for g in self.granularities}
+        self.next_price_check = now
+        self.next_position_check = now + self.position_poll
+        
+        self.reference_prices = {}
+        self.reference_atr = {}
+        self.reference_positions = None
+        
+        self.pending = {}
+        self.events = []
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        
+        self.fire_times = deque()
+        self.last_fire = None
+        self.spent_at_fire = 0.0
+        self.cycle_costs = deque(maxlen=COST_WINDOW)
+        self.stats = {"cycles": 0, "by_trigger": {}, "deferred_spacing": 0, "deferred_cap": 0}
+    
+    def _boundary_after(self, granularity, now):
+        """Epoch time at which the candle open at now completes"""
+        step = GRANULARITY_SECONDS[granularity]
+        return (math.floor(now / step) + 1) * step
+    
+    def notify(self, reason):
+        """Request a cycle from another component (thread-safe)"""
+        with self.lock:
+            self.events.append(reason)
+        self.wakeup.set()
+    
+    def wait(self):
+        """Block until a trigger fires and spacing and the hourly cap allow a cycle
+        
+        Returns:
+            str: Why the cycle fired, e.g. "candle H1" or "price_move EUR_USD 1.3xATR; position GBP_USD"
+        """
+        if self.last_fire is None:
+            return self._fire(time.time(), {"startup": "startup"})
+        
+        held = None
+        while True:
+            now = time.time()
+            self._check_triggers(now)
+            
+            timeout = self.poll_interval
+            if self.pending:
+                delay, cause = self._delay(now)
+                if delay <= 0:
+                    pending, self.pending = self.pending, {}
+                    return self._fire(now, pending)
+                if held != cause:
+                    held = cause
+                    self.stats[f"deferred_{cause}"] += 1
+                    SCHEDULER_DEFERRALS.inc(cause=cause)
+                    logger.info(f"Holding cycle ({'; '.join(self.pending.values())}) for {delay:.0f}s: {cause}")
+                timeout = min(timeout, delay)
+            
+            self.wakeup.wait(max(timeout, 0.1))
+            self.wakeup.clear()
+    
+    def mark_cycle(self, market_data=None, positions=None):
+        """Record the state a cycle saw, as the reference for the next triggers
+        
+        Args:
+            market_data (dict, optional): Market data with "current" snapshots and indicators
+            positions (DataFrame, optional): Open positions after the cycle
+        """
+        for epic, data in (market_data or {}).items():
+            mid = self._mid(data.get("current"))
+            if mid is not None:
+                self.reference_prices[epic] = mid
+            atr = data.get("indicators", {}).get("m15", {}).get("atr")
+            if atr:
+                self.reference_atr[epic] = atr
+        
+        if positions is not None:
+            self.reference_positions = position_signature(positions)
+        
+        spent = self.budget.get_status()["spent"]
+        # Spend drops at the daily rollover; that cycle's cost is unknown
+        if spent >= self.spent_at_fire:
+            self.cycle_costs.append(spent - self.spent_at_fire)
+    
+    def _fire(self, now, pending):
+        self.last_fire = now
+        self.fire_times.append(now)
+        self.spent_at_fire = self.budget.get_status()["spent"]
+        
+        for trigger in pending:
+            SCHEDULER_FIRES.inc(trigger=trigger)
+            self.stats["by_trigger"][trigger] = self.stats["by_trigger"].get(trigger, 0) + 1
+        self.stats["cycles"] += 1
+        
+        reason = "; ".join(pending.values())
+        logger.info(f"Cycle triggered by {reason}")
+        return reason
+    
+    def _delay(self, now):
+        """Seconds until a cycle may start, and what is holding it ("spacing" or "cap")"""
+        spacing_delay = self.last_fire + self.min_spacing - now
+        
+        while self.fire_times and self.fire_times[0] <= now - 3600:
+            self.fire_times.popleft()
+        cap_delay = 0.0
+        if len(self.fire_times) >= self.hourly_cap(now):
+            cap_delay = self.fire_times[0] + 3600 - now
+        
+        if cap_delay > spacing_delay:
+            return cap_delay, "cap"
+        return spacing_delay, "spacing"
+    
+    def average_cycle_cost(self):
+        """Average LLM spend of recent cycles"""
+        if not self.cycle_costs:
+            return self.default_cycle_cost
+        return sum(self.cycle_costs) / len(self.cycle_costs)
+    
+    def hourly_cap(self, now=None):
+        """Cycles allowed per rolling hour given the remaining daily budget"""
+        now = now if now is not None else time.time()
+        cost = self.average_cycle_cost()
+        if cost <= 0:
+            return self.max_per_hour
+        
+        # The budget resets at UTC midnight
+        hours_left = max((86400 - now % 86400) / 3600, 1.0)
+        affordable = int(self.budget.get_status()["remaining"] / cost / hours_left)
+        return max(1, min(self.max_per_hour, affordable))
+    
+    def _check_triggers(self, now):
+        with self.lock:
+            events, self.events = self.events, []
+        for event in events:
+            self.pending.setdefault("event", event)
+        
+        closed = [g for g in self.granularities if now >= self.next_boundary[g] + self.candle_delay]
+        if closed:
+            self.pending["candle"] = f"candle {','.join(closed)}"
+            for granularity in closed:
+                self.next_boundary[granularity] = self._boundary_after(granularity, now)
+        
+        # Streamed quotes are local, so check them every poll; otherwise poll pricing
+        if self.data.price_stream is not None or now >= self.next_price_check:
+            self.next_price_check = now + self.price_poll
+            move = self._largest_move()
+            if move:
+                self.pending["price_move"] = move
+        
+        if now >= self.next_position_check:
+            self.next_position_check = now + self.position_poll
+            change = self._position_change()
+            if change:
+                self.pending["position"] = change
+    
+    def _largest_move(self):
+        """Describe the largest move past its threshold since the last cycle, if any"""
+        epics = [epic for epic in self.epics if epic in self.reference_prices]
+        if not epics:
+            return None
+        
+        largest = None
+        for epic, snapshot in self.data.get_price_snapshots(epics).items():
+            mid = self._mid(snapshot)
+            if mid is None:
+                continue
+            reference = self.reference_prices[epic]
+            atr = self.reference_atr.get(epic)
+            if atr:
+                size = abs(mid - reference) / atr
+                threshold, unit = self.move_atr, "xATR"
+            else:
+                size = abs(mid - reference) / reference * 100
+                threshold, unit = self.move_percent, "%"
+            if size >= threshold and (largest is None or size / threshold > largest[0]):
+                largest = (size / threshold, f"price_move {epic} {size:.2f}{unit}")
+        return largest[1] if largest else None
+    
+    def _position_change(self):
+        """Describe which instruments' positions changed since the last cycle, if any"""
+        current = position_signature(self.data.get_positions())
+        if self.reference_positions is None:
+            self.reference_positions = current
+            return None
+        
+        changed = {epic for epic, _ in set(current) ^ set(self.reference_positions)}
+        for key, size in current.items():
+            if self.reference_positions.get(key, size) != size:
+                changed.add(key[0])
+        if not changed:
+            return None
+        return f"position {','.join(sorted(changed))}"
+    
+    @staticmethod
+    def _mid(snapshot):
+        if not snapshot or not snapshot.get("bid") or not snapshot.get("offer"):
+            return None
+        return (snapshot["bid"] + snapshot["offer"]) / 2
+    
+    def get_stats(self):
+        """Cycles fired per trigger, deferrals, and the current hourly cap"""
+        stats = dict(self.stats)
+        stats["by_trigger"] = dict(self.stats["by_trigger"])
+        stats["hourly_cap"] = self.hourly_cap()
+        stats["avg_cycle_cost"] = self.average_cycle_cost()
+        return stats
\ No newline at end of file
@@ -12,6 +12,11 @@ import os
 from core.budget_manager import LLMBudgetManager
 from core.trading_memory import TradingMemory
 from core.data_collector import DataCollector
+from core.indicators import IndicatorEngine
+from core.pre_screener import PreScreener
+from core.scheduler import CycleScheduler
+from core.pipeline import BackgroundStage
+from core.transaction_feed import TransactionFeed
 
 from agents.scout_agent import ScoutAgent
 from agents.strategist_agent import StrategistAgent
@@ -21,11 +26,25 @@ from agents.team_reviewer import TeamReviewer
 from utils.oanda_connector import (
     execute_trade, 
     close_position, 
-    update_stop_loss
+    update_stop_losses,
+    calculate_position_sizes
 )
+from utils.oanda_stream import PriceStream
+from utils.llm_client import LLMClient
+from utils.exposure import PortfolioExposure
+from utils.profiler import get_profiler
+from utils.metrics import get_registry, start_metrics_server
 
 logger = logging.getLogger("CollaborativeTrader")
 
+CYCLE_SECONDS = get_registry().histogram(
+    "trading_cycle_seconds", "Trading cycle wall time", buckets=(1, 2.5, 5, 10, 20, 30, 60, 120, 300))
+CYCLE_STAGE_SECONDS = get_registry().histogram(
+    "trading_cycle_stage_seconds", "Wall time of top-level cycle stages", ("stage",))
+CYCLES = get_registry().counter("trading_cycles_total", "Trading cycles by result", ("result",))
+ORDERS = get_registry().counter(
+    "orders_total", "Order requests by action and result (blocked, sent, filled, rejected)", ("action", "result"))
+
 # Core currency pairs to trade
 FOREX_PAIRS = [
     "EUR_USD", "USD_JPY", "GBP_USD", 
@@ -45,16 +64,59 @@ class SystemController:
         self.budget = LLMBudgetManager()
         self.memory = TradingMemory()
         self.data = DataCollector(oanda_client)
+        self.indicators = IndicatorEngine()
+        
+        # Rule-based pre-screen in front of the Scout (PRESCREEN_ENABLED=false disables it)
+        self.pre_screener = None
+        if os.getenv("PRESCREEN_ENABLED", "True").lower() in ["true", "1", "yes"]:
+            self.pre_screener = PreScreener()
+        
+        # Per-stage cycle timings (data/cycle_timings.jsonl)
+        self.profiler = get_profiler()
         
-        # Initialize agents
-        self.scout = ScoutAgent(self.budget)
-        self.strategist = StrategistAgent(self.budget)
-        self.executor = ExecutorAgent(self.budget)
-        self.team_reviewer = TeamReviewer(self.budget)
+        # Initialize agents with one shared LLM client
+        self.llm = LLMClient(self.budget)
+        self.scout = ScoutAgent(self.budget, self.llm)
+        self.strategist = StrategistAgent(self.budget, self.llm)
+        self.executor = ExecutorAgent(self.budget, self.llm)
+        self.team_reviewer = TeamReviewer(self.budget, self.llm)
+        
+        # Team review is advisory, so it runs while the next cycle collects data
+        self.review_stage = BackgroundStage("team_review")
         
         # Trading services
         self.oanda = oanda_client
         
+        # Optional streaming price feed for FOREX_PAIRS
+        self.price_stream = None
+        if os.getenv("OANDA_PRICE_STREAM", "False").lower() in ["true", "1", "yes"]:
+            self.price_stream = PriceStream(oanda_client, FOREX_PAIRS).start()
+            self.data.price_stream = self.price_stream
+        
+        # Budget gauges are read at scrape time; the endpoint only runs if METRICS_PORT is set
+        registry = get_registry()
+        registry.gauge("llm_budget_remaining_dollars", "Remaining daily LLM budget").set_function(
+            lambda: self.budget.get_status()["remaining"])
+        registry.gauge("llm_budget_spent_dollars", "LLM spend today").set_function(
+            lambda: self.budget.get_status()["spent"])
+        registry.gauge("llm_saved_dollars", "LLM spend avoided by pre-screening and caching").set_function(
+            lambda: self.budget.get_status()["saved"])
+        self.metrics_server = start_metrics_server()
+        
+        # Event-driven cycle timing (SCHEDULER_ENABLED=false restores fixed sleeps)
+        self.scheduler = None
+        if os.getenv("SCHEDULER_ENABLED", "True").lower() in ["true", "1", "yes"]:
+            self.scheduler = CycleScheduler(self.data, self.budget, FOREX_PAIRS)
+        
+        # Account transactions keep positions and P&L current (TRANSACTION_FEED=stream|poll|off);
+        # today's starting NAV and totals survive restarts in system memory
+        self.data.account_state.restore_day(self.memory.memory.get("pnl_day"))
+        self.transaction_feed = TransactionFeed(oanda_client, self.data.account_state, on_fill=self._on_external_fill).start()
+        self.pnl = {}
+        
+        # Market data seen by the last cycle
+        self.market_data = {}
+        
         # Initialize agent responses
         self.agent_responses = {
             "scout": None,
@@ -63,13 +125,14 @@ class SystemController:
             "team_review": None
         }
     
-    def validate_trade(self, trade, account_data, positions):
+    def validate_trade(self, trade, account_data, positions, exposure=None):
         """Validate trade parameters and ensure they meet risk management criteria
         
         Args:
             trade (dict): Trade details
             account_data (dict): Account information
             positions (DataFrame): Current open positions
+            exposure (PortfolioExposure, optional): Current exposure (built from positions if not given)
             
         Returns:
             dict: Validated and possibly modified trade
@@ -94,24 +157,12 @@ class SystemController:
                 logger.warning(f"Risk percentage {risk_percent}% exceeds maximum 5%. Capping at 5%.")
                 trade["risk_percent"] = 5.0
             
-            # Calculate current total risk exposure
-            total_risk = self.calculate_portfolio_risk(positions)
-            new_total_risk = total_risk + float(trade.get("risk_percent", 2.0))
-            
-            # Check 30% total risk limit
-            if new_total_risk > 30.0:
-                logger.warning(f"New trade would put total risk at {new_total_risk:.2f}%, exceeding 30% limit. Canceling trade.")
-                return None
-            
-            # Check currency exposure limit (10%)
-            currency_risk = self.calculate_currency_risk(positions, trade.get("epic"))
-            new_currency_risk = currency_risk + float(trade.get("risk_percent", 2.0))
-            
-            # Extract currency from the epic
-            currency = trade.get("epic").split("_")[0] if "_" in trade.get("epic") else trade.get("epic")[5:8]
-            
-            if new_currency_risk > 10.0:
-                logger.warning(f"New trade would put {currency} exposure at {new_currency_risk:.2f}%, exceeding 10% limit. Canceling trade.")
+            # Check the 30% total and 10% per currency limits against stop-based exposure
+            if exposure is None:
+                exposure = self.build_exposure(positions, account_data)
+            allowed, reason = exposure.check_trade(trade.get("epic"), trade.get("direction"), trade["risk_percent"])
+            if not allowed:
+                logger.warning(f"{reason}. Canceling trade.")
                 return None
             
             # Validate entry price and stop loss
@@ -129,51 +180,46 @@ class SystemController:
             logger.error(f"Error validating trade: {e}")
             return None
     
-    def calculate_portfolio_risk(self, positions):
+    def build_exposure(self, positions, account_data):
+        """Build portfolio exposure from open trades (or positions) and account data
+        
+        Args:
+            positions (DataFrame): Open trades with stop levels, or positions without them
+            account_data (dict): Account information
+            
+        Returns:
+            PortfolioExposure: Per-position and per-currency risk
+        """
+        account_data = account_data or {}
+        currency = account_data.get("currency", "USD")
+        return PortfolioExposure(positions, float(account_data.get("balance", 1000)), currency,
+                                 self.data.rates.table(currency) or None)
+    
+    def calculate_portfolio_risk(self, positions, account_data=None):
         """Calculate current portfolio risk based on open positions
         
         Args:
-            positions (DataFrame): Current open positions
+            positions (DataFrame): Current open trades or positions
+            account_data (dict, optional): Account information
             
         Returns:
             float: Total risk percentage
         """
-        if positions is None or len(positions) == 0:
-            return 0.0
-        
-        # In a real system, this would be calculated based on 
-        # actual stop loss distances and position sizes
-        # For this simplified version, we'll assume each position
-        # has a risk of 2% (conservative estimate)
-        return len(positions) * 2.0
+        return self.build_exposure(positions, account_data).total_risk
 
-    def calculate_currency_risk(self, positions, epic):
-        """Calculate risk exposure for a specific currency
+    def calculate_currency_risk(self, positions, epic, account_data=None):
+        """Calculate net risk exposure for the base currency of an instrument
         
         Args:
-            positions (DataFrame): Current open positions
+            positions (DataFrame): Current open trades or positions
             epic (str): Instrument epic or name
+            account_data (dict, optional): Account information
             
         Returns:
-            float: Risk percentage for the currency
+            float: Absolute net risk percentage for the currency
         """
-        if positions is None or len(positions) == 0:
-            return 0.0
-        
-        # Extract the currency from the epic
         currency = epic.split("_")[0] if "_" in epic else epic[5:8]
-        
-        # Calculate risk for positions with the same currency
-        currency_risk = 0.0
-        for _, position in positions.iterrows():
-            position_epic = position.get("epic", "")
-            position_currency = position_epic.split("_")[0] if "_" in position_epic else position_epic[5:8]
-            
-            if position_currency == currency:
-                # Assume 2% risk per position with the same currency
-                currency_risk += 2.0
-        
-        return currency_risk
+        return abs(self.build_exposure(positions, account_data).net_currency_risk(currency))
     
     def execute_trading_actions(self, executor_result):
         """Execute the trading actions recommended by the executor agent
@@ -187,88 +233,122 @@ class SystemController:
                 logger.warning("No executor result to implement")
                 return False
             
-            # Get current positions
-            positions = self.data.get_positions()
-            
-            # Get account data
-            account_data = self.data.get_account_data()
+            with self.profiler.stage("refresh"):
+                # Get current positions
+                positions = self.data.get_positions()
+                
+                # Get account data
+                account_data = self.data.get_account_data()
+                
+                # Risk from open trades' stop distances, shared by validation and execution
+                exposure = self.build_exposure(self.data.get_open_trades(), account_data)
+            logger.info(f"Exposure: {exposure.summary()}")
             
-            # Execute new trades
+            # Validate new trades against risk management rules
             trade_actions = executor_result.get("trade_actions", [])
+            open_trades = []
             for trade in trade_actions:
-                # Validate trade against risk management rules
-                validated_trade = self.validate_trade(trade, account_data, positions)
+                with self.profiler.stage("validate"):
+                    validated_trade = self.validate_trade(trade, account_data, positions, exposure)
                 
                 if validated_trade is None:
                     logger.warning(f"Trade for {trade.get('epic')} failed validation. Skipping.")
+                    if trade.get("action_type") == "OPEN":
+                        ORDERS.inc(action="open", result="blocked")
                     continue
                     
                 if trade.get("action_type") == "OPEN":
-                    success, trade_result = execute_trade(self.oanda, validated_trade, positions)
-                    if success:
-                        logger.info(f"Successfully executed trade: {trade.get('epic')} {trade.get('direction')}")
-                        # Log the trade in memory
-                        self.memory.log_trade(trade_result)
-                        
-                        # Update positions after trade execution
+                    open_trades.append(validated_trade)
+            
+            # Size every validated trade in one pass at current conversion rates
+            with self.profiler.stage("validate"):
+                sizes = calculate_position_sizes(open_trades, float(account_data.get("balance", 1000)),
+                                                 account_data.get("currency", "USD"), self.data.rates)
+            
+            # Execute new trades; execute_trade re-checks limits against exposure refreshed after each fill
+            for trade, units in zip(open_trades, sizes):
+                ORDERS.inc(action="open", result="sent")
+                with self.profiler.stage("order"):
+                    success, trade_result = execute_trade(self.oanda, trade, positions, exposure,
+                                                          int(units) if units > 0 else None, self.data.rates, account_data)
+                ORDERS.inc(action="open", result="filled" if success else "rejected")
+                if success:
+                    logger.info(f"Successfully executed trade: {trade.get('epic')} {trade.get('direction')}")
+                    # Log the trade in memory
+                    self.memory.log_trade(trade_result)
+                    
+                    # Update positions and exposure after trade execution
+                    with self.profiler.stage("refresh"):
                         positions = self.data.get_positions()
-                        
-                        # Save analysis for this pair
-                        if "epic" in trade:
-                            self.memory.update_analysis_history(trade["epic"], {
-                                "direction": trade.get("direction"),
-                                "entry_price": trade.get("entry_price"),
-                                "stop_loss": trade.get("initial_stop_loss"),
-                                "take_profit": trade.get("take_profit_levels"),
-                                "risk_reward": trade.get("risk_reward"),
-                                "pattern": trade.get("pattern"),
-                                "reasoning": trade.get("reasoning")
-                            })
-                    else:
-                        logger.error(f"Failed to execute trade: {trade_result}")
+                        exposure = self.build_exposure(self.data.get_open_trades(), account_data)
+                    
+                    # Save analysis for this pair
+                    if "epic" in trade:
+                        self.memory.update_analysis_history(trade["epic"], {
+                            "direction": trade.get("direction"),
+                            "entry_price": trade.get("entry_price"),
+                            "stop_loss": trade.get("initial_stop_loss"),
+                            "take_profit": trade.get("take_profit_levels"),
+                            "risk_reward": trade.get("risk_reward"),
+                            "pattern": trade.get("pattern"),
+                            "reasoning": trade.get("reasoning")
+                        })
+                else:
+                    logger.error(f"Failed to execute trade: {trade_result}")
             
             # Execute position actions
             position_actions = executor_result.get("position_actions", [])
+            stop_updates = []
             for action in position_actions:
                 action_type = action.get("action_type", "").upper()
                 
                 if action_type == "CLOSE":
-                    success, result = close_position(self.oanda, action, positions)
+                    ORDERS.inc(action="close", result="sent")
+                    with self.profiler.stage("order"):
+                        success, result = close_position(self.oanda, action, positions)
+                    ORDERS.inc(action="close", result="filled" if success else "rejected")
                     if success:
                         logger.info(f"Successfully closed position: {action.get('epic')} {action.get('dealId')}")
                         # Log the close
                         self.memory.log_trade(result)
                         
                         # Update positions after closing
-                        positions = self.data.get_positions()
+                        with self.profiler.stage("refresh"):
+                            positions = self.data.get_positions()
                     else:
                         logger.error(f"Failed to close position: {result}")
                         
                 elif action_type == "UPDATE_STOP":
-                    success, result = update_stop_loss(self.oanda, action)
+                    stop_updates.append(action)
+            
+            # Stop updates go out together, after closes, against one open trades snapshot
+            if stop_updates:
+                ORDERS.inc(len(stop_updates), action="update_stop", result="sent")
+                with self.profiler.stage("order"):
+                    outcomes = update_stop_losses(self.oanda, stop_updates, self.data.get_open_trades())
+                for action, (success, result) in zip(stop_updates, outcomes):
+                    ORDERS.inc(action="update_stop", result="filled" if success else "rejected")
                     if success:
                         logger.info(f"Successfully updated stop: {action.get('epic')} {action.get('dealId')} to {action.get('new_level')}")
                         # Log the update
                         self.memory.log_trade(result)
                     else:
-                        logger.error(f"Failed to update stop: {result}")
-            
-            # Update daily return tracking (placeholder - would use actual P&L in production)
-            # This is just a simple counter for demonstration purposes
-            current_return = self.memory.memory.get("daily_return", 0)
-            trade_count = len(trade_actions) + len(position_actions)
-            if trade_count > 0:
-                # Simulate some progress toward 10% goal
-                self.memory.update_memory("daily_return", min(10.0, current_return + (0.5 * trade_count)))
-            
+                        logger.error(f"Failed to update stop: {result}")            
             return True
         except Exception as e:
             logger.error(f"Error executing trading actions: {e}")
             return False
     
-    def run_trading_cycle(self):
-        """Run a complete trading cycle with all three agents"""
-        logger.info("Starting collaborative trading cycle")
+    def run_trading_cycle(self, reason=None):
+        """Run a complete trading cycle with all three agents
+        
+        Args:
+            reason (str, optional): Why the cycle fired, stored with its timing record
+        """
+        logger.info(f"Starting collaborative trading cycle ({reason or 'manual'})")
+        self.profiler.begin_cycle()
+        cycle_start = time.perf_counter()
+        result = "error"
         
         try:
             # Reset agent responses for this cycle
@@ -280,26 +360,56 @@ class SystemController:
             }
             
             # Collect common data for agents
-            account_data = self.data.get_account_data()
-            positions = self.data.get_positions()
+            with self.profiler.stage("account"):
+                self.transaction_feed.poll()
+                account_data = self.data.get_account_data()
+                positions = self.data.get_positions()
+            
+            # Collect market data for all pairs (batched pricing, parallel candles)
+            with self.profiler.stage("market_data"):
+                market_data = self.data.get_all_market_data(FOREX_PAIRS)
+            self.market_data = market_data
             
-            # Collect market data for all pairs
-            market_data = {}
-            for epic in FOREX_PAIRS:
-                data = self.data.get_market_data(epic)
-                if data:
-                    market_data[epic] = data
+            # Today's P&L with open trades marked at the prices just collected
+            self.update_pnl()
+            
+            # Compute technical indicators once for all pairs and timeframes
+            with self.profiler.stage("indicators"):
+                self.indicators.update(market_data)
+            
+            # Pre-screen pairs so the Scout only sees pairs with something happening
+            scout_market_data = market_data
+            skip_scout = False
+            if self.pre_screener:
+                with self.profiler.stage("prescreen"):
+                    flagged = self.pre_screener.screen(market_data)
+                    skip_scout, skip_reason = self.pre_screener.should_skip(flagged, market_data)
+                if skip_scout:
+                    saved = self.budget.log_savings(
+                        "prescreen",
+                        self.budget.average_cost("scout", self.scout.cost_estimate),
+                        skipped_cycle=True
+                    )
+                    logger.info(f"Skipping Scout: {skip_reason} (saved ~${saved:.4f})")
+                else:
+                    logger.info("Pre-screen flagged: " + ", ".join(f"{epic} ({info['score']}: {'; '.join(info['reasons'])})" for epic, info in flagged.items()))
+                    scout_market_data = {epic: market_data[epic] for epic in flagged}
             
             # 1. Run Market Scout Agent
-            scout_result = self.scout.run(
-                market_data, 
-                account_data, 
-                positions, 
-                self.memory
-            )
+            scout_result = None
+            if not skip_scout:
+                with self.profiler.stage("scout"):
+                    scout_result = self.scout.run(
+                        scout_market_data, 
+                        account_data, 
+                        positions, 
+                        self.memory
+                    )
             
             if scout_result:
                 self.agent_responses["scout"] = scout_result
+                if self.pre_screener:
+                    self.pre_screener.mark_scanned()
                 
                 # 2. Run Strategist Agent if scout found opportunities
                 opportunities = scout_result.get("opportunities", [])
@@ -318,13 +428,14 @@ class SystemController:
                                 # Update the epic in the opportunity to the standardized format
                                 opp["epic"] = standardized_epic
                     
-                    strategist_result = self.strategist.run(
-                        opportunities,
-                        opportunity_market_data,
-                        account_data,
-                        positions,
-                        self.memory
-                    )
+                    with self.profiler.stage("strategist"):
+                        strategist_result = self.strategist.run(
+                            opportunities,
+                            opportunity_market_data,
+                            account_data,
+                            positions,
+                            self.memory
+                        )
                     
                     if strategist_result:
                         self.agent_responses["strategist"] = strategist_result
@@ -332,41 +443,103 @@ class SystemController:
                         # 3. Run Executor Agent if strategist produced analysis
                         analysis_results = strategist_result.get("analysis_results", [])
                         if analysis_results:
-                            executor_result = self.executor.run(
-                                analysis_results,
-                                market_data,
-                                account_data,
-                                positions,
-                                self.memory
-                            )
+                            with self.profiler.stage("executor"):
+                                executor_result = self.executor.run(
+                                    analysis_results,
+                                    market_data,
+                                    account_data,
+                                    positions,
+                                    self.memory
+                                )
                             
                             if executor_result:
                                 self.agent_responses["executor"] = executor_result
                                 
                                 # 4. Execute trading actions
-                                self.execute_trading_actions(executor_result)
+                                with self.profiler.stage("execution"):
+                                    self.execute_trading_actions(executor_result)
                 
-                # 5. Run team review if all agents produced results
-                if all(self.agent_responses.values()):
-                    team_result = self.team_reviewer.run(
-                        self.agent_responses,
-                        market_data, 
-                        account_data, 
-                        positions, 
-                        self.memory
-                    )
-                    
-                    if team_result:
-                        self.agent_responses["team_review"] = team_result
+                # 5. Queue team review if all agents produced results; it runs off the trading path
+                if all(self.agent_responses[agent] for agent in ("scout", "strategist", "executor")):
+                    with self.profiler.stage("team_review"):
+                        team_prompt = self.team_reviewer.prepare(
+                            self.agent_responses,
+                            market_data, 
+                            account_data, 
+                            positions, 
+                            self.memory,
+                            self.pnl
+                        )
+                        if team_prompt:
+                            self.review_stage.submit(self._run_team_review, team_prompt, self.agent_responses)
             
             # Log budget status
             budget_status = self.budget.get_status()
-            logger.info(f"Budget status: ${budget_status['remaining']:.2f} remaining ({100-budget_status['percent_used']:.1f}%)")
+            logger.info(f"Budget status: ${budget_status['remaining']:.2f} remaining ({100-budget_status['percent_used']:.1f}%), "
+                        f"{budget_status['cycles_skipped']} Scout calls skipped, ${budget_status['saved']:.4f} saved")
+            logger.info(f"LLM cache: {budget_status['cache_hits']} hits ({budget_status['cache_hit_rate'] * 100:.0f}% hit rate), "
+                        f"${budget_status['cache_saved']:.4f} saved")
+
+            # Log LLM call metrics per agent
+            for tier, stats in self.llm.get_metrics().items():
+                logger.info(f"LLM {tier}: {stats['calls']} calls, {stats['errors']} errors, {stats['retries']} retries, "
+                            f"avg {stats['latency_avg']:.1f}s, ${stats['cost']:.4f}")
             
+            # Log OANDA connection reuse
+            conn_stats = self.oanda.get_connection_stats()
+            logger.info(f"OANDA connections: {conn_stats['requests']} requests, {conn_stats['connections_opened']} opened, {conn_stats['connections_reused']} reused")
+
+            # Log candle cache effectiveness
+            cache_stats = self.data.candle_cache.get_stats()
+            logger.info(f"Candle cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['bytes_saved'] / 1024:.1f} KB saved")
+
+            result = "ok"
             return True
         except Exception as e:
             logger.error(f"Error in trading cycle: {e}")
             return False
+        finally:
+            CYCLES.inc(result=result)
+            CYCLE_SECONDS.observe(time.perf_counter() - cycle_start)
+            record = self.profiler.end_cycle(reason=reason)
+            if record:
+                for stage, timing in record["stages"].items():
+                    if "/" not in stage:
+                        CYCLE_STAGE_SECONDS.observe(timing["seconds"], stage=stage)
+                logger.info(f"Cycle timing: {self.profiler.format_last_cycle()}")
+    
+    def update_pnl(self):
+        """Refresh today's P&L and the daily return the agents see
+        
+        Returns:
+            dict: P&L from AccountState.get_pnl() (empty on error)
+        """
+        try:
+            self.pnl = self.data.account_state.get_pnl(self.data.rates)
+        except Exception as e:
+            logger.error(f"Error calculating P&L: {e}")
+            self.pnl = {}
+            return self.pnl
+        
+        self.memory.update_memory("daily_return", round(self.pnl["daily_return"], 4))
+        self.memory.update_memory("pnl_day", self.data.account_state.day_state())
+        logger.info(f"P&L today: realized {self.pnl['realized']:+.2f}, unrealized {self.pnl['unrealized']:+.2f}, "
+                    f"return {self.pnl['daily_return']:+.2f}% ({self.pnl['wins']} wins, {self.pnl['losses']} losses, "
+                    f"{self.pnl['open_trades']} open trades)")
+        return self.pnl
+    
+    def _on_external_fill(self, fill):
+        """A stop, take profit or closeout filled between cycles"""
+        logger.info(f"{fill.get('reason')} fill on {fill.get('instrument')}: P&L {fill.get('pl', '0')}")
+        if self.scheduler:
+            self.scheduler.notify(f"{fill.get('instrument')} {fill.get('reason', 'fill').lower()}")
+    
+    def _run_team_review(self, prompt, agent_responses):
+        """Run a prepared team review and attach its result to that cycle's responses"""
+        team_result = self.team_reviewer.review(prompt, self.memory)
+        if team_result:
+            agent_responses["team_review"] = team_result
+        return team_result
     
     def _standardize_epic_format(self, epic):
         """Standardize epic format to OANDA format (e.g. EUR/USD to EUR_USD)"""
@@ -394,24 +567,50 @@ class SystemController:
         print(f"Available: ${budget_status['remaining']:.2f}")
         
         # Trading loop
-        while True:
-            try:
-                # Run a full trading cycle
-                self.run_trading_cycle()
-                
-                # Sleep between cycles - adjust based on market activity
-                # Market hours could influence the sleep duration
-                current_hour = datetime.now(timezone.utc).hour
-                
-                # More frequent during active market hours
-                if 8 <= current_hour <= 16:  # Major market hours (approx)
-                    sleep_time = 5 * 60  # 5 minutes
-                else:
-                    sleep_time = 15 * 60  # 15 minutes
-                
-                logger.info(f"Cycle complete. Sleeping for {sleep_time/60:.1f} minutes until next cycle.")
-                time.sleep(sleep_time)
-                
-            except Exception as e:
-                logger.error(f"Error in main loop: {e}")
-                time.sleep(60)  # Wait 1 minute on error
\ No newline at end of file
+        try:
+            while True:
+                try:
+                    # Wait for a candle close, price move or position change
+                    reason = self.scheduler.wait() if self.scheduler else "interval"
+                    
+                    # Run a full trading cycle
+                    self.run_trading_cycle(reason)
+                    
+                    # Write memory changes made during the cycle in one batch
+                    flushed = self.memory.flush()
+                    log_stats = self.memory.log_writer.get_stats()
+                    logger.info(f"Persistence: {flushed['files']} files, {flushed['bytes'] / 1024:.1f} KB written; "
+                                f"log writer queue depth {log_stats['queue_depth']} (max {log_stats['max_depth']}), "
+                                f"{log_stats['records']} records in {log_stats['batches']} batches")
+                    review_stats = self.review_stage.get_stats()
+                    logger.info(f"Team review stage: {review_stats['jobs']} reviews, last {review_stats['last_seconds']:.1f}s, "
+                                f"{'running' if review_stats['busy'] else 'idle'}; cycles held back {review_stats['blocked']} times "
+                                f"({review_stats['blocked_seconds']:.1f}s)")
+                    
+                    if self.scheduler:
+                        # Prices and positions seen now are the reference for the next triggers
+                        self.scheduler.mark_cycle(self.market_data, self.data.get_positions())
+                        stats = self.scheduler.get_stats()
+                        logger.info(f"Cycle complete. Waiting for next trigger (cap {stats['hourly_cap']}/hour at "
+                                    f"~${stats['avg_cycle_cost']:.3f}/cycle; fired by {stats['by_trigger']})")
+                        continue
+                    
+                    # Fixed sleep between cycles based on market hours
+                    current_hour = datetime.now(timezone.utc).hour
+                    
+                    # More frequent during active market hours
+                    if 8 <= current_hour <= 16:  # Major market hours (approx)
+                        sleep_time = 5 * 60  # 5 minutes
+                    else:
+                        sleep_time = 15 * 60  # 15 minutes
+                    
+                    logger.info(f"Cycle complete. Sleeping for {sleep_time/60:.1f} minutes until next cycle.")
+                    time.sleep(sleep_time)
+                    
+                except Exception as e:
+                    logger.error(f"Error in main loop: {e}")
+                    time.sleep(60)  # Wait 1 minute on error
+        finally:
+            self.review_stage.close()
+            self.transaction_feed.stop()
+            self.memory.flush()
\ No newline at end of file
@@ -0,0 +1,361 @@
+"""
+Trade Store Module
+Indexed access to the trade log, in memory or backed by SQLite
+"""
+
+import os
+import json
+import bisect
+import sqlite3
+import logging
+import threading
+from collections import Counter
+from utils.jsonl_tail import tail_jsonl, iter_lines_reversed
+
+logger = logging.getLogger("CollaborativeTrader")
+
+# Trade fields with a secondary index
+INDEXED_FIELDS = ("epic", "outcome", "pattern")
+
+
+def index_value(trade, field):
+    """Value a trade is indexed under (outcomes are matched case-insensitively)"""
+    value = trade.get(field)
+    if value is None:
+        return None
+    return str(value).upper() if field == "outcome" else value
+
+
+class SortedTrades:
+    """Trades kept in timestamp order with a parallel key list for bisect"""
+    
+    def __init__(self):
+        self.keys = []
+        self.trades = []
+    
+    def __len__(self):
+        return len(self.trades)
+    
+    def insert(self, trade):
+        key = trade.get("timestamp", "")
+        # Appends in time order are O(1); late arrivals are placed by bisect
+        if not self.keys or key >= self.keys[-1]:
+            position = len(self.keys)
+        else:
+            position = bisect.bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        self.trades.insert(position, trade)
+    
+    def newest(self, limit=None, since=None, until=None):
+        """Trades newest first within an optional [since, until] timestamp range"""
+        start = bisect.bisect_left(self.keys, since) if since else 0
+        end = bisect.bisect_right(self.keys, until) if until else len(self.keys)
+        if limit is not None:
+            start = max(start, end - limit)
+        return self.trades[start:end][::-1]
+
+
+class TradeStore:
+    """Trade log loaded once into a timestamp-ordered index with per-field indexes
+    
+    The JSONL trade log stays the source of truth; the store is loaded from it
+    at startup and kept current by add(), so recent-N and filtered queries are
+    O(log n + k) instead of a full parse and sort.
+    """
+    
+    def __init__(self, trade_log_file="data/trade_log.jsonl"):
+        self.trade_log_file = trade_log_file
+        self.lock = threading.Lock()
+        self.trades = SortedTrades()
+        self.indexes = {field: {} for field in INDEXED_FIELDS}
+        self._load()
+    
+    def _load(self):
+        if not os.path.exists(self.trade_log_file):
+            return
+        count = 0
+        with open(self.trade_log_file, "r") as f:
+            for line in f:
+                try:
+                    self._index(json.loads(line))
+                    count += 1
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable trade log line: {line.strip()[:80]}")
+        logger.info(f"Loaded {count} trades into the trade store")
+    
+    def _index(self, trade):
+        self.trades.insert(trade)
+        for field, index in self.indexes.items():
+            value = index_value(trade, field)
+            if value is not None:
+                index.setdefault(value, SortedTrades()).insert(trade)
+    
+    def add(self, trade):
+        """Index a trade that was appended to the trade log"""
+        with self.lock:
+            self._index(trade)
+    
+    def count(self):
+        """Number of trades in the store"""
+        return len(self.trades)
+    
+    def recent(self, limit=5):
+        """Newest trades first"""
+        with self.lock:
+            return self.trades.newest(limit)
+    
+    def all(self):
+        """All trades, newest first"""
+        with self.lock:
+            return self.trades.newest()
+    
+    def query(self, epic=None, outcome=None, pattern=None, since=None, until=None, limit=None):
+        """Trades matching all given filters, newest first
+        
+        Args:
+            epic (str, optional): Instrument
+            outcome (str, optional): Outcome (case-insensitive)
+            pattern (str, optional): Pattern name
+            since (str, optional): Earliest ISO timestamp (inclusive)
+            until (str, optional): Latest ISO timestamp (inclusive)
+            limit (int, optional): Maximum number of trades
+        
+        Returns:
+            list: Matching trades
+        """
+        filters = {field: value for field, value in zip(INDEXED_FIELDS, (epic, outcome, pattern)) if value is not None}
+        if "outcome" in filters:
+            filters["outcome"] = filters["outcome"].upper()
+        
+        with self.lock:
+            if not filters:
+                return self.trades.newest(limit, since, until)
+            
+            # Scan the smallest matching index and check the other filters on it
+            candidates = []
+            for field, value in filters.items():
+                candidates.append((self.indexes[field].get(value) or SortedTrades(), field))
+            smallest, smallest_field = min(candidates, key=lambda candidate: len(candidate[0]))
+            remaining = {field: value for field, value in filters.items() if field != smallest_field}
+            if not remaining:
+                return smallest.newest(limit, since, until)
+            
+            matches = []
+            for trade in smallest.newest(None, since, until):
+                if all(index_value(trade, field) == value for field, value in remaining.items()):
+                    matches.append(trade)
+                    if limit is not None and len(matches) >= limit:
+                        break
+            return matches
+
+
+class SQLiteTradeStore:
+    """Trade store persisted in SQLite with indexes on timestamp, epic, outcome and pattern
+    
+    On startup any trades in the JSONL trade log that the database is missing
+    (first use, a crash between the log write and the insert, or a run with
+    another backend) are imported.
+    """
+    
+    def __init__(self, db_file="data/trades.db", trade_log_file="data/trade_log.jsonl"):
+        self.db_file = db_file
+        self.trade_log_file = trade_log_file
+        self.lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(self.db_file) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS trades (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT,
+                epic TEXT,
+                outcome TEXT,
+                pattern TEXT,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_trades_timestamp ON trades (timestamp);
+            CREATE INDEX IF NOT EXISTS idx_trades_epic ON trades (epic, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_trades_outcome ON trades (outcome, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_trades_pattern ON trades (pattern, timestamp);
+        """)
+        
+        self._import_log()
+    
+    def _import_log(self):
+        if not os.path.exists(self.trade_log_file):
+            return
+        rows = []
+        with open(self.trade_log_file, "r") as f:
+            for line in f:
+                try:
+                    rows.append(self._row(json.loads(line)))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable trade log line: {line.strip()[:80]}")
+        
+        stored = self.count()
+        if len(rows) <= stored:
+            return
+        if stored:
+            # Match log lines against stored rows (as a multiset) to find the ones missing
+            with self.lock:
+                existing = Counter(row[0] for row in self.conn.execute("SELECT data FROM trades"))
+            missing = []
+            for row in rows:
+                if existing[row[4]]:
+                    existing[row[4]] -= 1
+                else:
+                    missing.append(row)
+            rows = missing
+        
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO trades (timestamp, epic, outcome, pattern, data) VALUES (?, ?, ?, ?, ?)", rows
+            )
+        logger.info(f"Imported {len(rows)} trades into {self.db_file}")
+    
+    @staticmethod
+    def _row(trade):
+        return (
+            trade.get("timestamp", ""),
+            index_value(trade, "epic"),
+            index_value(trade, "outcome"),
+            index_value(trade, "pattern"),
+            json.dumps(trade)
+        )
+    
+    def add(self, trade):
+        """Insert a trade"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO trades (timestamp, epic, outcome, pattern, data) VALUES (?, ?, ?, ?, ?)", self._row(trade)
+            )
+    
+    def count(self):
+        """Number of trades in the store"""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+    
+    def recent(self, limit=5):
+        """Newest trades first"""
+        return self.query(limit=limit)
+    
+    def all(self):
+        """All trades, newest first"""
+        return self.query()
+    
+    def query(self, epic=None, outcome=None, pattern=None, since=None, until=None, limit=None):
+        """Trades matching all given filters, newest first (same arguments as TradeStore.query)"""
+        clauses = []
+        params = []
+        for column, value in (("epic", epic), ("outcome", outcome.upper() if outcome else None), ("pattern", pattern)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp <= ?")
+            params.append(until)
+        
+        sql = "SELECT data FROM trades"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+    
+    def close(self):
+        self.conn.close()
+
+
+class TailTradeStore:
+    """Trade store that reads the trade log from the end on every query
+    
+    Nothing is held in memory; recent(N) parses only the last N records, which
+    assumes trades are appended in time order (as log_trade does). Trades still
+    queued in the background log writer are written out before each read.
+    """
+    
+    def __init__(self, trade_log_file="data/trade_log.jsonl", log_writer=None):
+        self.trade_log_file = trade_log_file
+        self.log_writer = log_writer
+    
+    def _sync(self):
+        if self.log_writer is not None:
+            self.log_writer.flush()
+    
+    def add(self, trade):
+        """Nothing to index; the trade is already in the log"""
+        pass
+    
+    def count(self):
+        """Number of trades in the log"""
+        self._sync()
+        if not os.path.exists(self.trade_log_file):
+            return 0
+        with open(self.trade_log_file, "rb") as f:
+            return sum(1 for line in f if line.strip())
+    
+    def recent(self, limit=5):
+        """Newest trades first"""
+        self._sync()
+        trades = tail_jsonl(self.trade_log_file, limit)
+        trades.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
+        return trades
+    
+    def all(self):
+        """All trades, newest first"""
+        return self.query()
+    
+    def query(self, epic=None, outcome=None, pattern=None, since=None, until=None, limit=None):
+        """Trades matching all given filters, newest first (same arguments as TradeStore.query)
+        
+        Scans backwards and stops once limit matches are found.
+        """
+        self._sync()
+        if not os.path.exists(self.trade_log_file):
+            return []
+        
+        filters = {field: value for field, value in zip(INDEXED_FIELDS, (epic, outcome, pattern)) if value is not None}
+        if "outcome" in filters:
+            filters["outcome"] = filters["outcome"].upper()
+        
+        matches = []
+        for line in iter_lines_reversed(self.trade_log_file):
+            try:
+                trade = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            timestamp = trade.get("timestamp", "")
+            if (since and timestamp < since) or (until and timestamp > until):
+                continue
+            if all(index_value(trade, field) == value for field, value in filters.items()):
+                matches.append(trade)
+                if limit is not None and len(matches) >= limit:
+                    break
+        
+        matches.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
+        return matches
+
+
+def create_trade_store(trade_log_file="data/trade_log.jsonl", log_writer=None):
+    """Create the trade store selected by TRADE_STORE_BACKEND (memory, sqlite or tail)
+    
+    Args:
+        trade_log_file (str): JSONL trade log
+        log_writer (BackgroundLogWriter, optional): Writer appending to the log, flushed before tail reads
+    """
+    backend = os.getenv("TRADE_STORE_BACKEND", "memory").lower()
+    if backend == "sqlite":
+        return SQLiteTradeStore(os.getenv("TRADE_STORE_DB", "data/trades.db"), trade_log_file)
+    if backend == "tail":
+        return TailTradeStore(trade_log_file, log_writer)
+    if backend != "memory":
+        logger.warning(f"Unknown TRADE_STORE_BACKEND '{backend}', using memory")
+    return TradeStore(trade_log_file)
\ No newline at end of file
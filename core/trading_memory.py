@@ -7,6 +7,10 @@ import os
 import json
 import logging
 from datetime import datetime, timezone
+from core.trade_store import create_trade_store
+from core.performance_tracker import PerformanceAggregator
+from utils.persistence import CoalescingWriter
+from utils.log_writer import get_log_writer
 
 logger = logging.getLogger("CollaborativeTrader")
 
@@ -19,10 +23,25 @@ class TradingMemory:
         self.trade_log_file = "data/trade_log.jsonl"
         self.analysis_file = "data/analysis_history.json"
         
+        # Changes are batched and written once per cycle by flush()
+        self.writer = CoalescingWriter()
+        self.writer.register("memory", self.memory_file, lambda: self.memory)
+        self.writer.register("feedback", self.feedback_file, lambda: self.feedback)
+        self.writer.register("analysis_history", self.analysis_file, lambda: self.analysis_history)
+        
         # Initialize all memory systems
         self.load_memory()
         self.load_feedback()
         self.load_analysis_history()
+        
+        # Trade log appends go through the background writer; track the end offset here
+        self.log_writer = get_log_writer()
+        self.trade_log_offset = os.path.getsize(self.trade_log_file) if os.path.exists(self.trade_log_file) else 0
+        
+        # Trade log index, loaded once and kept current by log_trade
+        self.trade_store = create_trade_store(self.trade_log_file, self.log_writer)
+        self.performance = PerformanceAggregator("data/performance_snapshot.json", self.trade_log_file)
+        self.writer.register("performance", self.performance.snapshot_file, self._performance_snapshot)
     
     def load_memory(self):
         """Load or initialize system memory"""
@@ -92,22 +111,33 @@ class TradingMemory:
         self.save_analysis_history()
     
     def save_memory(self):
-        """Save memory to disk"""
-        os.makedirs(os.path.dirname(self.memory_file), exist_ok=True)
-        with open(self.memory_file, "w") as f:
-            json.dump(self.memory, f, indent=2)
+        """Schedule memory to be saved on the next flush"""
+        self.writer.mark_dirty("memory")
     
     def save_feedback(self):
-        """Save feedback to disk"""
-        os.makedirs(os.path.dirname(self.feedback_file), exist_ok=True)
-        with open(self.feedback_file, "w") as f:
-            json.dump(self.feedback, f, indent=2)
+        """Schedule feedback to be saved on the next flush"""
+        self.writer.mark_dirty("feedback")
     
     def save_analysis_history(self):
-        """Save analysis history to disk"""
-        os.makedirs(os.path.dirname(self.analysis_file), exist_ok=True)
-        with open(self.analysis_file, "w") as f:
-            json.dump(self.analysis_history, f, indent=2)
+        """Schedule analysis history to be saved on the next flush"""
+        self.writer.mark_dirty("analysis_history")
+    
+    def flush(self):
+        """Write all changed memory files to disk
+        
+        Returns:
+            dict: Files and bytes written
+        """
+        return self.writer.flush()
+    
+    def _performance_snapshot(self):
+        """Performance snapshot, taken once every trade it counts is on disk
+        
+        trade_log_offset advances when a line is queued, so the snapshot must
+        not record it until the log writer has written those lines.
+        """
+        self.log_writer.flush()
+        return self.performance.snapshot()
     
     def update_memory(self, key, value):
         """Update a specific memory item"""
@@ -116,12 +146,18 @@ class TradingMemory:
         self.save_memory()
     
     def update_feedback(self, agent, feedback):
-        """Update feedback for a specific agent"""
-        self.feedback[agent] = {
+        """Update feedback for a specific agent
+
+        Team review calls this from its own thread, so a copy is updated and
+        swapped in rather than mutating a dict a flush may be serializing.
+        """
+        updated = dict(self.feedback)
+        updated[agent] = {
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "content": feedback
         }
-        self.feedback["last_updated"] = datetime.now(timezone.utc).isoformat()
+        updated["last_updated"] = datetime.now(timezone.utc).isoformat()
+        self.feedback = updated
         self.save_feedback()
     
     def update_analysis_history(self, pair, analysis):
@@ -162,8 +198,10 @@ class TradingMemory:
                 self.save_analysis_history()
         
         # Save trade to log
-        with open(self.trade_log_file, "a") as f:
-            f.write(json.dumps(trade_data) + "\n")
+        self.trade_log_offset += self.log_writer.append(self.trade_log_file, trade_data)
+        self.trade_store.add(trade_data)
+        self.performance.record(trade_data, self.trade_log_offset)
+        self.writer.mark_dirty("performance")
             
         # Update memory
         self.memory["last_updated"] = datetime.now(timezone.utc).isoformat()
@@ -171,36 +209,27 @@ class TradingMemory:
     
     def get_recent_trades(self, limit=5):
         """Get recent trades from log"""
-        trades = []
         try:
-            if os.path.exists(self.trade_log_file):
-                with open(self.trade_log_file, "r") as f:
-                    for line in f:
-                        trades.append(json.loads(line))
-                
-                # Sort by timestamp (newest first) and limit
-                trades.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-                return trades[:limit]
+            return self.trade_store.recent(limit)
         except Exception as e:
             logger.error(f"Error getting recent trades: {e}")
-        
-        return trades
+            return []
     
     def get_all_trades(self):
         """Get all trades from log"""
-        trades = []
         try:
-            if os.path.exists(self.trade_log_file):
-                with open(self.trade_log_file, "r") as f:
-                    for line in f:
-                        trades.append(json.loads(line))
-                
-                # Sort by timestamp (newest first)
-                trades.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
+            return self.trade_store.all()
         except Exception as e:
             logger.error(f"Error getting all trades: {e}")
-        
-        return trades
+            return []
+    
+    def query_trades(self, epic=None, outcome=None, pattern=None, since=None, until=None, limit=None):
+        """Get trades matching filters, newest first (see TradeStore.query)"""
+        try:
+            return self.trade_store.query(epic, outcome, pattern, since, until, limit)
+        except Exception as e:
+            logger.error(f"Error querying trades: {e}")
+            return []
     
     def get_agent_feedback(self, agent=None):
         """Get feedback for specific agent or all agents"""
@@ -221,57 +250,9 @@ class TradingMemory:
             return self.analysis_history["pairs"]
     
     def calculate_performance_metrics(self):
-        """Calculate various performance metrics from trade history"""
-        trades = self.get_all_trades()
-        
-        if not trades:
-            return {
-                "avg_return_per_trade": 0,
-                "avg_risk_per_trade": 0,
-                "avg_risk_reward": 0,
-                "largest_win": 0,
-                "largest_loss": 0
-            }
-        
-        # Extract metrics
-        returns = []
-        risks = []
-        risk_rewards = []
-        wins = []
-        losses = []
-        
-        for trade in trades:
-            # Skip non-completed trades
-            outcome = trade.get("outcome", "").upper()
-            if "WIN" not in outcome and "LOSS" not in outcome and "PROFIT" not in outcome and "STOPPED" not in outcome:
-                continue
-                
-            # Extract metrics where available
-            if "return_percent" in trade:
-                returns.append(float(trade["return_percent"]))
-                
-                if "WIN" in outcome or "PROFIT" in outcome:
-                    wins.append(float(trade["return_percent"]))
-                elif "LOSS" in outcome or "STOPPED" in outcome:
-                    losses.append(float(trade["return_percent"]))
-            
-            if "risk_percent" in trade:
-                risks.append(float(trade["risk_percent"]))
-                
-            if "risk_reward" in trade:
-                risk_rewards.append(float(trade["risk_reward"]))
-        
-        # Calculate metrics
-        avg_return = sum(returns) / len(returns) if returns else 0
-        avg_risk = sum(risks) / len(risks) if risks else 0
-        avg_rr = sum(risk_rewards) / len(risk_rewards) if risk_rewards else 0
-        largest_win = max(wins) if wins else 0
-        largest_loss = min(losses) if losses else 0
-        
-        return {
-            "avg_return_per_trade": avg_return,
-            "avg_risk_per_trade": avg_risk,
-            "avg_risk_reward": avg_rr,
-            "largest_win": largest_win,
-            "largest_loss": largest_loss
-        }
\ No newline at end of file
+        """Get performance metrics from the running trade statistics"""
+        return self.performance.get_metrics()
+    
+    def get_performance_stats(self):
+        """Get win/loss counts, rolling window and per-pattern and per-pair tallies"""
+        return self.performance.get_stats()
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""
+Transaction Feed Module
+Keeps AccountState current from the OANDA transactions stream or /transactions/sinceid polling
+"""
+
+import os
+import logging
+import threading
+
+from utils.oanda_stream import TransactionStream
+from utils.metrics import get_registry
+
+logger = logging.getLogger("CollaborativeTrader")
+
+TRANSACTIONS = get_registry().counter(
+    "account_transactions_total", "Account transactions applied by source", ("source",))
+
+# Fills OANDA makes on its own, which change positions between cycles
+EXTERNAL_FILL_REASONS = (
+    "STOP_LOSS_ORDER", "TAKE_PROFIT_ORDER", "TRAILING_STOP_LOSS_ORDER",
+    "MARKET_ORDER_MARGIN_CLOSEOUT", "MARKET_ORDER_DELAYED_TRADE_CLOSE"
+)
+
+
+class TransactionFeed:
+    """Applies account transactions to AccountState as they happen
+    
+    mode "stream" subscribes to the transactions stream and fills any gap
+    (startup, reconnects, a heartbeat ahead of the last transaction) from
+    /transactions/sinceid. mode "poll" fetches /transactions/sinceid when
+    poll() is called, once per cycle. Either way open trades, balance and
+    realized P&L are kept current without refetching the openTrades snapshot.
+    mode "off" leaves AccountState on its REST refresh. Fills a refetched
+    snapshot skips over are replayed by AccountState and still reach on_fill.
+    """
+    
+    def __init__(self, oanda_client, account_state, mode=None, on_fill=None):
+        """Initialize transaction feed
+        
+        Args:
+            oanda_client (OandaAPI): OANDA API client
+            account_state (AccountState): State the transactions are applied to
+            mode (str, optional): "stream", "poll" or "off" (default TRANSACTION_FEED or "poll")
+            on_fill (callable, optional): Called with each stop, take-profit or margin closeout fill
+        """
+        self.oanda = oanda_client
+        self.account_state = account_state
+        self.mode = (mode or os.getenv("TRANSACTION_FEED", "poll")).lower()
+        self.on_fill = on_fill
+        self.lock = threading.Lock()
+        self.stats = {"catch_ups": 0, "polled": 0, "streamed": 0, "replayed": 0, "errors": 0}
+        
+        self.account_state.add_replay_listener(self._on_replayed_transaction)
+        
+        self.stream = None
+        if self.mode == "stream":
+            self.stream = TransactionStream(
+                oanda_client, self._on_stream_transaction, self.catch_up, self.account_state.mark_synced)
+    
+    def start(self):
+        """Start the stream (stream mode only)"""
+        if self.stream is not None:
+            self.stream.start()
+        return self
+    
+    def stop(self):
+        """Stop the stream"""
+        if self.stream is not None:
+            self.stream.stop()
+    
+    def poll(self):
+        """Apply transactions since the last one seen (no-op while the stream is connected)
+        
+        Returns:
+            int: Transactions applied
+        """
+        if self.mode == "off":
+            return 0
+        if self.stream is not None and self.stream.is_alive():
+            return 0
+        return self.catch_up()
+    
+    def catch_up(self):
+        """Fetch and apply everything after AccountState's last transaction ID
+        
+        Returns:
+            int: Transactions applied
+        """
+        with self.lock:
+            try:
+                if not self.account_state.last_transaction_id:
+                    # The first openTrades snapshot records the ID it reflects
+                    self.account_state.get_open_trades()
+                last_id = self.account_state.last_transaction_id
+                if not last_id:
+                    return 0
+                
+                response = self.oanda.get_transactions_since(last_id)
+                applied = sum(self._apply(transaction, "poll") for transaction in response.get("transactions", []))
+                self.account_state.mark_synced()
+                
+                self.stats["catch_ups"] += 1
+                self.stats["polled"] += applied
+                if applied:
+                    logger.debug(f"Applied {applied} transactions after {last_id}")
+                return applied
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Transaction catch-up failed: {e}")
+                return 0
+    
+    def _on_stream_transaction(self, transaction):
+        if self._apply(transaction, "stream"):
+            self.stats["streamed"] += 1
+        self.account_state.mark_synced()
+    
+    def _on_replayed_transaction(self, transaction):
+        self.stats["replayed"] += 1
+        TRANSACTIONS.inc(source="replay")
+        self._dispatch_fill(transaction)
+    
+    def _apply(self, transaction, source):
+        if not self.account_state.apply_transaction(transaction):
+            return False
+        TRANSACTIONS.inc(source=source)
+        self._dispatch_fill(transaction)
+        return True
+    
+    def _dispatch_fill(self, transaction):
+        if (self.on_fill and transaction.get("type") == "ORDER_FILL"
+                and transaction.get("reason") in EXTERNAL_FILL_REASONS):
+            try:
+                self.on_fill(transaction)
+            except Exception as e:
+                logger.error(f"Error in fill callback: {e}")
+    
+    def get_stats(self):
+        """Mode, transactions applied per source and stream state"""
+        stats = dict(self.stats, mode=self.mode)
+        if self.stream is not None:
+            stats["stream"] = self.stream.get_stats()
+        return stats
\ No newline at end of file
@@ -3,14 +3,19 @@ Collaborative Trading Prompts Module
 Contains prompt templates for all agent interactions
 """
 
+from core.indicators import format_indicator_summary
+
 class CollaborativeTradingPrompts:
     """Advanced prompt templates for a team of 3 collaborative trading agents"""
     
     @staticmethod
-    def market_scanner(market_data, account_data, positions, recent_trades, trade_logs=None, agent_feedback=None):
+    def market_scanner(market_data, account_data, positions, recent_trades, trade_stats=None, agent_feedback=None):
         """
         Build prompt for market scanner agent (Scout)
         The scout identifies opportunities and maintains market awareness
+        
+        trade_stats (from TradingMemory.get_performance_stats) supplies the
+        per-pattern win/loss tallies, so the prompt never walks the trade log.
         """
         # Format market data summary
         market_summary = ""
@@ -18,6 +23,10 @@ class CollaborativeTradingPrompts:
             if "current" in data:
                 current = data["current"]
                 market_summary += f"\n{epic}: Bid/Ask: {current.get('bid')}/{current.get('offer')}"
+            
+            # Add compact indicator summary per timeframe
+            for line in format_indicator_summary(epic, data.get("indicators", {})):
+                market_summary += f"\n  {line}"
         
         # Format positions
         positions_info = "No open positions"
@@ -44,18 +53,11 @@ class CollaborativeTradingPrompts:
         
         # Trade log insights
         trade_log_insights = ""
-        if trade_logs:
-            # Extract patterns that worked well
-            successful_patterns = {}
-            failed_patterns = {}
-            for trade in trade_logs:
-                pattern = trade.get("pattern", "Unknown")
-                outcome = trade.get("outcome", "").upper()
-                
-                if "WIN" in outcome or "PROFIT" in outcome:
-                    successful_patterns[pattern] = successful_patterns.get(pattern, 0) + 1
-                elif "LOSS" in outcome or "STOPPED" in outcome:
-                    failed_patterns[pattern] = failed_patterns.get(pattern, 0) + 1
+        if trade_stats and trade_stats.get("trade_count"):
+            # Patterns that worked well and those that did not
+            by_pattern = trade_stats.get("by_pattern", {})
+            successful_patterns = {pattern: stats["wins"] for pattern, stats in by_pattern.items() if stats["wins"]}
+            failed_patterns = {pattern: stats["losses"] for pattern, stats in by_pattern.items() if stats["losses"]}
             
             # Format insights
             trade_log_insights = "\n## Trade Log Insights\n"
@@ -160,6 +162,9 @@ Respond with a JSON object containing:
                         time_str = dt.strftime("%H:%M")
                         price_info += f"\n- {time_str}: O={candle.get('open'):.5f} H={candle.get('high'):.5f} L={candle.get('low'):.5f} C={candle.get('close'):.5f}"
                 
+                # Format indicator summaries
+                indicator_info = "\n".join(f"- {line}" for line in format_indicator_summary(epic, data.get("indicators", {})))
+                
                 opps_section += f"""
 ## {epic}
 - Pattern: {opp.get('pattern')}
@@ -170,6 +175,9 @@ Respond with a JSON object containing:
 
 ### Recent Price Data:
 {price_info}
+
+### Indicators:
+{indicator_info or "Not available"}
 """
         
         # Format positions
@@ -262,10 +270,13 @@ Respond with a JSON object containing:
 
     @staticmethod
     def decision_maker(analysis_results, account_data, positions, system_memory, market_data, 
-                      recent_trades=None, execution_history=None):
+                      recent_trades=None, trade_stats=None):
         """
         Build prompt for decision agent (Executor)
         The executor makes final decisions and manages overall portfolio risk
+        
+        trade_stats (from TradingMemory.get_performance_stats) supplies the
+        running execution averages, so the prompt never walks the trade log.
         """
         # Format analysis results
         analysis_section = ""
@@ -312,24 +323,12 @@ Respond with a JSON object containing:
         
         # Execution history insights
         execution_insights = ""
-        if execution_history:
-            # Extract patterns that worked well
-            position_sizes = []
-            risk_percents = []
-            risk_rewards = []
-            
-            for trade in execution_history:
-                if "size" in trade:
-                    position_sizes.append(float(trade["size"]))
-                if "risk_percent" in trade:
-                    risk_percents.append(float(trade["risk_percent"]))
-                if "risk_reward" in trade:
-                    risk_rewards.append(float(trade["risk_reward"]))
-            
-            # Calculate averages
-            avg_size = sum(position_sizes) / len(position_sizes) if position_sizes else 0
-            avg_risk = sum(risk_percents) / len(risk_percents) if risk_percents else 0
-            avg_rr = sum(risk_rewards) / len(risk_rewards) if risk_rewards else 0
+        if trade_stats and trade_stats.get("trade_count"):
+            # Running averages over every logged trade
+            averages = trade_stats.get("execution_averages", {})
+            avg_size = averages.get("size", 0)
+            avg_risk = averages.get("risk_percent", 0)
+            avg_rr = averages.get("risk_reward", 0)
             
             execution_insights = f"""
 ## Execution History Insights
@@ -527,7 +526,7 @@ Respond with a JSON object containing:
 ## Current Status
 - Account Balance: {account_data.get('balance')}
 - Open Positions: {len(positions) if not positions.empty else 0} (Target minimum: 3)
-- Win Rate: {(system_memory.get('win_count', 0) / system_memory.get('trade_count', 1)) * 100:.1f}% 
+- Win Rate: {(system_memory.get('win_count', 0) / max(system_memory.get('trade_count', 0), 1)) * 100:.1f}% 
 - Risk Multiplier: {system_memory.get('risk_multiplier', 1.0)}x
 
 {performance_section}
@@ -678,19 +677,27 @@ Respond with a JSON object containing:
         return main_prompt + response_format
 
     @staticmethod
-    def system_optimizer(all_logs, system_memory, budget_status, performance_metrics):
+    def system_optimizer(all_logs, system_memory, budget_status, performance_metrics, trade_stats=None):
         """
         Build prompt for system optimization agent
         Focuses on overall system improvement based on all available data
+        
+        trade_stats (from TradingMemory.get_performance_stats) supplies trade counts
+        and pattern tallies without iterating all_logs["trades"].
         """
         # Format log statistics
-        trade_count = len(all_logs.get("trades", []))
         scanner_count = len(all_logs.get("scanner", []))
         analyzer_count = len(all_logs.get("analyzer", []))
         decision_count = len(all_logs.get("decision", []))
         
-        win_count = sum(1 for t in all_logs.get("trades", []) if "WIN" in t.get("outcome", "").upper() or "PROFIT" in t.get("outcome", "").upper())
-        loss_count = sum(1 for t in all_logs.get("trades", []) if "LOSS" in t.get("outcome", "").upper() or "STOPPED" in t.get("outcome", "").upper())
+        if trade_stats is not None:
+            trade_count = trade_stats["trade_count"]
+            win_count = trade_stats["win_count"]
+            loss_count = trade_stats["loss_count"]
+        else:
+            trade_count = len(all_logs.get("trades", []))
+            win_count = sum(1 for t in all_logs.get("trades", []) if "WIN" in t.get("outcome", "").upper() or "PROFIT" in t.get("outcome", "").upper())
+            loss_count = sum(1 for t in all_logs.get("trades", []) if "LOSS" in t.get("outcome", "").upper() or "STOPPED" in t.get("outcome", "").upper())
         win_rate = (win_count / trade_count) * 100 if trade_count > 0 else 0
         
         # Calculate average cost per tier
@@ -723,18 +730,21 @@ Respond with a JSON object containing:
 """
         
         # Pattern performance
-        pattern_performance = {}
-        for trade in all_logs.get("trades", []):
-            pattern = trade.get("pattern", "Unknown")
-            outcome = trade.get("outcome", "").upper()
-            
-            if pattern not in pattern_performance:
-                pattern_performance[pattern] = {"wins": 0, "losses": 0}
-            
-            if "WIN" in outcome or "PROFIT" in outcome:
-                pattern_performance[pattern]["wins"] += 1
-            elif "LOSS" in outcome or "STOPPED" in outcome:
-                pattern_performance[pattern]["losses"] += 1
+        if trade_stats is not None:
+            pattern_performance = trade_stats["by_pattern"]
+        else:
+            pattern_performance = {}
+            for trade in all_logs.get("trades", []):
+                pattern = trade.get("pattern", "Unknown")
+                outcome = trade.get("outcome", "").upper()
+                
+                if pattern not in pattern_performance:
+                    pattern_performance[pattern] = {"wins": 0, "losses": 0}
+                
+                if "WIN" in outcome or "PROFIT" in outcome:
+                    pattern_performance[pattern]["wins"] += 1
+                elif "LOSS" in outcome or "STOPPED" in outcome:
+                    pattern_performance[pattern]["losses"] += 1
         
         pattern_section = "## Pattern Performance\n"
         for pattern, stats in pattern_performance.items():
@@ -0,0 +1,180 @@
+"""
+Exposure Module
+Vectorized portfolio risk from stop distances, netted per currency leg
+"""
+
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("CollaborativeTrader")
+
+# Risk limits as a percentage of account balance
+MAX_TOTAL_RISK = 30.0
+MAX_CURRENCY_RISK = 10.0
+
+# Risk assumed for a position whose stop is unknown (the old flat estimate)
+DEFAULT_POSITION_RISK = 2.0
+
+
+def split_instrument(instrument):
+    """Base and quote currency of an instrument (EUR_USD -> ("EUR", "USD"))"""
+    if "_" in instrument:
+        base, quote = instrument.split("_", 1)
+        return base, quote
+    return instrument[:3], instrument[3:6]
+
+
+def derive_rates(positions, account_currency):
+    """Conversion rates to the account currency implied by the positions' own prices
+    
+    Only pairs quoted against the account currency give a rate this way; the
+    rest are left out and converted at 1.0 by PortfolioExposure.
+    
+    Returns:
+        dict: Currency -> account currency per unit
+    """
+    rates = {account_currency: 1.0}
+    if positions is None or len(positions) == 0 or "epic" not in positions:
+        return rates
+    
+    price_column = next((column for column in ("price", "entry_price", "level") if column in positions), None)
+    if price_column is None:
+        return rates
+    
+    for epic, price in zip(positions["epic"], positions[price_column]):
+        if not isinstance(epic, str) or not price:
+            continue
+        base, quote = split_instrument(epic)
+        if quote == account_currency:
+            rates.setdefault(base, float(price))
+        elif base == account_currency:
+            rates.setdefault(quote, 1.0 / float(price))
+    return rates
+
+
+class PortfolioExposure:
+    """Per-position risk and net risk per currency, as a percentage of balance
+    
+    Positions are rows with an epic and signed units (or a direction and
+    size), plus entry_price and stop_loss where known. Risk is the loss if the
+    stop is hit, (entry - stop) x units, converted from the quote currency; a
+    stop already beyond the entry risks nothing, and a position without a stop
+    counts as default_risk percent.
+    
+    Each position puts its risk on both legs: long EUR_USD is long EUR and
+    short USD, so long EUR_USD against long USD_JPY nets to no USD risk.
+    """
+    
+    def __init__(self, positions, account_balance, account_currency="USD", rates=None, default_risk=DEFAULT_POSITION_RISK):
+        """Initialize exposure
+        
+        Args:
+            positions (DataFrame): Open trades or positions
+            account_balance (float): Account balance in the account currency
+            account_currency (str): Account currency
+            rates (dict, optional): Currency -> account currency per unit (derived from positions if not given)
+            default_risk (float): Risk percent of positions without a usable stop
+        """
+        self.account_balance = float(account_balance) if account_balance else 0.0
+        self.account_currency = account_currency
+        self.rates = rates if rates is not None else derive_rates(positions, account_currency)
+        self.default_risk = default_risk
+        self.positions = self._compute(positions)
+        self._refresh_totals()
+    
+    def _compute(self, positions):
+        columns = ["epic", "base", "quote", "units", "risk_amount", "risk_percent"]
+        if positions is None or len(positions) == 0 or "epic" not in positions:
+            return pd.DataFrame(columns=columns)
+        
+        frame = positions[positions["epic"].apply(lambda epic: isinstance(epic, str))]
+        epics = frame["epic"].str.replace("/", "_", regex=False)
+        legs = epics.str.extract(r"^([A-Z]{3})_?([A-Z]{3})")
+        
+        if "units" in frame:
+            units = pd.to_numeric(frame["units"], errors="coerce").fillna(0.0)
+        elif "size" in frame and "direction" in frame:
+            size = pd.to_numeric(frame["size"], errors="coerce").fillna(0.0).abs()
+            units = size.where(frame["direction"] != "SELL", -size)
+        else:
+            units = pd.Series(0.0, index=frame.index)
+        
+        entry = pd.to_numeric(frame["entry_price"], errors="coerce") if "entry_price" in frame else pd.Series(np.nan, index=frame.index)
+        stop = pd.to_numeric(frame["stop_loss"], errors="coerce") if "stop_loss" in frame else pd.Series(np.nan, index=frame.index)
+        has_stop = (stop > 0) & (entry > 0)
+        
+        # Loss at the stop in quote currency; a stop past the entry has locked in profit
+        loss_quote = ((entry - stop) * units).clip(lower=0.0)
+        rate = legs[1].map(self.rates)
+        unknown = sorted(set(legs[1][rate.isna() & has_stop].dropna()))
+        if unknown:
+            logger.debug(f"No conversion rate for {', '.join(unknown)}; valuing at 1.0")
+        risk_amount = loss_quote * rate.fillna(1.0)
+        
+        if self.account_balance > 0:
+            risk_percent = np.where(has_stop, risk_amount / self.account_balance * 100, self.default_risk)
+        else:
+            risk_percent = np.full(len(frame), self.default_risk)
+        
+        return pd.DataFrame({
+            "epic": epics,
+            "base": legs[0],
+            "quote": legs[1],
+            "units": units,
+            "risk_amount": risk_amount.where(has_stop),
+            "risk_percent": risk_percent
+        }, index=frame.index)
+    
+    def _refresh_totals(self):
+        frame = self.positions
+        self.total_risk = float(frame["risk_percent"].sum()) if len(frame) else 0.0
+        
+        # Signed risk per leg: + when long the currency, - when short, then netted
+        if len(frame):
+            signed = np.sign(frame["units"].astype(float)) * frame["risk_percent"].astype(float)
+            legs = pd.concat([
+                pd.Series(signed.values, index=frame["base"].values),
+                pd.Series(-signed.values, index=frame["quote"].values)
+            ])
+            self.currency_risk = legs.groupby(level=0).sum()
+        else:
+            self.currency_risk = pd.Series(dtype=float)
+    
+    def net_currency_risk(self, currency):
+        """Net risk percent on one currency (positive long, negative short)"""
+        return float(self.currency_risk.get(currency, 0.0))
+    
+    def with_trade(self, epic, direction, risk_percent):
+        """Total risk and net risk of both legs if a trade were added
+        
+        Returns:
+            tuple: (total risk percent, {currency: net risk percent})
+        """
+        base, quote = split_instrument(epic.replace("/", "_"))
+        sign = -1.0 if str(direction).upper() == "SELL" else 1.0
+        risk_percent = float(risk_percent)
+        return self.total_risk + risk_percent, {
+            base: self.net_currency_risk(base) + sign * risk_percent,
+            quote: self.net_currency_risk(quote) - sign * risk_percent
+        }
+    
+    def check_trade(self, epic, direction, risk_percent, max_total=MAX_TOTAL_RISK, max_currency=MAX_CURRENCY_RISK):
+        """Check a new trade against the total and per-currency limits
+        
+        Returns:
+            tuple: (allowed, reason or None)
+        """
+        total, legs = self.with_trade(epic, direction, risk_percent)
+        if total > max_total:
+            return False, f"New trade would put total risk at {total:.2f}%, exceeding {max_total:.0f}% limit"
+        for currency, net in legs.items():
+            # A trade that reduces an existing breach is allowed
+            if abs(net) > max_currency and abs(net) > abs(self.net_currency_risk(currency)):
+                return False, f"New trade would put {currency} exposure at {net:+.2f}%, exceeding {max_currency:.0f}% limit"
+        return True, None
+    
+    def summary(self):
+        """Total risk and non-zero net risk per currency, for logs"""
+        legs = ", ".join(f"{currency} {risk:+.1f}%" for currency, risk in self.currency_risk.items() if abs(risk) >= 0.05)
+        return f"{len(self.positions)} positions, {self.total_risk:.1f}% total risk" + (f" ({legs})" if legs else "")
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+FX Rates Module
+Conversion-rate table built from quoted pair mids, with triangulated cross rates
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger("CollaborativeTrader")
+
+
+class ConversionRates:
+    """Latest mid for each quoted pair and cached conversion into any currency
+    
+    update() records pair mids from price snapshots. The first conversion into
+    a currency after an update walks the pair graph once (breadth-first, so
+    each cross uses the fewest legs) and caches a rate for every reachable
+    currency; later conversions into it are dictionary lookups.
+    """
+    
+    def __init__(self):
+        self.mids = {}
+        self.tables = {}
+        self.updated_at = None
+        self.lock = threading.Lock()
+    
+    def update(self, snapshots):
+        """Record mids from price snapshots ({instrument: {"bid", "offer"}})
+        
+        Returns:
+            int: Pairs updated
+        """
+        updated = 0
+        with self.lock:
+            for instrument, snapshot in snapshots.items():
+                if not snapshot or "_" not in instrument:
+                    continue
+                bid, offer = snapshot.get("bid"), snapshot.get("offer")
+                if not bid or not offer:
+                    continue
+                base, quote = instrument.split("_", 1)
+                self.mids[(base, quote)] = (float(bid) + float(offer)) / 2
+                updated += 1
+            if updated:
+                self.tables = {}
+                self.updated_at = time.time()
+        return updated
+    
+    def table(self, currency):
+        """Units of currency per one unit of every reachable currency
+        
+        Returns:
+            dict: Currency -> rate into currency (empty before the first update)
+        """
+        with self.lock:
+            table = self.tables.get(currency)
+            if table is None:
+                table = self.tables[currency] = self._build_table(currency)
+            return table
+    
+    def _build_table(self, target):
+        # Edges: 1 unit of a currency = factor units of its neighbour
+        edges = {}
+        for (base, quote), mid in self.mids.items():
+            edges.setdefault(base, []).append((quote, mid))
+            edges.setdefault(quote, []).append((base, 1.0 / mid))
+        if target not in edges:
+            return {target: 1.0} if self.mids else {}
+        
+        # table[c] is target per one c; one c buys factor of neighbour n, so one n is worth table[c] / factor
+        table = {target: 1.0}
+        queue = deque([target])
+        while queue:
+            currency = queue.popleft()
+            for neighbour, factor in edges[currency]:
+                if neighbour not in table:
+                    table[neighbour] = table[currency] / factor
+                    queue.append(neighbour)
+        return table
+    
+    def rate(self, from_currency, to_currency):
+        """Units of to_currency per one unit of from_currency, or None if no path is quoted"""
+        if from_currency == to_currency:
+            return 1.0
+        return self.table(to_currency).get(from_currency)
+    
+    def convert(self, amount, from_currency, to_currency):
+        """Convert an amount, or return None if no path is quoted"""
+        rate = self.rate(from_currency, to_currency)
+        return amount * rate if rate is not None else None
+    
+    def get_stats(self):
+        """Pairs quoted, currencies reachable from them and age of the latest update"""
+        with self.lock:
+            currencies = {currency for pair in self.mids for currency in pair}
+            return {
+                "pairs": len(self.mids),
+                "currencies": len(currencies),
+                "age": time.time() - self.updated_at if self.updated_at else None
+            }
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""
+JSONL Tail Reader
+Reads the last records of a JSON-lines file by seeking backwards from the end in blocks
+"""
+
+import os
+import json
+import logging
+
+logger = logging.getLogger("CollaborativeTrader")
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+
+def iter_lines_reversed(path, block_size=DEFAULT_BLOCK_SIZE):
+    """Yield the non-empty lines of a file from last to first as bytes
+    
+    Only the blocks holding the lines consumed are read, so taking the last N
+    lines costs the same however large the file grows.
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            block = f.read(read_size) + remainder
+            lines = block.split(b"\n")
+            # The first piece may be the end of a line that starts in an earlier block
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line.strip():
+                    yield line
+        if remainder.strip():
+            yield remainder
+
+
+def tail_jsonl(path, limit=5, block_size=DEFAULT_BLOCK_SIZE):
+    """Parse the last limit records of a JSONL file
+    
+    Args:
+        path (str): File path
+        limit (int): Number of records
+        block_size (int): Bytes read per seek
+    
+    Returns:
+        list: Records in file order (oldest first); unreadable lines are skipped
+    """
+    if limit <= 0 or not os.path.exists(path):
+        return []
+    
+    records = []
+    for line in iter_lines_reversed(path, block_size):
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping unreadable line in {path}: {line[:80]!r}")
+            continue
+        if len(records) >= limit:
+            break
+    records.reverse()
+    return records
\ No newline at end of file
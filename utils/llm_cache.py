@@ -0,0 +1,165 @@
+"""
+LLM Response Cache
+Persistent content-addressed cache of agent responses with per-agent TTLs and LRU eviction
+"""
+
+import os
+import re
+import copy
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger("CollaborativeTrader")
+
+# Default TTLs in seconds, tied to the candle granularity each agent works from.
+# The executor manages live positions, so its responses are never reused.
+DEFAULT_TTLS = {
+    "scout": 15 * 60,        # M15
+    "strategist": 15 * 60,   # M15
+    "team_review": 60 * 60,  # H1
+    "executor": 0
+}
+
+# RFC3339 / ISO timestamps, masked so that time stamps alone never change the key
+TIMESTAMP_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace and mask timestamps in a prompt"""
+    prompt = TIMESTAMP_PATTERN.sub("<ts>", prompt)
+    return WHITESPACE_PATTERN.sub(" ", prompt).strip()
+
+
+def cache_key(model, system_prompt, prompt):
+    """Hash of (model, system prompt, normalized user prompt)"""
+    content = "\x00".join((model, normalize_prompt(system_prompt), normalize_prompt(prompt)))
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Disk-backed response cache shared by the agents"""
+    
+    def __init__(self, cache_file="data/llm_cache.json", max_entries=None, ttls=None):
+        """Initialize response cache
+        
+        Args:
+            cache_file (str): JSON file the cache is persisted to
+            max_entries (int, optional): LRU size limit (default LLM_CACHE_MAX_ENTRIES or 500)
+            ttls (dict, optional): Agent name -> TTL seconds; LLM_CACHE_TTL_<AGENT> overrides the defaults
+        """
+        self.cache_file = cache_file
+        self.max_entries = int(max_entries if max_entries is not None else os.getenv("LLM_CACHE_MAX_ENTRIES", 500))
+        self.ttls = dict(DEFAULT_TTLS)
+        for tier in self.ttls:
+            env_ttl = os.getenv(f"LLM_CACHE_TTL_{tier.upper()}")
+            if env_ttl is not None:
+                self.ttls[tier] = int(env_ttl)
+        if ttls:
+            self.ttls.update(ttls)
+        
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.stats = {}
+        self._load()
+    
+    def ttl(self, tier):
+        """Get the TTL for an agent (0 disables caching)"""
+        return self.ttls.get(tier, 0)
+    
+    def get(self, tier, model, system_prompt, prompt):
+        """Look up a cached response
+        
+        Returns:
+            tuple: (response dict, cost of the original call), or (None, 0.0) on a miss
+        """
+        if self.ttl(tier) <= 0:
+            return None, 0.0
+        
+        key = cache_key(model, system_prompt, prompt)
+        now = time.time()
+        with self.lock:
+            stats = self._tier_stats(tier)
+            entry = self.entries.get(key)
+            if entry is None or entry["expires"] <= now:
+                if entry is not None:
+                    del self.entries[key]
+                stats["misses"] += 1
+                return None, 0.0
+            
+            self.entries.move_to_end(key)
+            stats["hits"] += 1
+            stats["saved"] += entry["cost"]
+            # Callers edit responses in place (e.g. opportunity epics), so hand out a copy
+            return copy.deepcopy(entry["response"]), entry["cost"]
+    
+    def put(self, tier, model, system_prompt, prompt, response, cost):
+        """Store a response for the agent's TTL and persist the cache"""
+        ttl = self.ttl(tier)
+        if ttl <= 0 or response is None:
+            return
+        
+        key = cache_key(model, system_prompt, prompt)
+        with self.lock:
+            self.entries[key] = {
+                "tier": tier,
+                "expires": time.time() + ttl,
+                "cost": cost,
+                "response": copy.deepcopy(response)
+            }
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self._save()
+    
+    def clear(self):
+        """Remove all entries"""
+        with self.lock:
+            self.entries.clear()
+            self._save()
+    
+    def get_stats(self):
+        """Get per-agent hits, misses, hit rate and dollars saved"""
+        with self.lock:
+            stats = {tier: dict(values) for tier, values in self.stats.items()}
+            size = len(self.entries)
+        for values in stats.values():
+            lookups = values["hits"] + values["misses"]
+            values["hit_rate"] = values["hits"] / lookups if lookups else 0.0
+        return {"entries": size, "agents": stats}
+    
+    def _tier_stats(self, tier):
+        return self.stats.setdefault(tier, {"hits": 0, "misses": 0, "saved": 0.0})
+    
+    def _load(self):
+        """Load unexpired entries from disk, oldest first"""
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "r") as f:
+                entries = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable LLM cache file {self.cache_file}: {e}")
+            return
+        
+        now = time.time()
+        for key, entry in entries:
+            if entry.get("expires", 0) > now:
+                self.entries[key] = entry
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+    
+    def _save(self):
+        """Write the cache in LRU order (caller holds the lock)"""
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+            temp_file = f"{self.cache_file}.tmp"
+            with open(temp_file, "w") as f:
+                json.dump(list(self.entries.items()), f)
+            os.replace(temp_file, self.cache_file)
+        except Exception as e:
+            logger.error(f"Error saving LLM cache: {e}")
\ No newline at end of file
@@ -0,0 +1,240 @@
+"""
+LLM Client Utilities
+Shared OpenAI client used by all agents: connection reuse, retries, pricing, JSON parsing and metrics
+"""
+
+import os
+import re
+import json
+import time
+import random
+import logging
+import platform
+import threading
+import openai
+from utils.llm_cache import LLMResponseCache
+from utils.profiler import get_profiler
+from utils.metrics import get_registry
+
+logger = logging.getLogger("CollaborativeTrader")
+
+LLM_CALLS = get_registry().counter("llm_calls_total", "LLM calls by agent and result", ("agent", "result"))
+LLM_TOKENS = get_registry().counter("llm_tokens_total", "LLM tokens by agent and direction", ("agent", "direction"))
+LLM_COST = get_registry().counter("llm_cost_dollars_total", "LLM spend in USD by agent", ("agent",))
+LLM_LATENCY = get_registry().histogram("llm_request_seconds", "LLM request latency including retries", ("agent",))
+
+# USD per 1K tokens (input, output)
+MODEL_PRICING = {
+    "gpt-3.5-turbo": (0.0015, 0.002),
+    "gpt-4-turbo-preview": (0.03, 0.06),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4": (0.03, 0.06),
+    "gpt-4o": (0.005, 0.015),
+    "gpt-4o-mini": (0.00015, 0.0006)
+}
+
+# GPT-4 pricing is the conservative fallback for unknown models
+DEFAULT_PRICING = (0.03, 0.06)
+
+# Errors worth retrying; anything else fails the call immediately
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.RateLimitError,
+    openai.InternalServerError
+)
+
+
+def calculate_cost(model, tokens_in, tokens_out):
+    """Calculate cost of an API call from the pricing table"""
+    price_in, price_out = MODEL_PRICING.get(model, DEFAULT_PRICING)
+    return (tokens_in * price_in + tokens_out * price_out) / 1000
+
+
+def extract_json(text):
+    """Parse a JSON object from a response, allowing for markdown code fences"""
+    try:
+        return json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        pass
+    
+    # Try to extract JSON if wrapped in code blocks
+    json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', text or "")
+    if json_match:
+        try:
+            return json.loads(json_match.group(1))
+        except json.JSONDecodeError:
+            logger.error("Failed to parse JSON from response")
+            return None
+    
+    logger.error("Failed to extract JSON from response")
+    return None
+
+
+def _ensure_platform_detection():
+    """Work around platform.platform() failing on some hosts, which breaks the OpenAI SDK headers"""
+    try:
+        platform.platform()
+    except Exception:
+        original_platform = platform.platform
+        
+        def safe_platform(*args, **kwargs):
+            try:
+                return original_platform(*args, **kwargs)
+            except Exception:
+                return "Windows-10"  # Safe fallback
+        
+        platform.platform = safe_platform
+        logger.warning("platform.platform() failed; using a fallback value for API client headers")
+
+
+class LLMClient:
+    """Chat completion client shared by the agents"""
+    
+    def __init__(self, budget_manager, max_retries=None, backoff_base=None, timeout=None, cache=None):
+        """Initialize shared LLM client
+        
+        Args:
+            budget_manager (LLMBudgetManager): Budget manager that usage is logged to
+            max_retries (int, optional): Retries for transient errors (default OPENAI_MAX_RETRIES or 2)
+            backoff_base (float, optional): Base retry delay in seconds (default OPENAI_BACKOFF_BASE or 1.0)
+            timeout (float, optional): Request timeout in seconds (default OPENAI_API_REQUEST_TIMEOUT or 60)
+            cache (LLMResponseCache, optional): Response cache (created unless LLM_CACHE_ENABLED is false)
+        """
+        self.budget_manager = budget_manager
+        self.max_retries = int(max_retries if max_retries is not None else os.getenv("OPENAI_MAX_RETRIES", 2))
+        self.backoff_base = float(backoff_base if backoff_base is not None else os.getenv("OPENAI_BACKOFF_BASE", 1.0))
+        self.timeout = float(timeout if timeout is not None else os.getenv("OPENAI_API_REQUEST_TIMEOUT", 60))
+        
+        if cache is None and os.getenv("LLM_CACHE_ENABLED", "true").lower() in ["true", "1", "yes"]:
+            cache = LLMResponseCache()
+        self.cache = cache
+        
+        self.client = None
+        self.lock = threading.Lock()
+        self.metrics = {}
+    
+    def _get_client(self):
+        """Create the OpenAI client once; its HTTP connection pool is reused for every call"""
+        with self.lock:
+            if self.client is None:
+                _ensure_platform_detection()
+                self.client = openai.OpenAI(
+                    api_key=openai.api_key or os.getenv("OPENAI_API_KEY"),
+                    timeout=self.timeout,
+                    max_retries=0  # Retries are handled here with jittered backoff
+                )
+            return self.client
+    
+    def complete(self, tier, model, system_prompt, prompt, temperature=0.3):
+        """Request a JSON completion
+        
+        Args:
+            tier (str): Agent name used for budget logging and metrics
+            model (str): Model name
+            system_prompt (str): System message
+            prompt (str): User message
+            temperature (float): Sampling temperature
+        
+        Returns:
+            dict: Parsed JSON response, or None on failure
+        """
+        with get_profiler().stage("llm"):
+            return self._complete(tier, model, system_prompt, prompt, temperature)
+    
+    def _complete(self, tier, model, system_prompt, prompt, temperature):
+        if self.cache is not None and self.cache.ttl(tier) > 0:
+            cached, saved = self.cache.get(tier, model, system_prompt, prompt)
+            self.budget_manager.log_cache_lookup(cached is not None, saved)
+            if cached is not None:
+                LLM_CALLS.inc(agent=tier, result="cached")
+                logger.info(f"LLM {tier} ({model}): cache hit, saved ${saved:.4f}")
+                return cached
+        
+        params = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": temperature,
+            "response_format": {"type": "json_object"}
+        }
+        
+        start = time.perf_counter()
+        try:
+            response = self._create_with_retries(tier, params)
+        except Exception as e:
+            self._record(tier, error=True)
+            logger.error(f"LLM API error ({tier}): {e}")
+            return None
+        latency = time.perf_counter() - start
+        
+        # Log usage
+        usage = response.usage
+        tokens_in = usage.prompt_tokens
+        tokens_out = usage.completion_tokens
+        cost = calculate_cost(model, tokens_in, tokens_out)
+        self.budget_manager.log_usage(tier, tokens_in, tokens_out, cost)
+        self._record(tier, latency=latency, tokens_in=tokens_in, tokens_out=tokens_out, cost=cost)
+        
+        logger.info(f"LLM {tier} ({model}): {tokens_in}+{tokens_out} tokens, ${cost:.4f}, {latency:.1f}s")
+        
+        result = extract_json(response.choices[0].message.content)
+        if self.cache is not None:
+            self.cache.put(tier, model, system_prompt, prompt, result, cost)
+        return result
+    
+    def _create_with_retries(self, tier, params):
+        """Call the API, retrying transient errors with jittered exponential backoff"""
+        client = self._get_client()
+        for attempt in range(self.max_retries + 1):
+            try:
+                return client.chat.completions.create(**params)
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff_base * (2 ** attempt) * random.uniform(0.5, 1.5)
+                self._record(tier, retry=True)
+                logger.warning(f"LLM API transient error ({tier}): {e}. Retrying in {delay:.1f}s")
+                time.sleep(delay)
+    
+    def _record(self, tier, latency=None, tokens_in=0, tokens_out=0, cost=0.0, error=False, retry=False):
+        """Update per-agent metrics"""
+        with self.lock:
+            stats = self.metrics.setdefault(tier, {
+                "calls": 0,
+                "errors": 0,
+                "retries": 0,
+                "tokens_in": 0,
+                "tokens_out": 0,
+                "cost": 0.0,
+                "latency_total": 0.0,
+                "latency_max": 0.0
+            })
+            if retry:
+                stats["retries"] += 1
+                LLM_CALLS.inc(agent=tier, result="retry")
+            elif error:
+                stats["errors"] += 1
+                LLM_CALLS.inc(agent=tier, result="error")
+            else:
+                LLM_CALLS.inc(agent=tier, result="ok")
+                LLM_TOKENS.inc(tokens_in, agent=tier, direction="in")
+                LLM_TOKENS.inc(tokens_out, agent=tier, direction="out")
+                LLM_COST.inc(cost, agent=tier)
+                LLM_LATENCY.observe(latency, agent=tier)
+                stats["calls"] += 1
+                stats["tokens_in"] += tokens_in
+                stats["tokens_out"] += tokens_out
+                stats["cost"] += cost
+                stats["latency_total"] += latency
+                stats["latency_max"] = max(stats["latency_max"], latency)
+    
+    def get_metrics(self):
+        """Get per-agent call metrics with average latency"""
+        with self.lock:
+            metrics = {tier: dict(stats) for tier, stats in self.metrics.items()}
+        for stats in metrics.values():
+            stats["latency_avg"] = stats["latency_total"] / stats["calls"] if stats["calls"] else 0.0
+        return metrics
\ No newline at end of file
@@ -0,0 +1,194 @@
+"""
+Local Stream Server
+Stand-in for the OANDA streaming endpoints, for exercising stream subscribers offline
+
+Run with: python -m utils.local_stream_server --port 8765
+then set OANDA_STREAM_URL=http://127.0.0.1:8765
+"""
+
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger("CollaborativeTrader")
+
+
+class LocalStreamServer:
+    """Serves random-walk PRICE messages and HEARTBEATs in OANDA's stream format
+    
+    The transactions stream sends whatever publish_transaction() queued after
+    the connection opened, with heartbeats carrying lastTransactionID.
+    """
+    
+    def __init__(self, host="127.0.0.1", port=0, price_interval=0.5, heartbeat_interval=5.0, start_price=1.1):
+        """Initialize local stream server
+        
+        Args:
+            host (str): Interface to bind
+            port (int): Port to bind (0 picks a free port)
+            price_interval (float): Seconds between price ticks per connection
+            heartbeat_interval (float): Seconds between heartbeats
+            start_price (float): Initial mid price for every instrument
+        """
+        self.price_interval = price_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.start_price = start_price
+        self.mids = {}
+        self.transactions = []
+        self.last_transaction_id = 0
+        self.lock = threading.Lock()
+        
+        # Set to make open connections drop or go silent, to exercise reconnects
+        self.drop_connections = threading.Event()
+        self.silent = threading.Event()
+        self.connections = 0
+        
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+    
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self):
+        """Serve in a background thread"""
+        self.thread = threading.Thread(target=self.server.serve_forever, name="LocalStreamServer", daemon=True)
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        """Shut the server down"""
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def next_price(self, instrument):
+        """Advance the random walk for an instrument and build a PRICE message"""
+        with self.lock:
+            pip = 0.01 if "JPY" in instrument else 0.0001
+            mid = self.mids.get(instrument, self.start_price * (100 if "JPY" in instrument else 1))
+            mid += random.choice([-1, 0, 1]) * pip
+            self.mids[instrument] = mid
+        
+        digits = 3 if "JPY" in instrument else 5
+        return {
+            "type": "PRICE",
+            "instrument": instrument,
+            "time": datetime.now(timezone.utc).isoformat(),
+            "tradeable": True,
+            "bids": [{"price": f"{mid - pip:.{digits}f}", "liquidity": 1000000}],
+            "asks": [{"price": f"{mid + pip:.{digits}f}", "liquidity": 1000000}],
+            "closeoutBid": f"{mid - pip:.{digits}f}",
+            "closeoutAsk": f"{mid + pip:.{digits}f}"
+        }
+    
+    def publish_transaction(self, transaction):
+        """Queue a transaction for every open transactions stream
+        
+        Args:
+            transaction (dict): Transaction in OANDA format; id and time are filled in if missing
+            
+        Returns:
+            dict: The transaction as sent
+        """
+        with self.lock:
+            transaction = dict(transaction)
+            if "id" not in transaction:
+                transaction["id"] = str(self.last_transaction_id + 1)
+            transaction.setdefault("time", datetime.now(timezone.utc).isoformat())
+            self.last_transaction_id = max(self.last_transaction_id, int(transaction["id"]))
+            self.transactions.append(transaction)
+        return transaction
+    
+    def _next_transactions(self, cursor):
+        with self.lock:
+            messages = self.transactions[cursor[0]:]
+            cursor[0] = len(self.transactions)
+        return list(messages)
+    
+    def _handler_class(self):
+        stream_server = self
+        
+        class StreamHandler(BaseHTTPRequestHandler):
+            # Chunked like OANDA, so clients see each line as soon as it is sent
+            protocol_version = "HTTP/1.1"
+            
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                
+                if url.path.endswith("/pricing/stream"):
+                    instruments = [i for i in query.get("instruments", "").split(",") if i]
+                    self._stream(lambda: [stream_server.next_price(i) for i in instruments])
+                elif url.path.endswith("/transactions/stream"):
+                    # Only transactions published after the connection opened, like OANDA
+                    with stream_server.lock:
+                        cursor = [len(stream_server.transactions)]
+                    self._stream(lambda: stream_server._next_transactions(cursor),
+                                 lambda: {"lastTransactionID": str(stream_server.last_transaction_id)})
+                else:
+                    self.send_error(404)
+            
+            def _stream(self, next_messages, heartbeat_fields=None):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                self.close_connection = True
+                
+                with stream_server.lock:
+                    stream_server.connections += 1
+                
+                last_heartbeat = 0.0
+                try:
+                    while not stream_server.drop_connections.is_set():
+                        if not stream_server.silent.is_set():
+                            messages = next_messages()
+                            if time.monotonic() - last_heartbeat >= stream_server.heartbeat_interval:
+                                heartbeat = {"type": "HEARTBEAT", "time": datetime.now(timezone.utc).isoformat()}
+                                if heartbeat_fields:
+                                    heartbeat.update(heartbeat_fields())
+                                messages.append(heartbeat)
+                                last_heartbeat = time.monotonic()
+                            
+                            for message in messages:
+                                line = (json.dumps(message) + "\n").encode()
+                                self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                            self.wfile.flush()
+                        
+                        time.sleep(stream_server.price_interval)
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+            
+            def log_message(self, format, *args):
+                logger.debug(f"LocalStreamServer: {format % args}")
+        
+        return StreamHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the OANDA streaming API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--price-interval", type=float, default=0.5)
+    parser.add_argument("--heartbeat-interval", type=float, default=5.0)
+    args = parser.parse_args()
+    
+    server = LocalStreamServer(args.host, args.port, args.price_interval, args.heartbeat_interval)
+    print(f"Serving OANDA stream stand-in on {server.url}")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Background Log Writer
+Appends JSONL records from a single writer thread so disk latency stays off the trading path
+"""
+
+import os
+import json
+import queue
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger("CollaborativeTrader")
+
+# Records drained per batch before file handles are flushed
+MAX_BATCH = 500
+
+
+class BackgroundLogWriter:
+    """Bounded queue of (path, line) appends written in per-file batches
+    
+    Records are serialized by the caller, so later changes to the objects
+    cannot leak into the log. File handles stay open between batches. When the
+    queue is full, append() blocks rather than drop records.
+    """
+    
+    def __init__(self, max_queue=None):
+        self.queue = queue.Queue(maxsize=int(max_queue if max_queue is not None else os.getenv("LOG_WRITER_QUEUE_SIZE", 10000)))
+        self.handles = {}
+        self.lock = threading.Lock()
+        self.closed = False
+        self.stats = {"records": 0, "batches": 0, "bytes": 0, "errors": 0, "max_depth": 0}
+        
+        self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+    
+    def append(self, path, record):
+        """Queue a record to be appended to a JSONL file
+        
+        Returns:
+            int: Length of the line in bytes (records are ASCII JSON), or 0 if the writer is closed
+        """
+        if self.closed:
+            logger.warning(f"Log writer closed; dropping record for {path}")
+            return 0
+        line = json.dumps(record) + "\n"
+        self.queue.put((path, line))
+        depth = self.queue.qsize()
+        if depth > self.stats["max_depth"]:
+            self.stats["max_depth"] = depth
+        return len(line)
+    
+    def flush(self):
+        """Block until every queued record has been written"""
+        self.queue.join()
+    
+    def close(self):
+        """Write everything queued, stop the thread and close file handles"""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join(timeout=10)
+        with self.lock:
+            for handle in self.handles.values():
+                handle.close()
+            self.handles.clear()
+    
+    def get_stats(self):
+        """Get queue depth and write counters"""
+        stats = dict(self.stats)
+        stats["queue_depth"] = self.queue.qsize()
+        return stats
+    
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            items = [item]
+            while len(items) < MAX_BATCH:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            batch = {}
+            stop = False
+            for entry in items:
+                if entry is None:
+                    stop = True
+                    continue
+                path, line = entry
+                batch.setdefault(path, []).append(line)
+            
+            self._write_batch(batch)
+            for _ in items:
+                self.queue.task_done()
+            if stop:
+                return
+    
+    def _write_batch(self, batch):
+        with self.lock:
+            for path, lines in batch.items():
+                try:
+                    handle = self.handles.get(path)
+                    if handle is None:
+                        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                        handle = self.handles[path] = open(path, "a")
+                    handle.write("".join(lines))
+                    handle.flush()
+                    self.stats["records"] += len(lines)
+                    self.stats["bytes"] += sum(len(line) for line in lines)
+                except Exception as e:
+                    self.stats["errors"] += len(lines)
+                    logger.error(f"Error writing {len(lines)} records to {path}: {e}")
+            self.stats["batches"] += 1
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_log_writer():
+    """Get the process-wide background log writer"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = BackgroundLogWriter()
+        return _writer
\ No newline at end of file
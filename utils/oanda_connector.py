@@ -4,30 +4,108 @@ Handles connections to OANDA platform for trading and data retrieval
 """
 
 import os
+import time
 import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import requests
-import json
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timezone
+import numpy as np
 import pandas as pd
+from utils.metrics import get_registry, endpoint_template
+from utils.exposure import PortfolioExposure
 
 logger = logging.getLogger("CollaborativeTrader")
 
+OANDA_REQUESTS = get_registry().counter(
+    "oanda_requests_total", "OANDA REST requests by endpoint and HTTP status", ("method", "endpoint", "status"))
+OANDA_LATENCY = get_registry().histogram(
+    "oanda_request_seconds", "OANDA REST request latency", ("method", "endpoint"))
+
+
+def parse_trade(trade):
+    """Convert an OANDA trade object to an open trades row
+    
+    Args:
+        trade (dict): Trade from /openTrades
+        
+    Returns:
+        dict: trade_id, epic, direction, signed units, entry_price, stop_loss and
+        take_profit (NaN when not set), profit and open_time
+    """
+    units = float(trade.get("currentUnits", 0))
+    stop_order = trade.get("stopLossOrder") or {}
+    profit_order = trade.get("takeProfitOrder") or {}
+    return {
+        "trade_id": trade.get("id"),
+        "epic": trade["instrument"],
+        "direction": "BUY" if units > 0 else "SELL",
+        "units": units,
+        "entry_price": float(trade.get("price", 0)),
+        "stop_loss": float(stop_order["price"]) if "price" in stop_order else float("nan"),
+        "take_profit": float(profit_order["price"]) if "price" in profit_order else float("nan"),
+        "profit": float(trade.get("unrealizedPL", 0)),
+        "open_time": trade.get("openTime")
+    }
+
+
+def _same_price(current, target):
+    """True if a trade's current order price already matches the target"""
+    try:
+        return abs(float(current) - float(target)) < 1e-9
+    except (TypeError, ValueError):
+        return False
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing requests to a maximum rate per second"""
+    
+    def __init__(self, rate_per_second):
+        self.interval = 1.0 / rate_per_second if rate_per_second and rate_per_second > 0 else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until the caller may send its next request"""
+        if not self.interval:
+            return
+        
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        
+        if wait > 0:
+            time.sleep(wait)
+
+
 class OandaAPI:
     """OANDA API connector for forex trading"""
     
-    def __init__(self, practice=True):
+    def __init__(self, practice=True, pool_size=None, keep_alive=None, connect_timeout=None, read_timeout=None):
         """Initialize OANDA API connector
         
         Args:
             practice (bool): If True, use practice account, else use live account
+            pool_size (int, optional): Max pooled connections per host (default OANDA_POOL_SIZE or 10)
+            keep_alive (bool, optional): Reuse connections between calls (default OANDA_KEEP_ALIVE or True)
+            connect_timeout (float, optional): Connect timeout in seconds (default OANDA_CONNECT_TIMEOUT or 5)
+            read_timeout (float, optional): Read timeout in seconds (default OANDA_READ_TIMEOUT or 30)
         """
         self.practice = practice
         
         # Set base URL based on account type
         if practice:
             self.base_url = "https://api-fxpractice.oanda.com"
+            self.stream_url = "https://stream-fxpractice.oanda.com"
         else:
             self.base_url = "https://api-fxtrade.oanda.com"
+            self.stream_url = "https://stream-fxtrade.oanda.com"
+        
+        # Allow pointing streams at a local stand-in server
+        self.stream_url = os.getenv("OANDA_STREAM_URL", self.stream_url)
             
         # Set API token from environment variables
         self.api_token = os.getenv("OANDA_API_TOKEN")
@@ -45,6 +123,37 @@ class OandaAPI:
             "Content-Type": "application/json"
         }
         
+        # Connection pool settings
+        self.pool_size = int(pool_size if pool_size is not None else os.getenv("OANDA_POOL_SIZE", 10))
+        if keep_alive is None:
+            keep_alive = os.getenv("OANDA_KEEP_ALIVE", "True").lower() in ["true", "1", "yes"]
+        self.keep_alive = keep_alive
+        self.timeout = (
+            float(connect_timeout if connect_timeout is not None else os.getenv("OANDA_CONNECT_TIMEOUT", 5)),
+            float(read_timeout if read_timeout is not None else os.getenv("OANDA_READ_TIMEOUT", 30))
+        )
+        
+        # Shared session so every endpoint reuses pooled keep-alive connections
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        if not self.keep_alive:
+            self.session.headers["Connection"] = "close"
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        
+        # OANDA allows roughly 100 REST requests per second per account
+        self.rate_limiter = RateLimiter(float(os.getenv("OANDA_RATE_LIMIT", 100)))
+        
+        # Connection counters and per-request latency (method, endpoint, seconds)
+        self._stats_lock = threading.Lock()
+        self.request_count = 0
+        self.total_latency = 0.0
+        self.request_latencies = deque(maxlen=1000)
+        
+        # Callbacks given the body of every successful POST/PUT (order fills, closes, stop changes)
+        self.response_listeners = []
+        
         # Test connection
         self.test_connection()
         
@@ -71,7 +180,55 @@ class OandaAPI:
             logger.error(f"OANDA connection error: {e}")
             raise
     
-    def _make_request(self, method, endpoint, params=None, data=None):
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+    
+    def add_response_listener(self, callback):
+        """Call callback(body) with the response of every successful POST/PUT request"""
+        self.response_listeners.append(callback)
+    
+    def get_connection_stats(self):
+        """Get connection pool counters
+        
+        Returns:
+            dict: Requests made, connections opened and connections reused
+        """
+        opened = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+        
+        with self._stats_lock:
+            requests_made = self.request_count
+        
+        return {
+            "requests": requests_made,
+            "connections_opened": opened,
+            "connections_reused": max(0, requests_made - opened)
+        }
+    
+    def get_latency_stats(self):
+        """Get latency summary for recorded requests
+        
+        Returns:
+            dict: Request count, cumulative latency and average/max of recent requests
+        """
+        with self._stats_lock:
+            recent = [latency for _, _, latency in self.request_latencies]
+            total = self.total_latency
+            count = self.request_count
+        
+        return {
+            "requests": count,
+            "total_latency": total,
+            "avg_latency": sum(recent) / len(recent) if recent else 0.0,
+            "max_latency": max(recent) if recent else 0.0
+        }
+    
+    def _make_request(self, method, endpoint, params=None, data=None, timeout=None):
         """Make request to OANDA API
         
         Args:
@@ -79,26 +236,49 @@ class OandaAPI:
             endpoint (str): API endpoint to call
             params (dict, optional): Query parameters
             data (dict, optional): Request body data
+            timeout (tuple, optional): (connect, read) timeout override in seconds
             
         Returns:
             dict: Response data
         """
         url = f"{self.base_url}{endpoint}"
         
+        self.rate_limiter.acquire()
+        
+        start = time.perf_counter()
         try:
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=self.headers,
-                params=params,
-                json=data
-            )
+            status = "error"
+            try:
+                response = self.session.request(
+                    method=method,
+                    url=url,
+                    params=params,
+                    json=data,
+                    timeout=timeout or self.timeout
+                )
+                status = str(response.status_code)
+            finally:
+                latency = time.perf_counter() - start
+                with self._stats_lock:
+                    self.request_count += 1
+                    self.total_latency += latency
+                    self.request_latencies.append((method, endpoint, latency))
+                template = endpoint_template(endpoint)
+                OANDA_REQUESTS.inc(method=method, endpoint=template, status=status)
+                OANDA_LATENCY.observe(latency, method=method, endpoint=template)
             
             # Raise exception for HTTP errors
             response.raise_for_status()
             
-            # Return response data
-            return response.json()
+            # Return response data, first letting listeners see account changes
+            body = response.json()
+            if method != "GET":
+                for listener in self.response_listeners:
+                    try:
+                        listener(body)
+                    except Exception as e:
+                        logger.error(f"Response listener failed: {e}")
+            return body
         except requests.exceptions.HTTPError as e:
             # Log error details from response
             error_details = {}
@@ -141,23 +321,30 @@ class OandaAPI:
         response = self._make_request("GET", f"/v3/accounts/{self.account_id}/instruments")
         return response.get("instruments", [])
     
-    def get_candles(self, instrument, granularity="H1", count=100):
+    def get_candles(self, instrument, granularity="H1", count=100, from_time=None):
         """Get candle data for an instrument
         
         Args:
             instrument (str): Instrument name (e.g., "EUR_USD")
             granularity (str): Candle granularity (e.g., "M5", "H1", "D")
-            count (int): Number of candles to retrieve
+            count (int): Number of candles to retrieve (ignored when from_time is set)
+            from_time (str, optional): RFC3339 time; only candles after it are returned
             
         Returns:
             list: List of candle data
         """
         params = {
             "granularity": granularity,
-            "count": count,
             "price": "M"  # Midpoint candles
         }
         
+        if from_time is not None:
+            # Everything newer than from_time, excluding the candle at from_time itself
+            params["from"] = from_time
+            params["includeFirst"] = "false"
+        else:
+            params["count"] = count
+        
         response = self._make_request(
             "GET",
             f"/v3/instruments/{instrument}/candles",
@@ -175,8 +362,22 @@ class OandaAPI:
         Returns:
             dict: Price data
         """
+        return self.get_prices([instrument]).get(instrument, {})
+    
+    def get_prices(self, instruments):
+        """Get current prices for several instruments in one request
+        
+        Args:
+            instruments (list): Instrument names (e.g., ["EUR_USD", "USD_JPY"])
+            
+        Returns:
+            dict: Price data keyed by instrument
+        """
+        if not instruments:
+            return {}
+        
         params = {
-            "instruments": instrument
+            "instruments": ",".join(instruments)
         }
         
         response = self._make_request(
@@ -185,8 +386,30 @@ class OandaAPI:
             params=params
         )
         
-        prices = response.get("prices", [])
-        return prices[0] if prices else {}
+        return {price.get("instrument"): price for price in response.get("prices", [])}
+    
+    def open_stream(self, endpoint, params=None, read_timeout=None):
+        """Open a long-lived streaming connection
+        
+        Streams use their own connection so they never hold a slot in the REST pool.
+        
+        Args:
+            endpoint (str): Streaming endpoint (e.g., "/v3/accounts/{id}/pricing/stream")
+            params (dict, optional): Query parameters
+            read_timeout (float, optional): Seconds without data before the read fails
+            
+        Returns:
+            Response: Open response to iterate with iter_lines()
+        """
+        response = requests.get(
+            f"{self.stream_url}{endpoint}",
+            headers=self.headers,
+            params=params,
+            stream=True,
+            timeout=(self.timeout[0], read_timeout or self.timeout[1])
+        )
+        response.raise_for_status()
+        return response
     
     def get_open_positions(self):
         """Get all open positions
@@ -239,6 +462,49 @@ class OandaAPI:
             logger.error(f"Error getting positions: {e}")
             return pd.DataFrame()
     
+    def fetch_open_trades(self):
+        """Get the raw open trades response (errors are raised)
+        
+        Returns:
+            dict: Response with "trades" and "lastTransactionID"
+        """
+        return self._make_request("GET", f"/v3/accounts/{self.account_id}/openTrades")
+    
+    def get_transactions_since(self, transaction_id):
+        """Get every transaction after an ID (errors are raised)
+        
+        Args:
+            transaction_id (int or str): Last transaction ID already seen
+            
+        Returns:
+            dict: Response with "transactions" (oldest first) and "lastTransactionID"
+        """
+        return self._make_request("GET", f"/v3/accounts/{self.account_id}/transactions/sinceid",
+                                  params={"id": str(transaction_id)})
+    
+    def get_open_trades(self):
+        """Get all open trades with their stop loss and take profit levels
+        
+        Returns:
+            DataFrame: One row per trade (signed units; stop_loss/take_profit NaN when not set)
+        """
+        try:
+            trades = self.fetch_open_trades().get("trades", [])
+            
+            data = []
+            for trade in trades:
+                try:
+                    data.append(parse_trade(trade))
+                except Exception as trade_error:
+                    logger.error(f"Error processing trade: {trade_error}")
+                    continue
+            
+            return pd.DataFrame(data)
+            
+        except Exception as e:
+            logger.error(f"Error getting open trades: {e}")
+            return pd.DataFrame()
+    
     def create_order(self, instrument, units, price=None, stop_loss=None, take_profit=None):
         """Create a new order
         
@@ -321,60 +587,117 @@ class OandaAPI:
         
         return response
     
-    def update_position(self, instrument, stop_loss=None, take_profit=None):
+    def update_position(self, instrument, stop_loss=None, take_profit=None, trades=None):
         """Update stop loss or take profit for a position
         
         Args:
             instrument (str): Instrument name (e.g., "EUR_USD")
             stop_loss (float, optional): New stop loss price
             take_profit (float, optional): New take profit price
+            trades (DataFrame, optional): Open trades snapshot (fetched if not given)
             
         Returns:
-            dict: Update position response
+            list: Update responses, one per open trade (dict with "error" if nothing was
+            given to set or none are open); a failed update raises
         """
-        # Get open trades for the instrument
-        response = self._make_request(
-            "GET",
-            f"/v3/accounts/{self.account_id}/trades?instrument={instrument}&state=OPEN"
-        )
-        
-        trades = response.get("trades", [])
-        if not trades:
+        if stop_loss is None and take_profit is None:
+            logger.warning(f"No stop loss or take profit given for {instrument}")
+            return {"error": "No stop loss or take profit given"}
+        
+        results = self.update_trade_orders(
+            [{"instrument": instrument, "stop_loss": stop_loss, "take_profit": take_profit}], trades,
+            skip_unchanged=False)
+        if not results:
             logger.warning(f"No open trades found for {instrument}")
             return {"error": "No open trades found"}
         
-        # Update each trade
+        failed = [result for result in results if not result["success"]]
+        if failed:
+            raise requests.exceptions.RequestException(
+                f"Updating trade {failed[0]['trade_id']} failed: {failed[0]['error']}")
+        return [result["response"] for result in results]
+    
+    def update_trade_orders(self, updates, trades=None, max_workers=None, skip_unchanged=True):
+        """Set stop loss / take profit on every open trade of many instruments at once
+        
+        One open trades snapshot serves every update, trades already at the
+        requested levels are skipped (unless skip_unchanged is False), and the
+        PUTs run concurrently on the shared connection pool.
+        
+        Args:
+            updates (list): Dicts with instrument and stop_loss and/or take_profit
+            trades (DataFrame, optional): Open trades snapshot (see get_open_trades; fetched once if not given)
+            max_workers (int, optional): Concurrent PUTs (default OANDA_BULK_WORKERS or 4, at most pool_size)
+            skip_unchanged (bool): Skip trades whose orders already match the requested levels
+            
+        Returns:
+            list: Per-trade dicts with instrument, trade_id, success, skipped, response, error and seconds
+        """
+        if trades is None:
+            trades = pd.DataFrame([parse_trade(trade) for trade in self.fetch_open_trades().get("trades", [])])
+        
+        # Later updates for the same instrument win
+        levels = {}
+        for update in updates:
+            instrument = update.get("instrument")
+            level = {key: update.get(key) for key in ("stop_loss", "take_profit") if update.get(key) is not None}
+            if instrument and level:
+                levels.setdefault(instrument, {}).update(level)
+        
+        jobs = []
         results = []
-        for trade in trades:
-            trade_id = trade["id"]
-            
-            # Build update data
-            update_data = {}
-            if stop_loss is not None:
-                update_data["stopLoss"] = {
-                    "price": str(stop_loss),
-                    "timeInForce": "GTC"
-                }
-            if take_profit is not None:
-                update_data["takeProfit"] = {
-                    "price": str(take_profit),
-                    "timeInForce": "GTC"
-                }
-            
-            # Skip if no updates
-            if not update_data:
-                continue
+        if len(trades):
+            for trade in trades[trades["epic"].isin(list(levels))].itertuples(index=False):
+                data = {}
+                for key, order in (("stop_loss", "stopLoss"), ("take_profit", "takeProfit")):
+                    price = levels[trade.epic].get(key)
+                    if price is not None and not (skip_unchanged and _same_price(getattr(trade, key), price)):
+                        data[order] = {"price": str(price), "timeInForce": "GTC"}
                 
-            # Execute update
-            update_response = self._make_request(
+                if data:
+                    jobs.append((trade.epic, trade.trade_id, data))
+                else:
+                    results.append({"instrument": trade.epic, "trade_id": trade.trade_id, "success": True,
+                                    "skipped": True, "response": None, "error": None, "seconds": 0.0})
+        
+        if not jobs:
+            return results
+        
+        workers = int(max_workers or os.getenv("OANDA_BULK_WORKERS", 4))
+        workers = max(1, min(workers, self.pool_size, len(jobs)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results.extend(executor.map(lambda job: self._put_trade_orders(*job), jobs))
+        
+        updated = sum(1 for result in results if result["success"] and not result["skipped"])
+        logger.info(f"Updated orders on {updated}/{len(jobs)} trades ({len(results) - len(jobs)} already set) "
+                    f"with {workers} workers")
+        return results
+    
+    def _put_trade_orders(self, instrument, trade_id, data):
+        """Replace one trade's dependent orders, recording the outcome instead of raising
+        
+        Args:
+            instrument (str): Instrument of the trade
+            trade_id (str): Trade ID
+            data (dict): stopLoss / takeProfit order specifications
+            
+        Returns:
+            dict: Per-trade result (see update_trade_orders)
+        """
+        start = time.perf_counter()
+        result = {"instrument": instrument, "trade_id": trade_id, "success": True,
+                  "skipped": False, "response": None, "error": None}
+        try:
+            result["response"] = self._make_request(
                 "PUT",
                 f"/v3/accounts/{self.account_id}/trades/{trade_id}/orders",
-                data=update_data
+                data=data
             )
-            
-            results.append(update_response)
-        
-        return results
+        except Exception as e:
+            result["success"] = False
+            result["error"] = str(e)
+        result["seconds"] = time.perf_counter() - start
+        return result
 
 
 def get_oanda_client():
@@ -392,7 +715,36 @@ def get_oanda_client():
         return None
 
 
-def calculate_pip_value(instrument, account_currency, price=1.0, units=1):
+def quote_conversion(instrument, account_currency, price=None, rates=None):
+    """Account currency per one unit of an instrument's quote currency
+    
+    Args:
+        instrument (str): OANDA instrument name (e.g., "EUR_GBP")
+        account_currency (str): Account currency
+        price (float, optional): Current price of the instrument
+        rates (ConversionRates, optional): Cross-rate table
+        
+    Returns:
+        float: Conversion rate (1.0 with a warning if no rate is known)
+    """
+    base, quote = instrument.split('_')[:2]
+    if quote == account_currency:
+        return 1.0
+    
+    if rates is not None:
+        rate = rates.rate(quote, account_currency)
+        if rate is not None:
+            return rate
+    
+    # The instrument's own price converts when the account currency is its base
+    if base == account_currency and price:
+        return 1.0 / float(price)
+    
+    logger.warning(f"No {quote}/{account_currency} rate available; pip value for {instrument} is unconverted")
+    return 1.0
+
+
+def calculate_pip_value(instrument, account_currency, price=1.0, units=1, rates=None):
     """Calculate the value of a pip for a given instrument and units
     
     Args:
@@ -400,6 +752,7 @@ def calculate_pip_value(instrument, account_currency, price=1.0, units=1):
         account_currency (str): Account currency (e.g., "USD")
         price (float): Current price of the instrument
         units (int): Number of units in the position
+        rates (ConversionRates, optional): Cross-rate table for quote currency conversion
         
     Returns:
         float: Value of 1 pip in account currency
@@ -407,25 +760,12 @@ def calculate_pip_value(instrument, account_currency, price=1.0, units=1):
     # Set pip size based on JPY or standard pairs
     pip_size = 0.01 if "_JPY" in instrument else 0.0001
     
-    # Extract quote currency
-    quote_currency = instrument.split('_')[1]
-    
-    # Calculate pip value in quote currency
+    # Calculate pip value in quote currency, then convert to the account currency
     pip_value_quote = pip_size * units
-    
-    # If quote currency is the same as account currency, return directly
-    if quote_currency == account_currency:
-        return pip_value_quote
-    
-    # Otherwise, convert to account currency (simplified)
-    # In a real system, you would use current exchange rates
-    # This is a simplified approximation
-    pip_value_account = pip_value_quote
-    
-    return pip_value_account
+    return pip_value_quote * quote_conversion(instrument, account_currency, price, rates)
 
 
-def calculate_position_size(account_balance, risk_percent, entry_price, stop_loss, instrument, account_currency):
+def calculate_position_size(account_balance, risk_percent, entry_price, stop_loss, instrument, account_currency, rates=None):
     """Calculate position size based on risk percentage and stop distance
     
     Args:
@@ -435,6 +775,7 @@ def calculate_position_size(account_balance, risk_percent, entry_price, stop_los
         stop_loss (float): Stop loss price
         instrument (str): OANDA instrument name
         account_currency (str): Account currency
+        rates (ConversionRates, optional): Cross-rate table for quote currency conversion
         
     Returns:
         int: Position size in units
@@ -455,7 +796,7 @@ def calculate_position_size(account_balance, risk_percent, entry_price, stop_los
     stop_distance_pips = stop_distance * pip_multiplier
     
     # Calculate pip value for 1 unit
-    pip_value_per_unit = calculate_pip_value(instrument, account_currency, entry_price, 1)
+    pip_value_per_unit = calculate_pip_value(instrument, account_currency, entry_price, 1, rates)
     
     # Calculate required units for the risk amount
     try:
@@ -474,13 +815,60 @@ def calculate_position_size(account_balance, risk_percent, entry_price, stop_los
         return 10  # Default minimum position size
 
 
-def execute_trade(oanda_client, trade, positions=None):
+def calculate_position_sizes(trades, account_balance, account_currency, rates=None):
+    """Size several trades in one vectorized pass (see calculate_position_size)
+    
+    Args:
+        trades (list): Trade dicts with epic, entry_price, initial_stop_loss and risk_percent
+        account_balance (float): Account balance
+        account_currency (str): Account currency
+        rates (ConversionRates, optional): Cross-rate table for quote currency conversion
+        
+    Returns:
+        numpy.ndarray: Units per trade (unsigned; 0 where entry or stop is missing)
+    """
+    if not trades:
+        return np.zeros(0, dtype=np.int64)
+    
+    def number(value):
+        try:
+            return float(value or 0)
+        except (TypeError, ValueError):
+            return 0.0
+    
+    instruments = [standardize_instrument_name(trade.get("epic", "")) for trade in trades]
+    entry = np.array([number(trade.get("entry_price")) for trade in trades])
+    stop = np.array([number(trade.get("initial_stop_loss")) for trade in trades])
+    risk_percent = np.array([number(trade.get("risk_percent", 2.0)) for trade in trades])
+    
+    # Quote currencies in the rate table share one lookup; the price fallback
+    # in quote_conversion depends on the instrument, so misses go there per trade
+    table = rates.table(account_currency) if rates is not None else {}
+    conversion = np.array([
+        table.get(instrument.split("_")[-1]) or quote_conversion(instrument, account_currency, price, rates)
+        for instrument, price in zip(instruments, entry)
+    ])
+    
+    # Loss per unit at the stop is the stop distance in quote currency, converted
+    stop_distance = np.abs(entry - stop)
+    stop_distance = np.where(stop_distance > 0, stop_distance, 0.0001)
+    units = np.floor(account_balance * risk_percent / 100 / (stop_distance * conversion))
+    units = np.maximum(units, 1)
+    units[(entry <= 0) | (stop <= 0)] = 0
+    return units.astype(np.int64)
+
+
+def execute_trade(oanda_client, trade, positions=None, exposure=None, units=None, rates=None, account=None):
     """Execute a new trade on OANDA platform with proper risk management
     
     Args:
         oanda_client (OandaAPI): OANDA API client
         trade (dict): Trade details
         positions (DataFrame, optional): Current open positions
+        exposure (PortfolioExposure, optional): Current exposure (built from open trades if not given)
+        units (int, optional): Units already sized by calculate_position_sizes
+        rates (ConversionRates, optional): Cross-rate table for sizing and exposure
+        account (dict, optional): Account with balance and currency (fetched if not given)
         
     Returns:
         tuple: (success, trade_data)
@@ -495,8 +883,9 @@ def execute_trade(oanda_client, trade, positions=None):
         # If in IG format, convert it
         instrument = standardize_instrument_name(epic)
         
-        # Get account information
-        account = oanda_client.get_account()
+        # Get account information unless the caller already has it
+        if account is None:
+            account = oanda_client.get_account()
         account_balance = float(account.get("balance", 1000))
         account_currency = account.get("currency", "USD")
         
@@ -504,33 +893,30 @@ def execute_trade(oanda_client, trade, positions=None):
         entry_price = float(trade.get("entry_price", 0))
         stop_loss = float(trade.get("initial_stop_loss", 0))
         
-        # If no positions provided, get them
-        if positions is None:
-            positions = oanda_client.get_open_positions()
-        
-        # Check for 30% total risk limit
-        total_risk_percent = calculate_total_risk_percentage(positions, risk_percent, account_balance)
-        if total_risk_percent > 30.0:
-            logger.warning(f"Total risk percentage {total_risk_percent:.2f}% exceeds 30% limit. Canceling trade.")
-            return False, {"outcome": "CANCELED", "reason": "Total risk percentage exceeds 30% limit"}
+        # Measure current risk from open trades' stop distances unless the caller already has
+        if exposure is None:
+            rate_table = rates.table(account_currency) if rates is not None else None
+            exposure = PortfolioExposure(oanda_client.get_open_trades(), account_balance, account_currency, rate_table or None)
         
-        # Check for 10% same currency limit
-        currency_risk = calculate_currency_risk_percentage(positions, instrument, risk_percent, account_balance)
-        if currency_risk > 10.0:
-            logger.warning(f"Risk for {instrument.split('_')[0]} ({currency_risk:.2f}%) exceeds 10% limit. Canceling trade.")
-            return False, {"outcome": "CANCELED", "reason": f"Risk for {instrument.split('_')[0]} exceeds 10% limit"}
+        # Check the 30% total and 10% per currency risk limits
+        allowed, reason = exposure.check_trade(instrument, direction, risk_percent)
+        if not allowed:
+            logger.warning(f"{reason}. Canceling trade.")
+            return False, {"outcome": "CANCELED", "reason": reason}
         
         # Calculate position size based on risk
         if entry_price > 0 and stop_loss > 0:
             # Use proper risk-based position sizing
-            units = calculate_position_size(
-                account_balance, 
-                risk_percent, 
-                entry_price, 
-                stop_loss, 
-                instrument, 
-                account_currency
-            )
+            if units is None:
+                units = calculate_position_size(
+                    account_balance, 
+                    risk_percent, 
+                    entry_price, 
+                    stop_loss, 
+                    instrument, 
+                    account_currency,
+                    rates
+                )
             
             # Log risk calculation
             stop_distance = abs(entry_price - stop_loss)
@@ -642,62 +1028,39 @@ def execute_trade(oanda_client, trade, positions=None):
         return False, {"outcome": "ERROR", "reason": error_message}
 
 
-def calculate_total_risk_percentage(positions, new_trade_risk, account_balance):
+def calculate_total_risk_percentage(positions, new_trade_risk, account_balance, account_currency="USD"):
     """Calculate total risk percentage including existing positions
     
     Args:
-        positions (DataFrame): Current positions
+        positions (DataFrame): Current open trades or positions
         new_trade_risk (float): Risk percentage for new trade
         account_balance (float): Account balance
+        account_currency (str): Account currency
         
     Returns:
         float: Total risk percentage
     """
-    # Default to new trade risk if no positions
-    if positions is None or len(positions) == 0:
-        return float(new_trade_risk)
-        
-    # Estimate risk for existing positions (simplified)
-    # In a real system, you would calculate this based on stop loss distances
-    existing_risk = sum([2.0 for _ in range(len(positions))])  # Assume 2% risk per position
-    
-    # Add new trade risk
-    total_risk = existing_risk + float(new_trade_risk)
-    
-    return total_risk
+    return PortfolioExposure(positions, account_balance, account_currency).total_risk + float(new_trade_risk)
 
 
-def calculate_currency_risk_percentage(positions, new_instrument, new_trade_risk, account_balance):
-    """Calculate risk percentage for a specific currency
+def calculate_currency_risk_percentage(positions, new_instrument, new_trade_risk, account_balance,
+                                       direction="BUY", account_currency="USD"):
+    """Calculate the larger net currency risk of the new trade's two legs
     
     Args:
-        positions (DataFrame): Current positions
+        positions (DataFrame): Current open trades or positions
         new_instrument (str): New instrument (e.g., "EUR_USD")
         new_trade_risk (float): Risk percentage for new trade
         account_balance (float): Account balance
+        direction (str): Direction of the new trade
+        account_currency (str): Account currency
         
     Returns:
-        float: Risk percentage for the currency
+        float: Absolute net risk percentage of the more exposed currency
     """
-    # Extract base currency from the instrument
-    base_currency = new_instrument.split('_')[0]
-    
-    # Default to new trade risk if no positions
-    if positions is None or len(positions) == 0:
-        return float(new_trade_risk)
-        
-    # Calculate risk for positions with the same base currency
-    existing_risk = 0.0
-    for _, position in positions.iterrows():
-        position_instrument = position.get("epic", "")
-        if isinstance(position_instrument, str) and base_currency in position_instrument.split('_')[0]:
-            # Assume 2% risk per position with same currency
-            existing_risk += 2.0
-    
-    # Add new trade risk
-    total_currency_risk = existing_risk + float(new_trade_risk)
-    
-    return total_currency_risk
+    exposure = PortfolioExposure(positions, account_balance, account_currency)
+    _, legs = exposure.with_trade(new_instrument, direction, new_trade_risk)
+    return max(abs(net) for net in legs.values())
 
 
 def close_position(oanda_client, position_action, positions):
@@ -754,53 +1117,71 @@ def close_position(oanda_client, position_action, positions):
         return False, {"outcome": "ERROR", "reason": str(e)}
 
 
-def update_stop_loss(oanda_client, position_action):
+def update_stop_loss(oanda_client, position_action, trades=None):
     """Update stop loss for an existing position
     
     Args:
         oanda_client (OandaAPI): OANDA API client
         position_action (dict): Position action details
+        trades (DataFrame, optional): Open trades snapshot
         
     Returns:
         tuple: (success, update_data)
     """
-    try:
-        epic = position_action.get("epic")
-        new_level = position_action.get("new_level")
-        
-        # Use OANDA instrument format
-        instrument = standardize_instrument_name(epic)
-        
-        logger.info(f"Updating stop for {instrument} to {new_level}")
+    return update_stop_losses(oanda_client, [position_action], trades)[0]
+
+
+def update_stop_losses(oanda_client, position_actions, trades=None):
+    """Update stop losses for many positions with one snapshot and concurrent requests
+    
+    Args:
+        oanda_client (OandaAPI): OANDA API client
+        position_actions (list): UPDATE_STOP position actions
+        trades (DataFrame, optional): Open trades snapshot (fetched once if not given)
         
-        # Update position
-        response = oanda_client.update_position(
-            instrument=instrument,
-            stop_loss=new_level
+    Returns:
+        list: (success, update_data) per action, in order; update_data carries per-trade results
+    """
+    try:
+        instruments = [standardize_instrument_name(action.get("epic", "")) for action in position_actions]
+        for action, instrument in zip(position_actions, instruments):
+            logger.info(f"Updating stop for {instrument} to {action.get('new_level')}")
+        
+        results = oanda_client.update_trade_orders(
+            [{"instrument": instrument, "stop_loss": action.get("new_level")}
+             for action, instrument in zip(position_actions, instruments)],
+            trades
         )
-        
-        # Check if update was successful
-        if not isinstance(response, dict) or "error" not in response:
-            # Log the update
-            update_data = {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "epic": epic,
-                "instrument": instrument,
-                "action_type": "UPDATE_STOP",
-                "new_level": new_level,
-                "outcome": "UPDATED",
-                "reason": position_action.get("reason", "")
-            }
-            
-            return True, update_data
-        else:
-            logger.error(f"Update stop loss failed: {response.get('error')}")
-            return False, {"outcome": "FAILED", "reason": response.get("error")}
-            
     except Exception as e:
         logger.error(f"Update stop loss error: {e}")
-        return False, {"outcome": "ERROR", "reason": str(e)}
-
+        return [(False, {"outcome": "ERROR", "reason": str(e)}) for _ in position_actions]
+    
+    by_instrument = {}
+    for result in results:
+        by_instrument.setdefault(result["instrument"], []).append(result)
+    
+    outcomes = []
+    for action, instrument in zip(position_actions, instruments):
+        trade_results = by_instrument.get(instrument, [])
+        failed = [result for result in trade_results if not result["success"]]
+        if not trade_results or failed:
+            reason = failed[0]["error"] if failed else "No open trades found"
+            logger.error(f"Update stop loss failed for {instrument}: {reason}")
+            outcomes.append((False, {"outcome": "FAILED", "reason": reason}))
+            continue
+        
+        outcomes.append((True, {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "epic": action.get("epic"),
+            "instrument": instrument,
+            "action_type": "UPDATE_STOP",
+            "new_level": action.get("new_level"),
+            "outcome": "UPDATED",
+            "reason": action.get("reason", ""),
+            "trades": [{"trade_id": result["trade_id"], "skipped": result["skipped"], "seconds": round(result["seconds"], 4)}
+                       for result in trade_results]
+        }))
+    return outcomes
 
 def standardize_instrument_name(epic):
     """Standardize instrument name to OANDA format (e.g. EUR/USD to EUR_USD)
@@ -0,0 +1,227 @@
+"""
+OANDA Streaming Utilities
+Long-lived subscribers for OANDA streaming endpoints with heartbeat handling and reconnects
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger("CollaborativeTrader")
+
+
+class OandaStream:
+    """Background subscriber for a line-delimited JSON OANDA stream
+    
+    Subclasses provide the endpoint and handle each decoded message.
+    """
+    
+    def __init__(self, oanda_client, heartbeat_timeout=None, max_backoff=None):
+        """Initialize stream subscriber
+        
+        Args:
+            oanda_client (OandaAPI): OANDA API client
+            heartbeat_timeout (float, optional): Seconds without any message before reconnecting
+            max_backoff (float, optional): Upper bound for the reconnect delay in seconds
+        """
+        self.oanda = oanda_client
+        self.heartbeat_timeout = float(heartbeat_timeout or os.getenv("OANDA_STREAM_HEARTBEAT_TIMEOUT", 15))
+        self.max_backoff = float(max_backoff or os.getenv("OANDA_STREAM_MAX_BACKOFF", 60))
+        
+        self.name = self.__class__.__name__
+        self.thread = None
+        self.response = None
+        self.stop_event = threading.Event()
+        
+        # Liveness and counters
+        self.connected = False
+        self.last_message = 0.0
+        self.messages = 0
+        self.heartbeats = 0
+        self.reconnects = 0
+    
+    def endpoint(self):
+        """Streaming endpoint and query parameters"""
+        raise NotImplementedError
+    
+    def handle_message(self, message):
+        """Handle one decoded non-heartbeat message"""
+        raise NotImplementedError
+    
+    def handle_heartbeat(self, message):
+        """Handle a heartbeat message (optional)"""
+    
+    def on_connect(self):
+        """Called after each (re)connect, before messages are read (optional)"""
+    
+    def start(self):
+        """Start the subscriber thread"""
+        if self.thread and self.thread.is_alive():
+            return self
+        
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.thread.start()
+        logger.info(f"{self.name} started")
+        return self
+    
+    def stop(self, timeout=5):
+        """Stop the subscriber thread and close the connection"""
+        self.stop_event.set()
+        if self.response is not None:
+            try:
+                self.response.close()
+            except Exception:
+                pass
+        if self.thread:
+            self.thread.join(timeout)
+        self.connected = False
+        logger.info(f"{self.name} stopped")
+    
+    def is_alive(self):
+        """Check a message or heartbeat arrived within the heartbeat timeout"""
+        return self.connected and time.monotonic() - self.last_message < self.heartbeat_timeout
+    
+    def get_stats(self):
+        """Get stream counters"""
+        return {
+            "connected": self.is_alive(),
+            "messages": self.messages,
+            "heartbeats": self.heartbeats,
+            "reconnects": self.reconnects
+        }
+    
+    def _run(self):
+        """Connect, consume and reconnect with exponential backoff until stopped"""
+        backoff = 1.0
+        while not self.stop_event.is_set():
+            try:
+                endpoint, params = self.endpoint()
+                # The read timeout doubles as the heartbeat watchdog
+                self.response = self.oanda.open_stream(endpoint, params, read_timeout=self.heartbeat_timeout)
+                self.connected = True
+                self.last_message = time.monotonic()
+                logger.info(f"{self.name} connected")
+                self.on_connect()
+                
+                for line in self.response.iter_lines():
+                    if self.stop_event.is_set():
+                        break
+                    if not line:
+                        continue
+                    
+                    self._handle_line(line)
+                    backoff = 1.0
+                
+                if not self.stop_event.is_set():
+                    logger.warning(f"{self.name} closed by server")
+            except Exception as e:
+                if not self.stop_event.is_set():
+                    logger.warning(f"{self.name} error: {e}")
+            finally:
+                self.connected = False
+                if self.response is not None:
+                    self.response.close()
+                    self.response = None
+            
+            if self.stop_event.is_set():
+                break
+            
+            # Reconnect with exponential backoff
+            self.reconnects += 1
+            logger.info(f"{self.name} reconnecting in {backoff:.0f}s")
+            self.stop_event.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+    
+    def _handle_line(self, line):
+        """Decode one stream line and dispatch it"""
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            logger.warning(f"{self.name} received malformed line: {line[:100]}")
+            return
+        
+        self.last_message = time.monotonic()
+        self.messages += 1
+        
+        if message.get("type") in ("HEARTBEAT", "TRANSACTION_HEARTBEAT"):
+            self.heartbeats += 1
+            self.handle_heartbeat(message)
+            return
+        
+        self.handle_message(message)
+
+
+class PriceStream(OandaStream):
+    """Streaming price subscriber keeping an in-memory latest-quote table"""
+    
+    def __init__(self, oanda_client, instruments, heartbeat_timeout=None, max_backoff=None):
+        super().__init__(oanda_client, heartbeat_timeout, max_backoff)
+        self.instruments = list(instruments)
+        self.quotes = {}
+    
+    def endpoint(self):
+        return (
+            f"/v3/accounts/{self.oanda.account_id}/pricing/stream",
+            {"instruments": ",".join(self.instruments)}
+        )
+    
+    def handle_message(self, message):
+        if message.get("type") == "PRICE" and "instrument" in message:
+            # Replace the whole quote so readers always see a consistent bid/ask pair
+            self.quotes[message["instrument"]] = message
+    
+    def get_quote(self, instrument):
+        """Get the latest streamed price for an instrument
+        
+        Returns:
+            dict: OANDA price object, or None if unknown or the stream is down
+        """
+        if not self.is_alive():
+            return None
+        return self.quotes.get(instrument)
+
+
+class TransactionStream(OandaStream):
+    """Streaming account transactions subscriber
+    
+    Transactions are passed to on_transaction in arrival order. on_catch_up is
+    called after every (re)connect and whenever a heartbeat reports a newer
+    lastTransactionID than the last one received, so gaps can be filled;
+    on_heartbeat is called for heartbeats that show nothing was missed.
+    """
+    
+    def __init__(self, oanda_client, on_transaction, on_catch_up=None, on_heartbeat=None,
+                 heartbeat_timeout=None, max_backoff=None):
+        super().__init__(oanda_client, heartbeat_timeout, max_backoff)
+        self.on_transaction = on_transaction
+        self.on_catch_up = on_catch_up
+        self.on_heartbeat = on_heartbeat
+        self.last_transaction_id = 0
+    
+    def endpoint(self):
+        return (f"/v3/accounts/{self.oanda.account_id}/transactions/stream", None)
+    
+    def handle_message(self, message):
+        try:
+            self.last_transaction_id = max(self.last_transaction_id, int(message.get("id", 0)))
+        except (TypeError, ValueError):
+            pass
+        self.on_transaction(message)
+    
+    def handle_heartbeat(self, message):
+        try:
+            latest = int(message.get("lastTransactionID", 0))
+        except (TypeError, ValueError):
+            return
+        if latest > self.last_transaction_id and self.on_catch_up:
+            self.on_catch_up()
+            self.last_transaction_id = latest
+        elif self.on_heartbeat:
+            self.on_heartbeat()
+    
+    def on_connect(self):
+        if self.on_catch_up:
+            self.on_catch_up()
\ No newline at end of file
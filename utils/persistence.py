@@ -0,0 +1,95 @@
+"""
+Persistence Utilities
+Write-coalescing JSON persistence: changes mark documents dirty and are flushed together
+"""
+
+import os
+import json
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger("CollaborativeTrader")
+
+
+def write_json_atomic(path, data):
+    """Write compact JSON to a temp file and rename it over path
+    
+    Returns:
+        int: Bytes written
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    payload = json.dumps(data, separators=(",", ":"))
+    temp_file = f"{path}.tmp"
+    with open(temp_file, "w") as f:
+        f.write(payload)
+    os.replace(temp_file, path)
+    return len(payload)
+
+
+class CoalescingWriter:
+    """Tracks dirty JSON documents and writes each at most once per flush
+    
+    Documents are registered with a callable returning their current contents.
+    flush() is called once per trading cycle and at interpreter exit. The
+    documents are live dicts the cycle thread mutates, so flush() must run on
+    that thread, never on a timer of its own.
+    """
+    
+    def __init__(self):
+        self.documents = {}
+        self.dirty = set()
+        self.lock = threading.Lock()
+        
+        # Totals and the values of the last flush
+        self.stats = {"flushes": 0, "files_written": 0, "bytes_written": 0, "last_files": 0, "last_bytes": 0}
+        
+        atexit.register(self.close)
+    
+    def register(self, name, path, get_data):
+        """Register a document written to path from get_data()"""
+        with self.lock:
+            self.documents[name] = (path, get_data)
+    
+    def mark_dirty(self, name):
+        """Schedule a document for the next flush"""
+        with self.lock:
+            self.dirty.add(name)
+    
+    def flush(self):
+        """Write all dirty documents
+        
+        Returns:
+            dict: Files and bytes written by this flush
+        """
+        with self.lock:
+            dirty, self.dirty = self.dirty, set()
+            files = 0
+            written = 0
+            for name in sorted(dirty):
+                path, get_data = self.documents[name]
+                try:
+                    written += write_json_atomic(path, get_data())
+                    files += 1
+                except Exception as e:
+                    logger.error(f"Error writing {path}: {e}")
+                    self.dirty.add(name)
+            
+            if files:
+                self.stats["flushes"] += 1
+                self.stats["files_written"] += files
+                self.stats["bytes_written"] += written
+            self.stats["last_files"] = files
+            self.stats["last_bytes"] = written
+        return {"files": files, "bytes": written}
+    
+    def get_stats(self):
+        """Get flush counts and bytes written"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["pending"] = len(self.dirty)
+        return stats
+    
+    def close(self):
+        """Flush anything pending"""
+        self.flush()
\ No newline at end of file
@@ -0,0 +1,216 @@
+"""
+Cycle Profiler
+Hierarchical stage timings for each trading cycle, written as one JSONL record per cycle
+
+Render a report from the recorded file with:
+    python -m utils.profiler [--file data/cycle_timings.jsonl] [--last 100]
+"""
+
+import os
+import json
+import time
+import argparse
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+from utils.log_writer import get_log_writer
+from utils.jsonl_tail import tail_jsonl
+
+logger = logging.getLogger("CollaborativeTrader")
+
+DEFAULT_TIMINGS_FILE = "data/cycle_timings.jsonl"
+PERCENTILES = (50, 95, 99)
+
+
+def summarize_durations(durations):
+    """p50/p95/p99 and mean of a list of durations in seconds"""
+    values = np.asarray(durations, dtype=np.float64)
+    summary = {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+    summary["mean"] = float(values.mean())
+    summary["n"] = len(values)
+    return summary
+
+
+class CycleProfiler:
+    """Times nested stages of a trading cycle
+    
+    Stages nest per thread: stage("llm") entered inside stage("scout") is
+    recorded as "scout/llm". Stages entered outside a cycle, or on a thread
+    other than the one running the cycle, cost almost nothing and are not
+    recorded. Repeated stages in one cycle are summed and counted.
+    """
+    
+    def __init__(self, timings_file=None, window=None, enabled=None):
+        """Initialize profiler
+        
+        Args:
+            timings_file (str, optional): JSONL output (default PROFILER_FILE or data/cycle_timings.jsonl)
+            window (int, optional): Cycles kept for rolling percentiles (default PROFILER_WINDOW or 100)
+            enabled (bool, optional): Record timings (default PROFILER_ENABLED or True)
+        """
+        self.timings_file = timings_file or os.getenv("PROFILER_FILE", DEFAULT_TIMINGS_FILE)
+        self.window = int(window if window is not None else os.getenv("PROFILER_WINDOW", 100))
+        if enabled is None:
+            enabled = os.getenv("PROFILER_ENABLED", "True").lower() in ["true", "1", "yes"]
+        self.enabled = enabled
+        
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.history = {}
+        self.last_record = None
+    
+    def begin_cycle(self):
+        """Start timing a cycle on the current thread"""
+        if not self.enabled:
+            return
+        self.local.stages = {}
+        self.local.stack = []
+        self.local.cycle_start = time.perf_counter()
+        self.local.cycle_timestamp = datetime.now(timezone.utc).isoformat()
+    
+    def end_cycle(self, **fields):
+        """Finish the cycle, write its record and update rolling percentiles
+        
+        Extra keyword arguments are stored in the record (e.g. fired reason).
+        
+        Returns:
+            dict: The cycle record, or None if no cycle was active
+        """
+        stages = getattr(self.local, "stages", None)
+        if not self.enabled or stages is None:
+            return None
+        
+        total = time.perf_counter() - self.local.cycle_start
+        self.local.stages = None
+        record = {
+            "timestamp": self.local.cycle_timestamp,
+            "total": round(total, 6),
+            "stages": {path: {"seconds": round(seconds, 6), "calls": calls} for path, (seconds, calls) in stages.items()}
+        }
+        record.update(fields)
+        
+        with self.lock:
+            self._push("total", total)
+            for path, (seconds, _) in stages.items():
+                self._push(path, seconds)
+            self.last_record = record
+        
+        get_log_writer().append(self.timings_file, record)
+        return record
+    
+    @contextmanager
+    def stage(self, name):
+        """Time a block as a stage nested under the stages currently open on this thread"""
+        stages = getattr(self.local, "stages", None)
+        if stages is None:
+            yield
+            return
+        
+        stack = self.local.stack
+        stack.append(name)
+        path = "/".join(stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            seconds, calls = stages.get(path, (0.0, 0))
+            stages[path] = (seconds + elapsed, calls + 1)
+    
+    def _push(self, path, seconds):
+        durations = self.history.get(path)
+        if durations is None:
+            durations = self.history[path] = deque(maxlen=self.window)
+        durations.append(seconds)
+    
+    def get_percentiles(self):
+        """Rolling p50/p95/p99 and mean per stage over the last window cycles"""
+        with self.lock:
+            history = {path: list(durations) for path, durations in self.history.items()}
+        return {path: summarize_durations(durations) for path, durations in history.items()}
+    
+    def format_last_cycle(self):
+        """One-line breakdown of the last cycle's top-level stages"""
+        record = self.last_record
+        if not record:
+            return "no cycle recorded"
+        parts = [f"{path} {stage['seconds']:.2f}s" for path, stage in record["stages"].items() if "/" not in path]
+        return f"{record['total']:.2f}s total: " + ", ".join(parts)
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler():
+    """Get the process-wide cycle profiler"""
+    global _profiler
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = CycleProfiler()
+        return _profiler
+
+
+def load_records(path, last=None):
+    """Read cycle records, optionally only the last N"""
+    if last:
+        return tail_jsonl(path, last)
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def render_report(records):
+    """Render a per-stage latency table from cycle records"""
+    if not records:
+        return "No cycle timings recorded"
+    
+    durations = {"total": [record["total"] for record in records]}
+    for record in records:
+        for path, stage in record.get("stages", {}).items():
+            durations.setdefault(path, []).append(stage["seconds"])
+    
+    # Order children directly under their parents, in first-seen order
+    order = {path: i for i, path in enumerate(durations)}
+    paths = sorted((path for path in durations if path != "total"),
+                   key=lambda path: [order.get("/".join(path.split("/")[:i + 1]), 0) for i in range(path.count("/") + 1)])
+    
+    mean_total = float(np.mean(durations["total"]))
+    lines = [
+        f"{len(records)} cycles from {records[0].get('timestamp', '?')} to {records[-1].get('timestamp', '?')}",
+        f"{'stage':<36}{'p50':>9}{'p95':>9}{'p99':>9}{'mean':>9}{'share':>8}{'n':>6}"
+    ]
+    for path in ["total"] + paths:
+        summary = summarize_durations(durations[path])
+        depth = path.count("/") if path != "total" else 0
+        label = ("  " * depth + path.split("/")[-1])[:35]
+        share = summary["mean"] * summary["n"] / len(records) / mean_total * 100 if mean_total else 0
+        lines.append(f"{label:<36}{summary['p50']:>9.3f}{summary['p95']:>9.3f}{summary['p99']:>9.3f}"
+                     f"{summary['mean']:>9.3f}{share:>7.1f}%{summary['n']:>6}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage latency report for trading cycles")
+    parser.add_argument("--file", default=os.getenv("PROFILER_FILE", DEFAULT_TIMINGS_FILE), help="Cycle timings JSONL file")
+    parser.add_argument("--last", type=int, default=100, help="Only the last N cycles (0 for all)")
+    args = parser.parse_args()
+    
+    print(render_report(load_records(args.file, args.last)))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file